@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""Evaluate SWE-bench Multilingual predictions as soon as the agent writes them.
+
+Watches ``preds.json`` (inotify, or mtime polling through ``PathWatcher``) and, whenever the
+harness is idle, hands only the instance ids not dispatched yet to one long-lived harness
+worker (``--worker``, run with the harness interpreter in the SWE-bench checkout). The worker
+loads the dataset once and calls the harness's ``run_instances`` per batch, so batches pay
+neither the harness start-up nor the dataset load again, and write per-instance reports
+only. Predictions that arrive while a batch runs are collected into the next batch.
+Instances that already have a ``report.json`` under the run id are skipped on start.
+
+Watching stops once every expected prediction exists, once the agent process that was
+writing ``preds.json`` has exited, or after ``--idle-deadline`` seconds without a change.
+Then (or right away with ``--once``) the harness CLI runs one last time on the full
+``preds-partial.jsonl`` snapshot. It skips the instances that already have reports, retries
+any that failed in a batch, and writes the only summary report of the run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import os
+import select
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.swebench_system_stats import process_cmdlines  # noqa: E402
+from scripts.swebench_watch import PathWatcher  # noqa: E402
+
+WORKDIR = Path(os.environ.get("WORKDIR", ROOT / "work" / "swebench"))
+MULTILINGUAL_TOTAL = 300
+DATASET_NAME = "SWE-bench/SWE-bench_Multilingual"
+# Exit status of a worker that cannot import the harness; batches stop, the final pass still runs.
+HARNESS_UNAVAILABLE = 3
+# The harness CLI's own defaults, for the options its ``run_instances`` takes.
+HARNESS_DEFAULTS = {
+    "cache_level": "env",
+    "clean": False,
+    "force_rebuild": False,
+    "timeout": 1800,
+    "namespace": "swebench",
+    "instance_image_tag": "latest",
+    "env_image_tag": "latest",
+    "rewrite_reports": False,
+}
+
+
+def load_preds(path: Path) -> dict | None:
+    """The predictions dict, or None while the file is missing or half-written."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def evaluated_ids(run_root: Path) -> set[str]:
+    """Instance ids with a harness ``report.json`` under ``run_evaluation/<run_id>``."""
+    if not run_root.is_dir():
+        return set()
+    return {path.parent.name for path in run_root.glob("*/*/report.json")}
+
+
+def write_jsonl(preds: dict, instance_ids: list[str], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        for instance_id in instance_ids:
+            handle.write(json.dumps(preds[instance_id]))
+            handle.write("\n")
+    os.replace(tmp_path, path)
+
+
+def agent_running(model: str, proc: str = "/proc") -> bool:
+    """Whether a ``mini-extra swebench`` multilingual run for ``model`` is alive."""
+    return any(
+        "mini-extra swebench" in cmdline and "--subset multilingual" in cmdline and f"/{model}-" in cmdline
+        for _, cmdline in process_cmdlines(proc)
+    )
+
+
+class PredsDelta:
+    """Tracks which predictions in ``preds.json`` have been handed to the harness."""
+
+    def __init__(self, preds_path: Path, dispatched: set[str] = frozenset()) -> None:
+        self.preds_path = preds_path
+        self.dispatched = set(dispatched)
+        self.preds: dict = {}
+
+    def refresh(self) -> list[str]:
+        """Re-read preds.json; return the ids not dispatched yet, in file order."""
+        preds = load_preds(self.preds_path)
+        if preds is not None:
+            self.preds = preds
+        return [instance_id for instance_id in self.preds if instance_id not in self.dispatched]
+
+    def take(self, instance_ids: list[str]) -> None:
+        self.dispatched.update(instance_ids)
+
+
+def _accepted(func, values: dict) -> dict:
+    """The subset of ``values`` that ``func`` takes, so harness releases can differ in signature."""
+    params = inspect.signature(func).parameters
+    return {name: value for name, value in values.items() if name in params}
+
+
+def serve_batches(args: argparse.Namespace) -> int:
+    """Worker: read batch file paths on stdin, evaluate each, answer one JSON line per batch."""
+    reply = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)  # harness output goes to stderr; stdout carries only the replies
+    sys.path.insert(0, os.getcwd())  # same lookup as `python -m` from the checkout
+    try:
+        from swebench.harness import run_evaluation as harness
+        from swebench.harness.utils import load_swebench_dataset
+    except ImportError as exc:
+        print(f"[multilingual] harness unavailable: {exc}", file=sys.stderr)
+        return HARNESS_UNAVAILABLE
+
+    dataset = {row["instance_id"]: row for row in load_swebench_dataset(args.dataset_name, args.split)}
+    options = {**HARNESS_DEFAULTS, "max_workers": args.workers, "run_id": args.run_id}
+    built = False
+    for line in sys.stdin:
+        with open(json.loads(line)["predictions"], encoding="utf-8") as handle:
+            predictions = {pred["instance_id"]: pred for pred in map(json.loads, handle)}
+        instances = [
+            dataset[instance_id]
+            for instance_id, pred in predictions.items()
+            if instance_id in dataset and (pred.get("model_patch") or "").strip()
+        ]
+        ok = True
+        try:
+            if instances and not built and options.get("namespace") is None:
+                import docker
+
+                build_options = _accepted(harness.build_env_images, options)
+                harness.build_env_images(docker.from_env(), list(dataset.values()), **build_options)
+                built = True
+            if instances:
+                batch = {**options, "predictions": predictions, "instances": instances}
+                harness.run_instances(**_accepted(harness.run_instances, batch))
+        except Exception as exc:  # one bad batch must not take down the worker
+            print(f"[multilingual] batch failed: {exc!r}", file=sys.stderr)
+            ok = False
+        reply.write(json.dumps({"ok": ok, "evaluated": len(instances)}) + "\n")
+    return 0
+
+
+class HarnessWorker:
+    """Orchestrator side of ``serve_batches``: one batch in flight at a time."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        command = [
+            args.python,
+            str(Path(__file__).resolve()),
+            "--worker",
+            "--model",
+            args.model,
+            "--dataset-name",
+            args.dataset_name,
+            "--split",
+            args.split,
+            "--workers",
+            str(args.workers),
+            "--run-id",
+            args.run_id,
+        ]
+        self.process = subprocess.Popen(
+            command, cwd=args.swebench_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        self.busy = False
+
+    def submit(self, predictions_path: Path) -> None:
+        self.busy = True
+        try:
+            self.process.stdin.write(json.dumps({"predictions": str(predictions_path)}) + "\n")
+            self.process.stdin.flush()
+        except BrokenPipeError:
+            pass  # the worker already exited; ``result`` reports it
+
+    def result(self) -> dict | None:
+        """The finished batch's reply, or None while it runs."""
+        if not self.busy or not select.select([self.process.stdout], [], [], 0)[0]:
+            return None
+        self.busy = False
+        line = self.process.stdout.readline()
+        return json.loads(line) if line else {"ok": False, "exited": self.process.wait()}
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=None if not self.busy else 5)
+            except subprocess.TimeoutExpired:
+                self.process.terminate()
+                self.process.wait()
+
+
+def harness_command(args: argparse.Namespace, predictions_path: Path) -> list[str]:
+    return [
+        args.python,
+        "-m",
+        "swebench.harness.run_evaluation",
+        "--dataset_name",
+        args.dataset_name,
+        "--split",
+        args.split,
+        "--predictions_path",
+        str(predictions_path),
+        "--max_workers",
+        str(args.workers),
+        "--run_id",
+        args.run_id,
+        "--report_dir",
+        str(args.report_dir),
+    ]
+
+
+def run_final_pass(args: argparse.Namespace, preds: dict) -> int:
+    snapshot = args.preds.with_name("preds-partial.jsonl")
+    write_jsonl(preds, list(preds), snapshot)
+    print(f"[multilingual] snapshot: {snapshot} ({len(preds)}/{args.total})", flush=True)
+    return subprocess.run(harness_command(args, snapshot), cwd=args.swebench_dir, check=False).returncode
+
+
+def watch(args: argparse.Namespace, delta: PredsDelta) -> None:
+    """Dispatch new predictions in batches until generation is complete, gone or idle."""
+    batch_path = args.preds.with_name("preds-delta.jsonl")
+    watcher = PathWatcher([str(args.preds)], use_inotify=not args.poll, poll_interval=args.poll_interval)
+    worker: HarnessWorker | None = None
+    batches = True
+    agent_seen = False
+    last_change = time.monotonic()
+    try:
+        while True:
+            result = worker.result() if worker is not None else None
+            if result is not None and not result["ok"]:
+                print("[multilingual] batch failed; the final pass retries it", flush=True)
+            if result is not None and "exited" in result:
+                batches = result["exited"] != HARNESS_UNAVAILABLE
+                if not batches:
+                    print("[multilingual] harness worker unavailable; evaluating in the final pass only", flush=True)
+                worker = None
+            if worker is None or not worker.busy:
+                pending = delta.refresh() if batches else []
+                if pending:
+                    write_jsonl(delta.preds, pending, batch_path)
+                    delta.take(pending)
+                    print(
+                        f"[multilingual] evaluating {len(pending)} new predictions "
+                        f"({len(delta.preds)}/{args.total} written)",
+                        flush=True,
+                    )
+                    worker = worker or HarnessWorker(args)
+                    worker.submit(batch_path)
+                    continue
+                if not batches:
+                    delta.refresh()
+                if len(delta.preds) >= args.total:
+                    break
+                running = agent_running(args.model)
+                if agent_seen and not running:
+                    print(f"[multilingual] agent exited at {len(delta.preds)}/{args.total} predictions", flush=True)
+                    break
+                agent_seen = agent_seen or running
+                if time.monotonic() - last_change >= args.idle_deadline:
+                    print(f"[multilingual] no new predictions for {args.idle_deadline:.0f}s; stopping", flush=True)
+                    break
+            # Wake on the next write to preds.json, or periodically to collect a finished batch.
+            if watcher.changes(args.poll_interval):
+                last_change = time.monotonic()
+    finally:
+        watcher.close()
+        if worker is not None:
+            worker.close()
+
+
+def run(args: argparse.Namespace) -> int:
+    run_root = args.swebench_dir / "logs" / "run_evaluation" / args.run_id
+    delta = PredsDelta(args.preds, evaluated_ids(run_root))
+    if delta.dispatched:
+        print(f"[multilingual] {len(delta.dispatched)} instances already evaluated under {args.run_id}", flush=True)
+    if not args.once:
+        watch(args, delta)
+
+    preds = load_preds(args.preds)
+    if preds is None:
+        print(f"[multilingual] preds.json missing or unreadable: {args.preds}", file=sys.stderr)
+        return 1
+    rc = run_final_pass(args, preds)
+    if rc == 0 and len(preds) >= args.total:
+        print(f"[multilingual] predictions complete ({len(preds)}/{args.total}); done.", flush=True)
+    return rc
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", required=True, help="Model label (e.g., qwen3).")
+    parser.add_argument("--preds", type=Path, help="preds.json to watch (default: WORKDIR/logs/swebench-multilingual/<model>/preds.json).")
+    parser.add_argument("--total", type=int, default=MULTILINGUAL_TOTAL, help="Predictions expected in a complete run.")
+    parser.add_argument("--workers", type=int, default=1, help="Harness --max_workers.")
+    parser.add_argument("--run-id", help="Harness run id (default: <model>-swebench-multilingual).")
+    parser.add_argument("--report-dir", type=Path, help="Summary report dir (default: next to preds.json under eval/).")
+    parser.add_argument("--swebench-dir", type=Path, default=WORKDIR / "SWE-bench", help="SWE-bench checkout to run the harness in.")
+    parser.add_argument("--dataset-name", default=DATASET_NAME)
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter with swebench installed.")
+    parser.add_argument("--once", action="store_true", help="Evaluate the current snapshot once and exit.")
+    parser.add_argument("--poll", action="store_true", help="Poll mtimes instead of using inotify.")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between polls and batch checks.")
+    parser.add_argument(
+        "--idle-deadline",
+        type=float,
+        default=3600.0,
+        help="Stop watching after this many seconds without a preds.json change.",
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.preds is None:
+        args.preds = WORKDIR / "logs" / "swebench-multilingual" / args.model / "preds.json"
+    args.run_id = args.run_id or f"{args.model}-swebench-multilingual"
+    args.report_dir = args.report_dir or args.preds.parent / "eval"
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    return serve_batches(args) if args.worker else run(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
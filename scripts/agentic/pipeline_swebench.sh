@@ -9,7 +9,7 @@ Options:
   --suite         swebench suite: multilingual or live-multilang
   --model         model label (e.g., qwen3, deepseek, mixtral, gptoss)
   --workers       evaluation worker count (default: env WORKERS or 1)
-  --sleep         sleep seconds between loops (default: env SLEEP_SECS or 300)
+  --sleep         sleep seconds between live-multilang loops (default: env SLEEP_SECS or 300)
   --loop          1 to loop until complete, 0 to run once (default: suite-based)
   -h, --help      show this help
 
@@ -75,84 +75,26 @@ if [[ -z "${LOOP}" ]]; then
   fi
 fi
 
-convert_preds_to_jsonl() {
-  local preds_json="$1"
-  local snapshot_jsonl="$2"
-  python3 - <<PY
-import json
-from pathlib import Path
-preds_path = Path("${preds_json}")
-out_path = Path("${snapshot_jsonl}")
-if not preds_path.exists():
-    raise SystemExit(2)
-with preds_path.open() as f:
-    data = json.load(f)
-if not isinstance(data, dict):
-    raise SystemExit(3)
-out_path.parent.mkdir(parents=True, exist_ok=True)
-with out_path.open("w") as out:
-    for v in data.values():
-        out.write(json.dumps(v))
-        out.write("\n")
-print(len(data))
-PY
-}
-
 run_multilingual_loop() {
   local preds_json="${LOGS_ROOT}/swebench-multilingual/${MODEL}/preds.json"
-  local snapshot_jsonl="${LOGS_ROOT}/swebench-multilingual/${MODEL}/preds-partial.jsonl"
-  local total=300
-  local run_id="${MODEL}-swebench-multilingual"
-  local report_dir="${LOGS_ROOT}/swebench-multilingual/${MODEL}/eval"
+  local eval_args=(
+    --model "${MODEL}"
+    --preds "${preds_json}"
+    --total 300
+    --workers "${WORKERS}"
+    --run-id "${MODEL}-swebench-multilingual"
+    --report-dir "${LOGS_ROOT}/swebench-multilingual/${MODEL}/eval"
+    --swebench-dir "${WORKDIR}/SWE-bench"
+  )
 
   mkdir -p "${LOGS_ROOT}/swebench-multilingual/${MODEL}"
+  if [[ "${LOOP}" -ne 1 ]]; then
+    eval_args+=(--once)
+  fi
 
-  while true; do
-    if [[ ! -f "${preds_json}" ]]; then
-      echo "[multilingual] preds.json missing: ${preds_json}"
-      if [[ "${LOOP}" -eq 1 ]]; then
-        sleep "${SLEEP_SECS}"
-        continue
-      fi
-      exit 1
-    fi
-
-    set +e
-    count=$(convert_preds_to_jsonl "${preds_json}" "${snapshot_jsonl}")
-    rc=$?
-    set -e
-    if [[ "${rc}" -ne 0 ]]; then
-      echo "[multilingual] failed to convert preds.json (rc=${rc})"
-      if [[ "${LOOP}" -eq 1 ]]; then
-        sleep "${SLEEP_SECS}"
-        continue
-      fi
-      exit 1
-    fi
-
-    echo "[multilingual] snapshot: ${snapshot_jsonl} (${count}/${total})"
-
-    # Run evaluation (resumes via run_id)
-    source "${WORKDIR}/.venv/bin/activate"
-    (cd "${WORKDIR}/SWE-bench" && \
-      python -m swebench.harness.run_evaluation \
-        --dataset_name SWE-bench/SWE-bench_Multilingual \
-        --split test \
-        --predictions_path "${snapshot_jsonl}" \
-        --max_workers "${WORKERS}" \
-        --run_id "${run_id}" \
-        --report_dir "${report_dir}")
-
-    if [[ "${count}" -ge "${total}" ]]; then
-      echo "[multilingual] predictions complete (${count}/${total}); done."
-      break
-    fi
-
-    if [[ "${LOOP}" -ne 1 ]]; then
-      break
-    fi
-    sleep "${SLEEP_SECS}"
-  done
+  # Evaluates new predictions as they land in preds.json, then writes the full report.
+  source "${WORKDIR}/.venv/bin/activate"
+  python "${SCRIPT_DIR}/incremental_eval.py" "${eval_args[@]}"
 }
 
 run_live_multilang_loop() {
@@ -1,18 +1,41 @@
 #!/usr/bin/env python3
-"""Emit standard blocked-status report for SWE-bench runs."""
+"""Emit standard blocked-status report for SWE-bench runs.
+
+With ``--serve``, ``--watch`` or ``--snapshot`` it runs as a daemon instead: state is kept
+in memory and updated from file-change events (see ``StatusTracker``), and served as
+Prometheus text on ``/metrics``, a JSON snapshot on ``/status.json``, a snapshot file
+and/or a refreshing terminal view.
+"""
 from __future__ import annotations
 
+import argparse
 import json
+import os
 import subprocess
+import sys
+import threading
+import time
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.swebench_eval_index import DEFAULT_INDEX_PATH, EvalIndex, summarize  # noqa: E402
+from scripts.swebench_image_db import DEFAULT_IMAGE_DB, ImageDB  # noqa: E402
+from scripts.swebench_image_plan import format_bytes, run_docker  # noqa: E402
+from scripts.swebench_system_stats import load_average, memory_stats, process_cmdlines, system_stats  # noqa: E402
+from scripts.swebench_watch import PathWatcher  # noqa: E402
+
 LOGS = ROOT / "logs"
 WORK = ROOT / "work" / "swebench"
 LOGS_ALT = WORK / "logs"
 
 MODELS = ["qwen3", "deepseek", "mixtral", "gptoss"]
+MULTILINGUAL_TOTAL = 300
 LIVE_SPLITS = {
     "c": 31,
     "cpp": 17,
@@ -26,14 +49,17 @@ LIVE_SPLITS = {
 
 
 def _ps_text() -> str:
-    return subprocess.check_output("ps aux", shell=True, text=True)
+    return "\n".join(f"{pid} {cmdline}" for pid, cmdline in process_cmdlines())
 
 
-def _running_generation(ps_text: str, model: str) -> bool:
-    return (
-        f"mini-extra swebench --config /home/sailorjoe6/work/swebench/configs/{model}-livesweagent.yaml --subset multilingual"
-        in ps_text
-    )
+def _generation_process_line(ps_text: str, model: str, suite: str, split: str) -> str | None:
+    subset = "--subset multilingual" if suite == "multilingual" else "--subset SWE-bench-Live/MultiLang"
+    for line in ps_text.splitlines():
+        if "mini-extra swebench" not in line or subset not in line or f"/{model}-" not in line:
+            continue
+        if suite == "multilingual" or f"--split {split}" in line:
+            return line.strip()
+    return None
 
 
 def _gen_process_line(ps_text: str) -> str | None:
@@ -82,29 +108,6 @@ def _preds_paths(suite: str, model: str, split: str | None = None) -> list[Path]
     ]
 
 
-def _suite_status():
-    ps_text = _ps_text()
-    multilingual = {}
-    for model in MODELS:
-        count = _count_preds(_preds_paths("multilingual", model))
-        status = "done" if count >= 300 else ("running" if _running_generation(ps_text, model) else "waiting")
-        multilingual[model] = (status, count, 300)
-
-    live = {}
-    for model in MODELS:
-        split_counts = {}
-        all_done = True
-        for split, total in LIVE_SPLITS.items():
-            count = _count_preds(_preds_paths("live-multilang", model, split))
-            split_counts[split] = (count, total)
-            if count < total:
-                all_done = False
-        status = "done" if all_done and split_counts else "waiting"
-        live[model] = (status, split_counts)
-
-    return multilingual, live, ps_text
-
-
 def _latest_model_dir(run_root: Path) -> Path | None:
     if not run_root.exists():
         return None
@@ -115,39 +118,8 @@ def _latest_model_dir(run_root: Path) -> Path | None:
     return model_dirs[0]
 
 
-def _eval_stats():
-    run_id = "qwen3-swebench-multilingual"
-    run_root = WORK / "SWE-bench" / "logs" / "run_evaluation" / run_id
-    model_dir = _latest_model_dir(run_root)
-    if model_dir is None:
-        return 0, 0, 0, 0, 0.0, None
-
-    instance_dirs = [p for p in model_dir.iterdir() if p.is_dir()]
-    total = len(instance_dirs)
-    report_files = [p / "report.json" for p in instance_dirs if (p / "report.json").exists()]
-
-    resolved = 0
-    for rf in report_files:
-        outer = _load_json(rf)
-        inst = next(iter(outer))
-        inner = outer[inst]
-        if inner.get("resolved") is True:
-            resolved += 1
-
-    error_count = 0
-    for inst_dir in instance_dirs:
-        if (inst_dir / "report.json").exists():
-            continue
-        log_path = inst_dir / "run_instance.log"
-        if not log_path.exists():
-            continue
-        text = log_path.read_text(errors="ignore")
-        if "EvaluationError" in text or "Patch Apply Failed" in text or "ERROR - Error in evaluating model" in text:
-            error_count += 1
-
-    count = len(report_files)
-    percent = (resolved / count * 100.0) if count else 0.0
-    return total, count, error_count, resolved, percent, model_dir
+def _run_root(model: str) -> Path:
+    return WORK / "SWE-bench" / "logs" / "run_evaluation" / f"{model}-swebench-multilingual"
 
 
 def _summary_report_path(model: str) -> Path | None:
@@ -190,176 +162,651 @@ def _patch_text(entry: dict) -> str | None:
     return None
 
 
-def _dataset_status(preds: dict, model_dir: Path | None) -> Counter:
+def _dataset_status(preds: dict, model_dir: Path | None, index: EvalIndex, workers: int | None = None) -> Counter:
     counts: Counter = Counter()
     if not preds or model_dir is None:
         return counts
 
+    instance_dirs = []
     for inst_id, entry in preds.items():
         patch = _patch_text(entry)
         if not patch or not str(patch).strip():
             counts["patch_empty"] += 1
             continue
+        instance_dirs.append(model_dir / inst_id)
+    for outcome in index.outcomes(instance_dirs, workers).values():
+        counts[outcome["category"]] += 1
 
-        inst_dir = model_dir / inst_id
-        report_path = inst_dir / "report.json"
-        if report_path.exists():
-            report = _load_json(report_path)
-            inner = report.get(inst_id, {})
-            if inner.get("resolved") is True:
-                counts["resolved"] += 1
-            elif inner.get("patch_successfully_applied") is True:
-                counts["applied_tests_failed"] += 1
-            elif inner.get("patch_successfully_applied") is False:
-                counts["patch_apply_failed"] += 1
-            else:
-                counts["evaluated_unknown"] += 1
-            continue
+    return counts
 
-        log_path = inst_dir / "run_instance.log"
-        if not log_path.exists():
-            counts["not_evaluated"] += 1
-            continue
 
-        text = log_path.read_text(errors="ignore")
-        if (
-            "Patch Apply Failed" in text
-            or "Only garbage was found in the patch input" in text
-            or "patch unexpectedly ends in middle of line" in text
-        ):
-            counts["patch_apply_failed"] += 1
-        elif "container" in text and "is not running" in text:
-            counts["container_error"] += 1
-        elif "Error in evaluating model" in text or "EvaluationError" in text:
-            counts["eval_error"] += 1
-        else:
-            counts["eval_error"] += 1
+def _live_eval_dir(model: str, split: str) -> Path | None:
+    for base in (LOGS_ALT, LOGS):
+        path = base / "swebench-live-multilang" / model / split / "eval"
+        if path.is_dir():
+            return path
+    return None
 
-    return counts
+
+def _matrix_cells() -> list[tuple[str, str, str, int]]:
+    cells = []
+    for model in MODELS:
+        cells.append((model, "multilingual", "test", MULTILINGUAL_TOTAL))
+        cells.extend((model, "live-multilang", split, total) for split, total in LIVE_SPLITS.items())
+    return cells
+
+
+def _cell_eval_dir(model: str, suite: str, split: str) -> Path | None:
+    if suite == "multilingual":
+        return _latest_model_dir(_run_root(model))
+    return _live_eval_dir(model, split)
+
+
+def _collect_cell(
+    index: EvalIndex, ps_text: str, model: str, suite: str, split: str, total: int, eval_dir: Path | None
+) -> dict:
+    """Generation, evaluation and outcome categories for one model x suite/split.
+
+    Runs in a collector thread, so the index classifies anything still unparsed serially.
+    """
+    candidates = _preds_paths(suite, model, None if suite == "multilingual" else split)
+    try:
+        preds, preds_path = _load_preds(candidates)
+    except (OSError, ValueError):
+        preds, preds_path = {}, _select_preds_path(candidates)
+    process = _generation_process_line(ps_text, model, suite, split)
+    status = "done" if len(preds) >= total else ("running" if process else "waiting")
+
+    if suite == "multilingual":
+        summary_path = _summary_report_path(model)
+        summary_counts = _summary_report_counts(summary_path) if summary_path else {}
+    else:
+        summary_path = eval_dir / "results.json" if eval_dir and (eval_dir / "results.json").exists() else None
+        try:
+            summary_counts = _load_json(summary_path) if summary_path else {}
+        except (OSError, ValueError):
+            summary_counts = {}
+    summary = summarize(index.scan(eval_dir, workers=1) if eval_dir else {})
+    return {
+        "model": model,
+        "suite": suite,
+        "split": split,
+        "generation": {
+            "count": len(preds),
+            "total": total,
+            "status": status,
+            "preds_path": str(preds_path) if preds_path else None,
+            "process": process,
+        },
+        "evaluation": {
+            "eval_dir": str(eval_dir) if eval_dir else None,
+            **summary,
+            "resolve_rate": (summary["resolved"] / summary["reports"]) if summary["reports"] else 0.0,
+            "summary_report": str(summary_path) if summary_path else None,
+            "summary_counts": summary_counts,
+        },
+        "outcomes": dict(_dataset_status(preds, eval_dir, index, workers=1)),
+    }
+
+
+def collect_status(index: EvalIndex, workers: int = 8) -> dict:
+    """The full models x suites/splits matrix, one cell per worker thread.
+
+    Changed harness logs are classified first, from this thread and with the index's one
+    process pool; the collector threads then only read preds and cached outcomes.
+    """
+    ps_text = _ps_text()
+    matrix = [(*cell, _cell_eval_dir(*cell[:3])) for cell in _matrix_cells()]
+    index.prime(eval_dir for *_, eval_dir in matrix if eval_dir is not None)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        cells = list(executor.map(lambda cell: _collect_cell(index, ps_text, *cell), matrix))
+    index.save()
+    return {
+        "generated": time.time(),
+        "cells": cells,
+        "processes": {"generation": _gen_process_line(ps_text), "evaluation": _eval_process_line(ps_text)},
+    }
+
+
+def _system_stats(args: argparse.Namespace) -> dict:
+    cache_dir = WORK / "cache"
+    return system_stats(
+        gpu=not args.no_gpu,
+        gpu_ttl=args.gpu_cache_ttl,
+        sample_path=cache_dir / "cpu-sample.json",
+        cache_path=cache_dir / "gpu-stats.json",
+    )
 
 
-def _system_stats():
-    free = subprocess.check_output("free -h", shell=True, text=True).strip().splitlines()
-    uptime = subprocess.check_output("uptime", shell=True, text=True).strip()
-    mpstat = subprocess.check_output("mpstat -P ALL 1 1", shell=True, text=True)
-    gpu = subprocess.check_output(
-        "nvidia-smi --query-gpu=name,utilization.gpu,utilization.memory,memory.total,memory.used --format=csv,noheader",
-        shell=True,
-        text=True,
-    ).strip()
-    return free, uptime, mpstat, gpu
+def _image_footprint() -> dict:
+    if not DEFAULT_IMAGE_DB.exists():
+        return {}
+    return ImageDB(str(DEFAULT_IMAGE_DB)).footprint()
 
 
-def main() -> int:
-    multilingual, live, ps_text = _suite_status()
+def _running_containers() -> list[str] | None:
+    try:
+        result = run_docker(["ps", "--format", "{{.Names}}"], timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return sorted(line.strip() for line in result.stdout.splitlines() if line.strip())
+
+
+class StatusTracker:
+    """Status state kept up to date from change notifications.
+
+    Covers every model x suite/split cell that ``collect_status`` reports. Every watched path
+    maps to the one piece of state it affects: a preds.json candidate to its cell's count, an
+    eval root (a multilingual run_evaluation run root, or a live split dir) to the choice of
+    that cell's eval dir, the eval dir to its instance list, and each instance dir to that
+    instance's outcome. ``apply`` recomputes only those pieces; eval outcomes come from the
+    incremental ``EvalIndex``.
+    """
+
+    def __init__(self, index: EvalIndex, containers: bool = True) -> None:
+        self.index = index
+        self.track_containers = containers
+        self.preds: dict[tuple[str, str, str], int] = {}
+        self.preds_total: dict[tuple[str, str, str], int] = {}
+        self.eval_dirs: dict[tuple[str, str, str], Path | None] = {}
+        self.outcomes: dict[tuple[str, str, str], dict[str, dict]] = {}
+        self.memory: dict[str, int] = {}
+        self.load: tuple[float, float, float] = (0.0, 0.0, 0.0)
+        self.containers: list[str] | None = None
+        self.updated = 0.0
+        self._sources: dict[str, tuple] = {}
+
+    def _register(self, path: Path, source: tuple) -> None:
+        self._sources[os.path.abspath(path)] = source
+
+    def watch_paths(self) -> set[str]:
+        return set(self._sources)
+
+    def refresh_all(self) -> None:
+        for model, suite, split, total in _matrix_cells():
+            key = (suite, model, split)
+            self.preds_total[key] = total
+            for path in self._preds_candidates(key):
+                self._register(path, ("preds", key))
+            self._update_preds(key)
+            for path in self._eval_roots(key):
+                self._register(path, ("eval_root", key))
+            self._update_eval_root(key, rescan=True)
+        self.sample(containers=True)
+
+    @staticmethod
+    def _preds_candidates(key: tuple[str, str, str]) -> list[Path]:
+        suite, model, split = key
+        return _preds_paths(suite, model, None if suite == "multilingual" else split)
+
+    @staticmethod
+    def _eval_roots(key: tuple[str, str, str]) -> list[Path]:
+        """Directories whose children decide where ``key``'s eval dir is."""
+        suite, model, split = key
+        if suite == "multilingual":
+            return [_run_root(model)]
+        return [base / "swebench-live-multilang" / model / split for base in (LOGS_ALT, LOGS)]
+
+    def _update_preds(self, key: tuple[str, str, str]) -> None:
+        try:
+            self.preds[key] = _count_preds(self._preds_candidates(key))
+        except (OSError, ValueError):
+            # Caught mid-write; the writer's next event triggers another read.
+            pass
+
+    def _update_eval_root(self, key: tuple[str, str, str], rescan: bool = False) -> None:
+        suite, model, split = key
+        eval_dir = _cell_eval_dir(model, suite, split)
+        previous = self.eval_dirs.get(key)
+        if not rescan and previous == eval_dir:
+            # A live split dir also changes with every preds.json write.
+            return
+        if previous is not None:
+            stale = [
+                path
+                for path, source in self._sources.items()
+                if source[0] in ("eval_dir", "instance") and source[1] == key
+            ]
+            for path in stale:
+                del self._sources[path]
+        self.eval_dirs[key] = eval_dir
+        if eval_dir is None:
+            self.outcomes[key] = {}
+            return
+        self._register(eval_dir, ("eval_dir", key))
+        self._update_eval_dir(key)
+
+    def _update_eval_dir(self, key: tuple[str, str, str]) -> None:
+        eval_dir = self.eval_dirs.get(key)
+        if eval_dir is None:
+            return
+        self.outcomes[key] = self.index.scan(eval_dir)
+        for instance_id in self.outcomes[key]:
+            self._register(eval_dir / instance_id, ("instance", key))
+
+    def apply(self, changed: set[str]) -> bool:
+        """Recompute the state behind ``changed`` paths; True if anything was recomputed."""
+        touched = False
+        for path in sorted(changed):
+            source = self._sources.get(path)
+            if source is None:
+                continue
+            touched = True
+            kind, key = source
+            if kind == "preds":
+                self._update_preds(key)
+            elif kind == "eval_root":
+                self._update_eval_root(key)
+            elif kind == "eval_dir":
+                self._update_eval_dir(key)
+            elif kind == "instance":
+                self.outcomes.setdefault(key, {})[Path(path).name] = self.index.outcome(Path(path))
+        if touched:
+            self.index.save()
+            self.updated = time.time()
+        return touched
+
+    def sample(self, containers: bool = False) -> None:
+        self.memory = memory_stats()
+        self.load = load_average()
+        if containers and self.track_containers:
+            self.containers = _running_containers()
+        self.updated = time.time()
+
+    def snapshot(self) -> dict:
+        preds = [
+            {"suite": suite, "model": model, "split": split, "count": count, "total": self.preds_total[(suite, model, split)]}
+            for (suite, model, split), count in sorted(self.preds.items())
+        ]
+        evals = []
+        for model, suite, split, _ in _matrix_cells():
+            key = (suite, model, split)
+            outcomes = self.outcomes.get(key, {})
+            summary = summarize(outcomes)
+            eval_dir = self.eval_dirs.get(key)
+            evals.append(
+                {
+                    "suite": suite,
+                    "model": model,
+                    "split": split,
+                    "eval_dir": str(eval_dir) if eval_dir else None,
+                    **summary,
+                    "resolve_rate": (summary["resolved"] / summary["reports"]) if summary["reports"] else 0.0,
+                    "categories": dict(Counter(outcome["category"] for outcome in outcomes.values())),
+                }
+            )
+        return {
+            "updated": self.updated,
+            "preds": preds,
+            "eval": evals,
+            "memory": self.memory,
+            "load": list(self.load),
+            "containers": self.containers,
+        }
+
+
+def _prom_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+def render_metrics(snapshot: dict) -> str:
+    """Prometheus text exposition of a tracker snapshot."""
+    lines: list[str] = []
+
+    def metric(name: str, help_text: str, samples: list[tuple[dict, float]]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(f"{name}{_prom_labels(labels)} {value}" for labels, value in samples)
+
+    def cell(row: dict) -> dict:
+        return {"suite": row["suite"], "model": row["model"], "split": row["split"]}
+
+    metric("swebench_preds", "Predictions written to preds.json.", [(cell(r), r["count"]) for r in snapshot["preds"]])
+    metric("swebench_preds_expected", "Instances in the split.", [(cell(r), r["total"]) for r in snapshot["preds"]])
+    evals = snapshot["eval"]
+    metric("swebench_eval_instances", "Instance dirs in the harness run.", [(cell(r), r["total"]) for r in evals])
+    metric("swebench_eval_reports", "Instances with a report.json.", [(cell(r), r["reports"]) for r in evals])
+    metric("swebench_eval_errors", "Instances with an error logged and no report.", [(cell(r), r["errors"]) for r in evals])
+    metric("swebench_eval_resolved", "Resolved instances.", [(cell(r), r["resolved"]) for r in evals])
+    metric("swebench_resolve_rate", "Resolved over reports written.", [(cell(r), r["resolve_rate"]) for r in evals])
+    metric(
+        "swebench_eval_outcomes",
+        "Instances per outcome category.",
+        [({**cell(r), "category": category}, count) for r in evals for category, count in sorted(r["categories"].items())],
+    )
+    memory = snapshot["memory"]
+    if memory:
+        metric(
+            "swebench_memory_bytes",
+            "Host memory.",
+            [({"kind": kind}, memory[f"mem_{kind}"]) for kind in ("total", "used", "available")],
+        )
+        metric("swebench_swap_bytes", "Host swap.", [({"kind": kind}, memory[f"swap_{kind}"]) for kind in ("total", "used")])
+    metric(
+        "swebench_load_average",
+        "Host load average.",
+        [({"window": window}, value) for window, value in zip(("1m", "5m", "15m"), snapshot["load"])],
+    )
+    if snapshot["containers"] is not None:
+        metric("swebench_running_containers", "Running docker containers.", [({}, len(snapshot["containers"]))])
+    metric("swebench_status_updated_timestamp_seconds", "Last state change.", [({}, snapshot["updated"])])
+    return "\n".join(lines) + "\n"
+
+
+def render_terminal(snapshot: dict) -> str:
+    counts = {(r["suite"], r["model"], r["split"]): r for r in snapshot["preds"]}
+    lines = [f"SWE-bench status  {time.strftime('%H:%M:%S', time.localtime(snapshot['updated']))}", ""]
+    lines.append(
+        f"{'model':<10} {'multilingual':>13} {'live':>9} {'reports':>9} {'resolved':>9} {'rate':>7} "
+        f"{'live reports':>13} {'live resolved':>14}"
+    )
+    evals: dict[str, list[dict]] = {}
+    for row in snapshot["eval"]:
+        evals.setdefault(row["model"], []).append(row)
+    for model, rows in evals.items():
+        ml = counts.get(("multilingual", model, "test"))
+        live = [r for (suite, m, _), r in counts.items() if suite == "live-multilang" and m == model]
+        live_text = f"{sum(r['count'] for r in live)}/{sum(r['total'] for r in live)}"
+        ml_text = f"{ml['count']}/{ml['total']}" if ml else "-"
+        ml_eval = next(r for r in rows if r["suite"] == "multilingual")
+        live_evals = [r for r in rows if r["suite"] == "live-multilang"]
+        live_reports = f"{sum(r['reports'] for r in live_evals)}/{sum(r['total'] for r in live_evals)}"
+        lines.append(
+            f"{model:<10} {ml_text:>13} {live_text:>9} {ml_eval['reports']:>4}/{ml_eval['total']:<4} "
+            f"{ml_eval['resolved']:>9} {ml_eval['resolve_rate'] * 100:>6.1f}% "
+            f"{live_reports:>13} {sum(r['resolved'] for r in live_evals):>14}"
+        )
+    memory = snapshot["memory"]
+    if memory:
+        lines.append("")
+        lines.append(
+            f"RAM {format_bytes(memory['mem_used'])} / {format_bytes(memory['mem_total'])}   "
+            f"Swap {format_bytes(memory['swap_used'])} / {format_bytes(memory['swap_total'])}   "
+            f"Load {' '.join(f'{value:.2f}' for value in snapshot['load'])}"
+        )
+    if snapshot["containers"] is not None:
+        lines.append(f"Containers running: {len(snapshot['containers'])}")
+    return "\n".join(lines) + "\n"
+
+
+class _Published:
+    """Pre-rendered responses; scrapes only copy bytes."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.metrics = b""
+        self.json = b"{}"
+
+    def update(self, snapshot: dict) -> None:
+        metrics = render_metrics(snapshot).encode("utf-8")
+        body = json.dumps(snapshot, indent=2).encode("utf-8")
+        with self.lock:
+            self.metrics, self.json = metrics, body
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    published: _Published
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        with self.published.lock:
+            if path == "/metrics":
+                status, body = 200, self.published.metrics
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif path in ("/", "/status.json"):
+                status, body, content_type = 200, self.published.json, "application/json"
+            else:
+                status, body, content_type = 404, b"not found\n", "text/plain"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_status(published: _Published, address: str) -> ThreadingHTTPServer:
+    host, _, port = address.rpartition(":")
+    handler = type("StatusHandler", (_StatusHandler,), {"published": published})
+    server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_daemon(args: argparse.Namespace) -> int:
+    tracker = StatusTracker(EvalIndex(str(DEFAULT_INDEX_PATH)), containers=not args.no_containers)
+    tracker.refresh_all()
+    published = _Published()
+    server = serve_status(published, args.serve) if args.serve else None
+    if server:
+        print(f"Serving /metrics and /status.json on http://{server.server_address[0]}:{server.server_address[1]}")
+    watched = tracker.watch_paths()
+    watcher = PathWatcher(watched)
+    last_sample = last_containers = time.monotonic()
+    try:
+        while True:
+            snapshot = tracker.snapshot()
+            published.update(snapshot)
+            if args.snapshot:
+                tmp_path = f"{args.snapshot}.tmp"
+                Path(tmp_path).write_text(json.dumps(snapshot, indent=2))
+                os.replace(tmp_path, args.snapshot)
+            if args.watch:
+                sys.stdout.write("\033[H\033[2J" + render_terminal(snapshot))
+                sys.stdout.flush()
+            while True:
+                changed = watcher.changes(timeout=args.interval)
+                dirty = tracker.apply(changed)
+                current = tracker.watch_paths()
+                for path in current - watched:
+                    watcher.add(path)
+                for path in watched - current:
+                    watcher.discard(path)
+                watched = current
+                now = time.monotonic()
+                if now - last_sample >= args.interval:
+                    refresh_containers = now - last_containers >= args.container_interval
+                    tracker.sample(containers=refresh_containers)
+                    last_sample = now
+                    last_containers = now if refresh_containers else last_containers
+                    dirty = True
+                if dirty:
+                    break
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+        if server:
+            server.shutdown()
+
+
+def _print_multilingual(model: str, cell: dict, eval_line: str | None) -> None:
+    """Generation, evaluation and dataset-status sections for one model's multilingual run."""
+    generation = cell["generation"]
+    evaluation = cell["evaluation"]
+    if not generation["count"] and not evaluation["eval_dir"]:
+        return
+    preds_count = generation["count"]
+    preds_pct = (preds_count / generation["total"] * 100.0) if preds_count else 0.0
+    print(f"\nGeneration ({model} multilingual)")
+    print(f"- preds.json entries: {preds_count} / {generation['total']} ({preds_pct:.2f}%)")
+    if generation["preds_path"]:
+        print(f"- preds path: {generation['preds_path']}")
+    else:
+        print("- preds path: missing (checked repo logs + work logs)")
+    print(f"- process running: {generation['process'] or 'not running'}")
+
+    total, reports = evaluation["total"], evaluation["reports"]
+    print(f"\nEvaluation ({model} multilingual)")
+    print(f"- reports written: {reports} / {total}")
+    print(f"- errors logged: {evaluation['errors']} / {total}")
+    print(f"- resolved: {evaluation['resolved']} / {reports} \u2192 {evaluation['resolve_rate'] * 100.0:.2f}%")
+    if evaluation["eval_dir"]:
+        print(f"- eval dir: {evaluation['eval_dir']}")
+    if evaluation["summary_report"]:
+        print(f"- summary report: {evaluation['summary_report']}")
+        if evaluation["summary_counts"]:
+            summary_bits = ", ".join(
+                f"{k.replace('_', ' ')}={v}" for k, v in evaluation["summary_counts"].items()
+            )
+            print(f"- summary counts: {summary_bits}")
+    running = eval_line if eval_line and f"{model}-swebench-multilingual" in eval_line else None
+    print(f"- process running: {running or 'not running'}")
+
+    dataset_counts = cell["outcomes"]
+    if not preds_count:
+        return
+    print(f"\nDataset status ({model} multilingual)")
+    total_ds = preds_count
+    print(f"- total instances: {total_ds}")
+    resolved_total = dataset_counts.get("resolved", 0)
+    applied_failed = dataset_counts.get("applied_tests_failed", 0)
+    apply_failed = dataset_counts.get("patch_apply_failed", 0)
+    eval_errors = dataset_counts.get("eval_error", 0)
+    container_errors = dataset_counts.get("container_error", 0)
+    empty_patches = dataset_counts.get("patch_empty", 0)
+    no_log = dataset_counts.get("not_evaluated", 0)
+    evaluated_total = resolved_total + applied_failed + apply_failed + eval_errors + container_errors
+    resolved_pct_eval = (resolved_total / evaluated_total * 100.0) if evaluated_total else 0.0
+    resolved_pct_total = (resolved_total / total_ds * 100.0) if total_ds else 0.0
+    not_through_eval = total_ds - evaluated_total
+    print(f"- evaluated (tests attempted): {evaluated_total}")
+    print(f"- resolved: {resolved_total} / {evaluated_total} \u2192 {resolved_pct_eval:.2f}%")
+    print(f"- resolved of total: {resolved_total} / {total_ds} \u2192 {resolved_pct_total:.2f}%")
+    print(f"- applied but tests failed: {applied_failed}")
+    print(f"- patch apply failed (garbage/reversed): {apply_failed}")
+    print(f"- patch empty: {empty_patches}")
+    print(f"- eval errors (other): {eval_errors}")
+    print(f"- container errors: {container_errors}")
+    print(f"- not evaluated (no log): {no_log}")
+    print(f"- not through test evaluation: {not_through_eval}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Emit the SWE-bench run status report.")
+    parser.add_argument("--json", action="store_true", help="Print the full status matrix as JSON.")
+    parser.add_argument("--workers", type=int, default=8, help="Threads collecting the status matrix.")
+    parser.add_argument("--no-gpu", action="store_true", help="Skip the nvidia-smi query.")
+    parser.add_argument(
+        "--gpu-cache-ttl",
+        type=float,
+        default=30.0,
+        help="Reuse a cached nvidia-smi answer younger than this many seconds.",
+    )
+    parser.add_argument(
+        "--serve",
+        default="",
+        help="Daemon: serve /metrics (Prometheus) and /status.json on [HOST:]PORT (default host 127.0.0.1).",
+    )
+    parser.add_argument("--watch", action="store_true", help="Daemon: redraw a terminal view on every change.")
+    parser.add_argument("--snapshot", default="", help="Daemon: rewrite this JSON snapshot file on every change.")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=5.0,
+        help="Daemon: seconds between memory/load samples (file changes are picked up immediately).",
+    )
+    parser.add_argument(
+        "--container-interval",
+        type=float,
+        default=15.0,
+        help="Daemon: seconds between docker ps calls for the running-container count.",
+    )
+    parser.add_argument("--no-containers", action="store_true", help="Daemon: do not call docker ps.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.serve or args.watch or args.snapshot:
+        return run_daemon(args)
+    index = EvalIndex(str(DEFAULT_INDEX_PATH))
+    report = collect_status(index, workers=args.workers)
+    if args.json:
+        report["images"] = _image_footprint()
+        report["system"] = _system_stats(args)
+        print(json.dumps(report, indent=2))
+        return 0
+    cells = {(cell["model"], cell["suite"], cell["split"]): cell for cell in report["cells"]}
 
     print("Summary (status by suite/model)")
     print("swebench-multilingual:")
     for model in MODELS:
-        status, count, total = multilingual[model]
-        print(f"- {model}: {status} (test: {count}/{total})")
+        generation = cells[(model, "multilingual", "test")]["generation"]
+        print(f"- {model}: {generation['status']} (test: {generation['count']}/{generation['total']})")
 
     print("\nswebench-live-multilang:")
     for model in MODELS:
-        status, splits = live[model]
-        parts = ", ".join(f"{k}: {v[0]}/{v[1]}" for k, v in splits.items())
+        live = [cells[(model, "live-multilang", split)]["generation"] for split in LIVE_SPLITS]
+        statuses = {generation["status"] for generation in live}
+        status = "done" if statuses == {"done"} else ("running" if "running" in statuses else "waiting")
+        parts = ", ".join(f"{split}: {gen['count']}/{gen['total']}" for split, gen in zip(LIVE_SPLITS, live))
         print(f"- {model}: {status} ({parts})")
 
-    # Generation
-    preds_candidates = _preds_paths("multilingual", "qwen3")
-    preds_path = _select_preds_path(preds_candidates)
-    preds_count = _count_preds(preds_candidates)
-    preds_pct = (preds_count / 300 * 100.0) if preds_count else 0.0
-    gen_line = _gen_process_line(ps_text)
-    print("\nGeneration (Qwen3 multilingual)")
-    print(f"- preds.json entries: {preds_count} / 300 ({preds_pct:.2f}%)")
-    if preds_path:
-        print(f"- preds path: {preds_path}")
-    else:
-        print("- preds path: missing (checked repo logs + work logs)")
-    if gen_line:
-        print(f"- process running: {gen_line}")
-    else:
-        print("- process running: not running")
+    for model in MODELS:
+        _print_multilingual(model, cells[(model, "multilingual", "test")], report["processes"]["evaluation"])
 
-    # Evaluation
-    total, reports, errors, resolved, resolved_pct, model_dir = _eval_stats()
-    eval_line = _eval_process_line(ps_text)
-    print("\nEvaluation")
-    print(f"- reports written: {reports} / {total}")
-    print(f"- errors logged: {errors} / {total}")
-    print(f"- resolved: {resolved} / {reports} \u2192 {resolved_pct:.2f}%")
-    if model_dir:
-        print(f"- eval dir: {model_dir}")
-    summary_path = _summary_report_path("qwen3")
-    if summary_path:
-        summary_counts = _summary_report_counts(summary_path)
-        print(f"- summary report: {summary_path}")
-        if summary_counts:
-            summary_bits = ", ".join(f"{k.replace('_', ' ')}={v}" for k, v in summary_counts.items())
-            print(f"- summary counts: {summary_bits}")
-    if eval_line:
-        print(f"- process running: {eval_line}")
-    else:
-        print("- process running: not running")
-
-    preds, _ = _load_preds(preds_candidates)
-    dataset_counts = _dataset_status(preds, model_dir)
-    if preds:
-        print("\nDataset status (Qwen3 multilingual)")
-        total_ds = len(preds)
-        print(f"- total instances: {total_ds}")
-        resolved_total = dataset_counts.get("resolved", 0)
-        applied_failed = dataset_counts.get("applied_tests_failed", 0)
-        apply_failed = dataset_counts.get("patch_apply_failed", 0)
-        eval_errors = dataset_counts.get("eval_error", 0)
-        container_errors = dataset_counts.get("container_error", 0)
-        empty_patches = dataset_counts.get("patch_empty", 0)
-        no_log = dataset_counts.get("not_evaluated", 0)
-        evaluated_total = resolved_total + applied_failed + apply_failed + eval_errors + container_errors
-        resolved_pct_eval = (resolved_total / evaluated_total * 100.0) if evaluated_total else 0.0
-        resolved_pct_total = (resolved_total / total_ds * 100.0) if total_ds else 0.0
-        not_through_eval = total_ds - evaluated_total
-        print(f"- evaluated (tests attempted): {evaluated_total}")
-        print(f"- resolved: {resolved_total} / {evaluated_total} \u2192 {resolved_pct_eval:.2f}%")
-        print(f"- resolved of total: {resolved_total} / {total_ds} \u2192 {resolved_pct_total:.2f}%")
-        print(f"- applied but tests failed: {applied_failed}")
-        print(f"- patch apply failed (garbage/reversed): {apply_failed}")
-        print(f"- patch empty: {empty_patches}")
-        print(f"- eval errors (other): {eval_errors}")
-        print(f"- container errors: {container_errors}")
-        print(f"- not evaluated (no log): {no_log}")
-        print(f"- not through test evaluation: {not_through_eval}")
+    live_lines = []
+    for model in MODELS:
+        for split in LIVE_SPLITS:
+            cell = cells[(model, "live-multilang", split)]
+            evaluation = cell["evaluation"]
+            if not evaluation["eval_dir"]:
+                continue
+            line = (
+                f"- {model} {split}: preds {cell['generation']['count']}/{cell['generation']['total']}, "
+                f"reports {evaluation['reports']}/{evaluation['total']}, resolved {evaluation['resolved']}"
+            )
+            counts = evaluation["summary_counts"]
+            if counts:
+                line += f" (results.json: {', '.join(f'{k}={v}' for k, v in counts.items())})"
+            live_lines.append(line)
+    if live_lines:
+        print("\nEvaluation (live-multilang)")
+        print("\n".join(live_lines))
+
+    footprint = _image_footprint()
+    if footprint:
+        print("\nImages (image database)")
+        for suite, report in sorted(footprint.items()):
+            splits = ", ".join(
+                f"{split}: {totals['pulled']}/{totals['images']}" for split, totals in sorted(report["splits"].items())
+            )
+            print(
+                f"- {suite}: {report['pulled']}/{report['images']} pulled, "
+                f"{format_bytes(report['bytes'])} ({splits})"
+            )
 
     # System stats
-    free, uptime, mpstat, gpu = _system_stats()
+    stats = _system_stats(args)
+    memory = stats["memory"]
     print("\nSystem stats")
-    for line in free:
-        if line.startswith("Mem:"):
-            parts = line.split()
-            used = parts[2]
-            total = parts[1]
-            avail = parts[-1]
-            print(f"- RAM: {used} / {total}, {avail} available")
-        if line.startswith("Swap:"):
-            parts = line.split()
-            used = parts[2]
-            total = parts[1]
-            print(f"- Swap: {used} / {total}")
-    # CPU summary from mpstat (Average all)
-    for line in mpstat.splitlines():
-        if line.startswith("Average:") and "all" in line:
-            parts = line.split()
-            # columns: CPU %usr %nice %sys %iowait %irq %soft %steal %guest %gnice %idle
-            usr = parts[3]
-            sys = parts[5]
-            idle = parts[-1]
-            print(f"- CPU: {usr}% user, {sys}% sys, {idle}% idle (load avg {uptime.split('load average:')[-1].strip()})")
-            break
-    # GPU
-    if gpu:
-        name, util, mem_util, *_ = [p.strip() for p in gpu.split(",")]
-        print(f"- GPU: {util} util, {mem_util} mem util")
+    print(
+        f"- RAM: {format_bytes(memory['mem_used'])} / {format_bytes(memory['mem_total'])}, "
+        f"{format_bytes(memory['mem_available'])} available"
+    )
+    print(f"- Swap: {format_bytes(memory['swap_used'])} / {format_bytes(memory['swap_total'])}")
+    cpu = stats["cpu"]
+    load = ", ".join(f"{value:.2f}" for value in stats["load"])
+    print(
+        f"- CPU: {cpu['user']:.2f}% user, {cpu['system']:.2f}% sys, {cpu['idle']:.2f}% idle "
+        f"(load avg {load})"
+    )
+    if stats["pressure"]:
+        parts = ", ".join(
+            f"{resource} " + "/".join(f"{kind} {value:.1f}%" for kind, value in kinds.items())
+            for resource, kinds in stats["pressure"].items()
+        )
+        print(f"- Pressure (avg10): {parts}")
+    for gpu in stats["gpus"] or []:
+        print(f"- GPU: {gpu['utilization.gpu']}% util, {gpu['utilization.memory']}% mem util")
 
     return 0
 
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Token-budget admission and adaptive concurrency control for prediction generation."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CHARS_PER_TOKEN = 3.5
+# Chat-template tokens added per message (role markers, separators) plus the assistant header.
+MESSAGE_OVERHEAD_TOKENS = 8
+REPLY_OVERHEAD_TOKENS = 4
+
+
+class TokenEstimator:
+    """Estimate prompt tokens with a HuggingFace tokenizer, or a calibrated heuristic.
+
+    The heuristic starts at ``DEFAULT_CHARS_PER_TOKEN`` and is recalibrated from the
+    ``prompt_tokens`` the server reports via ``observe()``.
+    """
+
+    def __init__(self, tokenizer_name: str = "") -> None:
+        self.tokenizer = None
+        if tokenizer_name:
+            try:
+                from transformers import AutoTokenizer  # type: ignore
+
+                self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+            except Exception as exc:
+                print(
+                    f"Tokenizer {tokenizer_name} unavailable ({exc}); using heuristic estimate.",
+                    file=sys.stderr,
+                )
+        self._lock = threading.Lock()
+        self._observed_chars = 0
+        self._observed_tokens = 0
+
+    @property
+    def chars_per_token(self) -> float:
+        with self._lock:
+            if self._observed_tokens:
+                return self._observed_chars / self._observed_tokens
+        return DEFAULT_CHARS_PER_TOKEN
+
+    def estimate(self, messages: List[Dict[str, str]]) -> int:
+        if self.tokenizer is not None:
+            try:
+                return len(self.tokenizer.apply_chat_template(messages, add_generation_prompt=True))
+            except Exception:
+                text = "\n".join(message["content"] for message in messages)
+                return len(self.tokenizer.encode(text)) + MESSAGE_OVERHEAD_TOKENS * len(messages)
+        chars = sum(len(message["content"]) for message in messages)
+        overhead = MESSAGE_OVERHEAD_TOKENS * len(messages) + REPLY_OVERHEAD_TOKENS
+        return int(chars / self.chars_per_token) + overhead
+
+    def observe(self, messages: List[Dict[str, str]], prompt_tokens: Optional[int]) -> None:
+        """Calibrate the heuristic against a server-reported prompt token count."""
+        if self.tokenizer is not None or not prompt_tokens:
+            return
+        overhead = MESSAGE_OVERHEAD_TOKENS * len(messages) + REPLY_OVERHEAD_TOKENS
+        content_tokens = int(prompt_tokens) - overhead
+        if content_tokens <= 0:
+            return
+        with self._lock:
+            self._observed_chars += sum(len(message["content"]) for message in messages)
+            self._observed_tokens += content_tokens
+
+
+class AdmissionRejected(RuntimeError):
+    pass
+
+
+class AdmissionController:
+    """Clamp ``max_tokens`` to the context window and cap in-flight tokens.
+
+    ``max_model_len`` is the served ``--max-model-len`` (0 disables clamping).
+    ``kv_capacity`` caps the sum of ``prompt + max_tokens`` over requests in flight
+    (0 disables the cap). A single request larger than the capacity is still
+    admitted once nothing else is in flight, so the run cannot deadlock.
+    """
+
+    def __init__(
+        self,
+        estimator: TokenEstimator,
+        max_model_len: int = 0,
+        kv_capacity: int = 0,
+        safety_margin: int = 32,
+    ) -> None:
+        self.estimator = estimator
+        self.max_model_len = max_model_len
+        self.kv_capacity = kv_capacity
+        self.safety_margin = safety_margin
+        self.in_flight_tokens = 0
+        self._cond = threading.Condition()
+
+    def plan(self, prompt_tokens: int, max_tokens: int) -> int:
+        """Return the clamped ``max_tokens``; raise AdmissionRejected if nothing fits."""
+        if not self.max_model_len:
+            return max_tokens
+        remaining = self.max_model_len - prompt_tokens - self.safety_margin
+        if remaining <= 0:
+            raise AdmissionRejected(
+                f"prompt ~{prompt_tokens} tokens leaves no room in max-model-len {self.max_model_len}"
+            )
+        return min(max_tokens, remaining)
+
+    def acquire(self, tokens: int) -> None:
+        with self._cond:
+            if self.kv_capacity:
+                self._cond.wait_for(
+                    lambda: self.in_flight_tokens == 0
+                    or self.in_flight_tokens + tokens <= self.kv_capacity
+                )
+            self.in_flight_tokens += tokens
+
+    def release(self, tokens: int) -> None:
+        with self._cond:
+            self.in_flight_tokens -= tokens
+            self._cond.notify_all()
+
+
+class AdaptiveConcurrency:
+    """AIMD concurrency limit driven by server latency and errors.
+
+    The limit grows by one after ``limit`` consecutive healthy completions (roughly one
+    step per round trip) and is multiplied by ``backoff`` on an overload signal: a
+    429/503, a timeout, or a latency sample above ``spike_factor`` times the running
+    baseline. After a decrease, further overload signals are ignored until ``limit``
+    more completions arrive, so one burst of congestion only halves the limit once.
+    Latency is time to first token when available, else time per output token.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 64,
+        backoff: float = 0.5,
+        spike_factor: float = 2.5,
+        log_path: str = "",
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.peak = self.limit
+        self.backoff = backoff
+        self.spike_factor = spike_factor
+        self.log_path = log_path
+        self.history: List[Dict[str, Any]] = []
+        self._baseline: Optional[float] = None
+        self._healthy = 0
+        self._cooldown = 0
+        self._log("start")
+
+    def _log(self, reason: str) -> None:
+        entry = {"time": round(time.time(), 3), "limit": self.limit, "reason": reason}
+        self.history.append(entry)
+        if self.log_path:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(entry) + "\n")
+
+    def _decrease(self, reason: str) -> None:
+        self._healthy = 0
+        if self._cooldown > 0:
+            return
+        new_limit = max(self.minimum, int(self.limit * self.backoff))
+        self._cooldown = self.limit
+        if new_limit != self.limit:
+            self.limit = new_limit
+            self._log(reason)
+
+    def record_success(self, latency: Optional[float]) -> None:
+        if self._cooldown > 0:
+            self._cooldown -= 1
+        if latency is not None and latency > 0:
+            if self._baseline is not None and latency > self._baseline * self.spike_factor:
+                self._decrease("latency_spike")
+                return
+            # Slow-moving baseline so gradual queueing still registers as a spike.
+            self._baseline = latency if self._baseline is None else 0.9 * self._baseline + 0.1 * latency
+        self._healthy += 1
+        if self._healthy >= self.limit and self.limit < self.maximum:
+            self._healthy = 0
+            self.limit += 1
+            self.peak = max(self.peak, self.limit)
+            self._log("increase")
+
+    def record_overload(self, reason: str) -> None:
+        # Only completions count the post-decrease hold down; overloads inside it just reset _healthy.
+        self._decrease(reason)
+
+    def summary(self) -> str:
+        return (
+            f"Concurrency: final {self.limit}, peak {self.peak}, {len(self.history) - 1} adjustments "
+            f"(use the sustained value for VLLM_MAX_NUM_SEQS)"
+        )
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Local, column-projected snapshots of the SWE-bench datasets with an instance_id index.
+
+The first load of a (suite, split, columns) combination goes through HuggingFace
+``datasets`` and writes two files under ``work/swebench/cache/datasets/<suite>/``:
+
+- ``<split>.<columns-hash>.jsonl``: one JSON row per line, only the requested columns.
+- ``<split>.<columns-hash>.index.json``: column list, data size and the byte span of
+  every row keyed by ``instance_id`` (dataset order is kept).
+
+Later loads memory-map the JSONL and read the index, so they neither import
+``datasets`` nor materialize rows that are never touched.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+WORK_DIR = REPO_ROOT / "work" / "swebench"
+DEFAULT_SNAPSHOT_DIR = WORK_DIR / "cache" / "datasets"
+
+SUITE_DATASETS = {
+    "swebench-multilingual": "SWE-bench/SWE-bench_Multilingual",
+    "swebench-live-multilang": "SWE-bench-Live/MultiLang",
+}
+SPLITS_MANIFEST = "splits.json"
+
+
+def load_hf_dataset(suite: str, split: Optional[str] = None) -> Any:
+    """Load a suite from HuggingFace: one split, or the whole DatasetDict when ``split`` is None."""
+    try:
+        from datasets import load_dataset  # type: ignore
+    except Exception as exc:  # pragma: no cover - import error path
+        raise RuntimeError(
+            f"datasets is required to build a dataset snapshot. Activate {WORK_DIR}/.venv first."
+        ) from exc
+    if split is None:
+        return load_dataset(SUITE_DATASETS[suite])
+    return load_dataset(SUITE_DATASETS[suite], split=split)
+
+
+def project_rows(dataset: Any, columns: Sequence[str]) -> Any:
+    """Drop unneeded columns before iterating, when the dataset supports it."""
+    available = getattr(dataset, "column_names", None)
+    if available is None or not hasattr(dataset, "select_columns"):
+        return dataset
+    return dataset.select_columns([column for column in columns if column in available])
+
+
+def columns_tag(columns: Sequence[str]) -> str:
+    return hashlib.sha1(",".join(sorted(set(columns))).encode("utf-8")).hexdigest()[:10]
+
+
+class DatasetSnapshot:
+    """Read-only view over a snapshot; rows are decoded lazily from the memory map.
+
+    Holds the data file open until ``close``; use it as a context manager.
+    """
+
+    def __init__(self, data_path: Path, index: Dict[str, Any]) -> None:
+        self.data_path = data_path
+        self.columns: List[str] = index["columns"]
+        self._ids: List[str] = index["ids"]
+        self._spans: List[Tuple[int, int]] = [tuple(span) for span in index["spans"]]
+        self._offsets = {instance_id: pos for pos, instance_id in enumerate(self._ids)}
+        self._handle = None
+        self._map: Any = b""
+        if index["size"]:
+            self._handle = open(data_path, "rb")
+            self._map = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self) -> "DatasetSnapshot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for pos in range(len(self._ids)):
+            yield self._row(pos)
+
+    def __contains__(self, instance_id: object) -> bool:
+        return instance_id in self._offsets
+
+    def _row(self, pos: int) -> Dict[str, Any]:
+        start, length = self._spans[pos]
+        return json.loads(self._map[start : start + length])
+
+    def instance_ids(self) -> List[str]:
+        return list(self._ids)
+
+    def get(self, instance_id: str) -> Optional[Dict[str, Any]]:
+        pos = self._offsets.get(instance_id)
+        return None if pos is None else self._row(pos)
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._map.close()
+            self._handle.close()
+            self._handle = None
+
+
+def snapshot_paths(root: Path, suite: str, split: str, columns: Sequence[str]) -> Tuple[Path, Path]:
+    stem = f"{split}.{columns_tag(columns)}"
+    base = root / suite
+    return base / f"{stem}.jsonl", base / f"{stem}.index.json"
+
+
+def write_snapshot(
+    rows: Any, data_path: Path, index_path: Path, columns: Sequence[str]
+) -> DatasetSnapshot:
+    """Write projected ``rows`` as a snapshot; the index is written last and marks completion."""
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    ids: List[str] = []
+    spans: List[Tuple[int, int]] = []
+    tmp_data = data_path.with_suffix(f".tmp.{os.getpid()}")
+    offset = 0
+    with open(tmp_data, "wb") as handle:
+        for pos, row in enumerate(rows):
+            record = {column: row.get(column) for column in columns if column in row}
+            line = json.dumps(record, ensure_ascii=False).encode("utf-8")
+            handle.write(line + b"\n")
+            ids.append(str(row.get("instance_id") or f"#{pos}"))
+            spans.append((offset, len(line)))
+            offset += len(line) + 1
+    os.replace(tmp_data, data_path)
+    index = {"columns": sorted(set(columns)), "size": offset, "ids": ids, "spans": spans}
+    tmp_index = index_path.with_suffix(f".tmp.{os.getpid()}")
+    tmp_index.write_text(json.dumps(index), encoding="utf-8")
+    os.replace(tmp_index, index_path)
+    return DatasetSnapshot(data_path, index)
+
+
+def open_snapshot(data_path: Path, index_path: Path) -> Optional[DatasetSnapshot]:
+    """Open a finished snapshot; None if it is missing or does not match its data file."""
+    try:
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+        if data_path.stat().st_size != index["size"]:
+            return None
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+    return DatasetSnapshot(data_path, index)
+
+
+def load_snapshot(
+    suite: str,
+    split: str,
+    columns: Sequence[str],
+    snapshot_dir: Optional[str] = None,
+    refresh: bool = False,
+    source: Any = None,
+) -> DatasetSnapshot:
+    """Return the snapshot of ``suite``/``split`` holding ``columns``, building it on a miss.
+
+    ``source`` is an already loaded split to build from (avoids a second HF load).
+    """
+    root = Path(snapshot_dir) if snapshot_dir else DEFAULT_SNAPSHOT_DIR
+    data_path, index_path = snapshot_paths(root, suite, split, columns)
+    if not refresh:
+        snapshot = open_snapshot(data_path, index_path)
+        if snapshot is not None:
+            return snapshot
+    if source is None:
+        source = load_hf_dataset(suite, split)
+    return write_snapshot(project_rows(source, columns), data_path, index_path, columns)
+
+
+def suite_splits(suite: str, snapshot_dir: Optional[str] = None) -> Optional[List[str]]:
+    """Split names recorded by an earlier full-suite load, or None."""
+    root = Path(snapshot_dir) if snapshot_dir else DEFAULT_SNAPSHOT_DIR
+    try:
+        return json.loads((root / suite / SPLITS_MANIFEST).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def load_suite(
+    suite: str,
+    splits: Sequence[str],
+    columns: Sequence[str],
+    snapshot_dir: Optional[str] = None,
+    refresh: bool = False,
+) -> List[Tuple[str, DatasetSnapshot]]:
+    """Snapshots for ``splits`` (all splits of the suite when empty)."""
+    root = Path(snapshot_dir) if snapshot_dir else DEFAULT_SNAPSHOT_DIR
+    names = list(splits) or (None if refresh else suite_splits(suite, snapshot_dir))
+    if names is not None and not refresh:
+        cached = [(name, open_snapshot(*snapshot_paths(root, suite, name, columns))) for name in names]
+        if all(snapshot is not None for _, snapshot in cached):
+            return cached  # type: ignore[return-value]
+    dataset = load_hf_dataset(suite)
+    if names is None:
+        names = list(dataset.keys())
+        manifest = root / suite / SPLITS_MANIFEST
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        manifest.write_text(json.dumps(names), encoding="utf-8")
+    return [
+        (name, load_snapshot(suite, name, columns, snapshot_dir, refresh, source=dataset[name]))
+        for name in names
+    ]
+
+
+def load_dataset_swebench(
+    split: str, columns: Sequence[str], snapshot_dir: Optional[str] = None, refresh: bool = False
+) -> DatasetSnapshot:
+    return load_snapshot("swebench-multilingual", split, columns, snapshot_dir, refresh)
+
+
+def load_dataset_live(
+    splits: Sequence[str],
+    columns: Sequence[str],
+    snapshot_dir: Optional[str] = None,
+    refresh: bool = False,
+) -> List[Tuple[str, DatasetSnapshot]]:
+    return load_suite("swebench-live-multilang", splits, columns, snapshot_dir, refresh)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Incremental index of SWE-bench harness outcomes per instance.
+
+The harness writes ``run_evaluation/<run_id>/<model>/<instance_id>/run_instance.log`` while an
+instance runs and ``report.json`` once it is evaluated. Instead of parsing every report and
+reading every log on each status check, the index caches the outcome of each file keyed by
+(path, mtime, size) and re-parses only files that changed since the last scan.
+
+An outcome is ``{"category", "report", "resolved", "error_logged"}`` where ``category`` is one
+of ``OUTCOME_CATEGORIES``.
+
+Logs can hold many megabytes of build and test output, so they are classified from a bounded
+head and tail window only (``LOG_HEAD_BYTES``/``LOG_TAIL_BYTES``): the harness logs patch
+failures, dead containers and evaluation errors right before it stops writing. All failure
+signatures are matched in one pass of a single precompiled regex, and a scan with many
+changed logs fans the classification out over a process pool.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+WORK_DIR = REPO_ROOT / "work" / "swebench"
+DEFAULT_INDEX_PATH = WORK_DIR / "cache" / "eval-index.json"
+
+OUTCOME_CATEGORIES = (
+    "resolved",
+    "applied_tests_failed",
+    "patch_apply_failed",
+    "evaluated_unknown",
+    "container_error",
+    "eval_error",
+    "not_evaluated",
+)
+PATCH_APPLY_SIGNATURES = (
+    "Patch Apply Failed",
+    "Only garbage was found in the patch input",
+    "patch unexpectedly ends in middle of line",
+)
+# Signatures status_report counts as "errors logged" for instances without a report.
+ERROR_LOGGED_SIGNATURES = ("EvaluationError", "Patch Apply Failed", "ERROR - Error in evaluating model")
+CONTAINER_SIGNATURES = ("container", "is not running")
+LOG_SIGNATURE_RE = re.compile(
+    "|".join(
+        re.escape(signature)
+        for signature in dict.fromkeys(PATCH_APPLY_SIGNATURES + ERROR_LOGGED_SIGNATURES + CONTAINER_SIGNATURES)
+    ).encode("utf-8")
+)
+LOG_HEAD_BYTES = 64 * 1024
+LOG_TAIL_BYTES = 256 * 1024
+# Below this many changed logs, a process pool costs more than it saves.
+POOL_MIN_LOGS = 16
+INDEX_VERSION = 2
+
+
+def report_outcome(path: Path, instance_id: str) -> Dict[str, Any]:
+    """Outcome from a harness ``report.json`` (``{instance_id: {"resolved", ...}}``)."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        data = {}
+    inner = data.get(instance_id) if isinstance(data, dict) else None
+    if inner is None and isinstance(data, dict) and data:
+        inner = next(iter(data.values()))
+    inner = inner if isinstance(inner, dict) else {}
+    applied = inner.get("patch_successfully_applied")
+    if inner.get("resolved") is True:
+        category = "resolved"
+    elif applied is True:
+        category = "applied_tests_failed"
+    elif applied is False:
+        category = "patch_apply_failed"
+    else:
+        category = "evaluated_unknown"
+    return {"category": category, "report": True, "resolved": category == "resolved", "error_logged": False}
+
+
+def read_log_windows(path: str, head: int = LOG_HEAD_BYTES, tail: int = LOG_TAIL_BYTES) -> List[bytes]:
+    """The whole log if it is small, else its first ``head`` and last ``tail`` bytes."""
+    with open(path, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size <= head + tail:
+            return [handle.read()]
+        first = handle.read(head)
+        handle.seek(size - tail)
+        return [first, handle.read(tail)]
+
+
+def log_signatures(path: str) -> set:
+    found = set()
+    for window in read_log_windows(path):
+        found.update(match.group(0).decode("utf-8") for match in LOG_SIGNATURE_RE.finditer(window))
+    return found
+
+
+def classify_signatures(found: set) -> Dict[str, Any]:
+    """Outcome for an instance whose log exists but which has no report."""
+    if found.intersection(PATCH_APPLY_SIGNATURES):
+        category = "patch_apply_failed"
+    elif found.issuperset(CONTAINER_SIGNATURES):
+        category = "container_error"
+    else:
+        category = "eval_error"
+    error_logged = bool(found.intersection(ERROR_LOGGED_SIGNATURES))
+    return {"category": category, "report": False, "resolved": False, "error_logged": error_logged}
+
+
+def log_outcome(path: str) -> Dict[str, Any]:
+    try:
+        return classify_signatures(log_signatures(path))
+    except OSError:
+        return classify_signatures(set())
+
+
+def classify_logs(paths: Sequence[str], workers: int = 0) -> List[Dict[str, Any]]:
+    """``log_outcome`` for each path, across ``workers`` processes (0 = one per CPU)."""
+    if workers == 1 or len(paths) < POOL_MIN_LOGS:
+        return [log_outcome(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers or None) as executor:
+        return list(executor.map(log_outcome, paths, chunksize=8))
+
+
+def _stat(path: Path) -> Optional[os.stat_result]:
+    try:
+        return path.stat()
+    except OSError:
+        return None
+
+
+def _instance_dirs(model_dir: Path) -> List[Path]:
+    try:
+        entries = list(os.scandir(model_dir))
+    except OSError:
+        return []
+    return [Path(entry.path) for entry in entries if entry.is_dir()]
+
+
+class EvalIndex:
+    """Per-file outcome cache; ``path=""`` keeps it in memory for the current process only.
+
+    ``workers`` bounds the process pool used for changed logs (0 = one per CPU, 1 = serial).
+    One index can be shared by several threads scanning different directories.
+    """
+
+    def __init__(self, path: str = "", workers: int = 0) -> None:
+        self.path = path
+        self.workers = workers
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.parsed = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                data = json.loads(Path(path).read_text(encoding="utf-8"))
+            except ValueError:
+                data = {}
+            if data.get("version") == INDEX_VERSION:
+                self.entries = data.get("entries", {})
+
+    def _source(self, instance_dir: Path) -> Tuple[str, Optional[Path], Optional[os.stat_result]]:
+        """Which file decides the outcome: ``("report"|"log"|"none", path, stat)``."""
+        for kind, name in (("report", "report.json"), ("log", "run_instance.log")):
+            path = instance_dir / name
+            stat = _stat(path)
+            if stat is not None:
+                return kind, path, stat
+        return "none", None, None
+
+    def _cached(self, path: Path, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cached = self.entries.get(str(path))
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            return cached["outcome"]
+        return None
+
+    def _store(self, path: Path, stat: os.stat_result, outcome: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.parsed += 1
+            self.entries[str(path)] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "outcome": outcome}
+            self._dirty = True
+        return outcome
+
+    def outcome(self, instance_dir: Path) -> Dict[str, Any]:
+        return self.outcomes([instance_dir])[instance_dir.name]
+
+    def outcomes(self, instance_dirs: Sequence[Path], workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Outcomes keyed by instance id; changed logs are classified together.
+
+        ``workers`` overrides ``self.workers`` for this call (1 keeps it in this thread).
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: List[Tuple[str, Path, os.stat_result]] = []
+        for instance_dir in instance_dirs:
+            kind, path, stat = self._source(instance_dir)
+            if path is None or stat is None:
+                results[instance_dir.name] = {
+                    "category": "not_evaluated",
+                    "report": False,
+                    "resolved": False,
+                    "error_logged": False,
+                }
+                continue
+            cached = self._cached(path, stat)
+            if cached is not None:
+                results[instance_dir.name] = cached
+            elif kind == "report":
+                results[instance_dir.name] = self._store(path, stat, report_outcome(path, instance_dir.name))
+            else:
+                pending.append((instance_dir.name, path, stat))
+        classified = classify_logs([str(path) for _, path, _ in pending], self.workers if workers is None else workers)
+        for (instance_id, path, stat), outcome in zip(pending, classified):
+            results[instance_id] = self._store(path, stat, outcome)
+        return results
+
+    def scan(self, model_dir: Path, workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Outcome of every instance directory under ``model_dir``."""
+        return self.outcomes(_instance_dirs(model_dir), workers)
+
+    def prime(self, model_dirs: Iterable[Path]) -> None:
+        """Bring every instance under ``model_dirs`` up to date in one batch (and one process pool).
+
+        Call it from a single thread before threads ``scan`` the same dirs with ``workers=1``.
+        """
+        self.outcomes([instance_dir for model_dir in model_dirs for instance_dir in _instance_dirs(model_dir)])
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        with self._lock, open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump({"version": INDEX_VERSION, "entries": self.entries}, handle)
+            self._dirty = False
+        os.replace(tmp_path, self.path)
+
+
+def summarize(outcomes: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """Instance dirs, reports written, errors logged without a report, and resolved count."""
+    return {
+        "total": len(outcomes),
+        "reports": sum(1 for outcome in outcomes.values() if outcome["report"]),
+        "errors": sum(1 for outcome in outcomes.values() if outcome["error_logged"] and not outcome["report"]),
+        "resolved": sum(1 for outcome in outcomes.values() if outcome["resolved"]),
+    }
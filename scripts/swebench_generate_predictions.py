@@ -4,17 +4,53 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import hashlib
+import itertools
 import json
 import os
+import re
+import socket
 import sys
 import time
-import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from typing import Any, Callable, Container, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.swebench_admission import (  # noqa: E402
+    AdaptiveConcurrency,
+    AdmissionController,
+    AdmissionRejected,
+    TokenEstimator,
+)
+from scripts.swebench_datasets import load_dataset_live, load_dataset_swebench  # noqa: E402
+from scripts.swebench_http import (  # noqa: E402
+    ConnectionPool,
+    Endpoint,
+    EndpointBalancer,
+    HTTPStatusError,
+    is_endpoint_failure,
+    iter_sse_data,
+)
+from scripts.swebench_response_cache import ResponseCache, cache_key  # noqa: E402
+from scripts.swebench_telemetry import RunTelemetry  # noqa: E402
+from scripts.swebench_work_queue import (  # noqa: E402
+    LeaseKeeper,
+    WorkQueue,
+    claim_instances,
+    default_worker_id,
+)
+
 WORK_DIR = REPO_ROOT / "work" / "swebench"
 DEFAULT_API_BASE = "http://localhost:8000/v1"
+DEFAULT_CACHE_DIR = WORK_DIR / "cache" / "responses"
+# Dataset columns read by build_user_prompt; snapshots hold only these.
+DATASET_COLUMNS = ("instance_id", "repo", "problem_statement", "hints_text", "all_hints_text")
 DEFAULT_SYSTEM_PROMPT = (
     "You are an expert software engineer. Produce a unified diff patch that fixes the issue. "
     "Return only the diff, with no extra commentary."
@@ -39,33 +75,90 @@ def build_user_prompt(instance: Dict[str, Any]) -> str:
     return "\n".join(parts).strip() + "\n"
 
 
+def build_messages(instance: Dict[str, Any]) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": DEFAULT_SYSTEM_PROMPT},
+        {"role": "user", "content": build_user_prompt(instance)},
+    ]
+
+
+def schedule_instances(
+    instances: Iterable[Dict[str, Any]],
+    strategy: str,
+    estimator: Optional[TokenEstimator] = None,
+) -> Iterable[Dict[str, Any]]:
+    """Order instances for dispatch.
+
+    ``dataset`` keeps dataset order. ``prefix`` sends instances of the same repo back to
+    back, in order of first appearance, so vLLM's automatic prefix cache can reuse the
+    system prompt, preamble and ``Repository:`` line. ``longest-first`` dispatches the
+    longest estimated prompts first to shorten the makespan of a concurrent run.
+    """
+    if strategy == "dataset":
+        return instances
+    if strategy == "longest-first":
+        estimator = estimator or TokenEstimator()
+        return sorted(instances, key=lambda i: estimator.estimate(build_messages(i)), reverse=True)
+    if strategy == "prefix":
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for instance in instances:
+            groups.setdefault((instance.get("repo") or "").strip(), []).append(instance)
+        return [instance for group in groups.values() for instance in group]
+    raise ValueError(f"Unknown schedule strategy: {strategy}")
+
+
+def usage_cached_tokens(usage: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Prefix-cache hits reported by vLLM (needs ``--enable-prompt-tokens-details``)."""
+    details = (usage or {}).get("prompt_tokens_details") or {}
+    cached = details.get("cached_tokens")
+    return int(cached) if cached is not None else None
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse ``i/N`` (0-based shard index ``i`` of ``N``)."""
+    try:
+        index, count = (int(part) for part in value.split("/", 1))
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}") from exc
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must satisfy 0 <= i < N, got {value!r}")
+    return index, count
+
+
+def shard_of(instance_id: str, count: int) -> int:
+    """Stable shard assignment: independent of dataset order, host and Python hash seed."""
+    digest = hashlib.sha256(instance_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def select_shard(
+    instances: Iterable[Dict[str, Any]], shard: Optional[Tuple[int, int]]
+) -> Iterable[Dict[str, Any]]:
+    if shard is None:
+        return instances
+    index, count = shard
+    return [i for i in instances if shard_of(i["instance_id"], count) == index]
+
+
+def shard_output_path(output: str, index: int, count: int) -> str:
+    """``preds.jsonl`` -> ``preds.shard-0-of-4.jsonl`` (sidecars and journals follow)."""
+    root, ext = os.path.splitext(output)
+    return f"{root}.shard-{index}-of-{count}{ext}"
+
+
 def parse_csv_list(value: Optional[str]) -> List[str]:
     if not value:
         return []
     return [item.strip() for item in value.split(",") if item.strip()]
 
 
-def load_dataset_swebench(split: str) -> Iterable[Dict[str, Any]]:
-    try:
-        from datasets import load_dataset  # type: ignore
-    except Exception as exc:  # pragma: no cover - import error path
-        raise RuntimeError(
-            f"datasets is required. Activate {WORK_DIR}/.venv first."
-        ) from exc
-    return load_dataset("SWE-bench/SWE-bench_Multilingual", split=split)
-
-
-def load_dataset_live(splits: Sequence[str]) -> List[Tuple[str, Iterable[Dict[str, Any]]]]:
-    try:
-        from datasets import load_dataset  # type: ignore
-    except Exception as exc:  # pragma: no cover - import error path
-        raise RuntimeError(
-            f"datasets is required. Activate {WORK_DIR}/.venv first."
-        ) from exc
-    dataset = load_dataset("SWE-bench-Live/MultiLang")
-    if not splits:
-        splits = list(dataset.keys())
-    return [(split, dataset[split]) for split in splits]
+def create_connection_pool(
+    api_base: str, api_key: Optional[str], size: int, timeout: float
+) -> ConnectionPool:
+    headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    return ConnectionPool(api_base, size=size, timeout=timeout, headers=headers)
 
 
 def openai_chat_completion(
@@ -76,23 +169,155 @@ def openai_chat_completion(
     max_tokens: int,
     timeout: int,
     api_key: Optional[str],
-) -> str:
-    url = f"{api_base.rstrip('/')}/chat/completions"
-    payload = {
+    pool: Optional[ConnectionPool] = None,
+    stream: bool = False,
+    budget: float = 0.0,
+    n: int = 1,
+) -> Dict[str, Any]:
+    """Request a chat completion.
+
+    Returns ``content``, ``finish_reason``, ``usage``, ``truncated_early`` (``None``,
+    ``"diff_complete"`` or ``"budget"``; only streaming requests stop early) and ``ttft``
+    (seconds to the first content token; streaming only). ``choices`` holds every
+    sampled choice (``n`` > 1 shares one prefill); the top-level fields describe the first.
+    """
+    payload: Dict[str, Any] = {
         "model": model,
         "messages": messages,
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
-    data = json.dumps(payload).encode("utf-8")
-    headers = {"Content-Type": "application/json"}
-    if api_key:
-        headers["Authorization"] = f"Bearer {api_key}"
-    request = urllib.request.Request(url, data=data, headers=headers, method="POST")
-    with urllib.request.urlopen(request, timeout=timeout) as response:
-        body = response.read().decode("utf-8")
-    result = json.loads(body)
-    return result["choices"][0]["message"]["content"]
+    if n > 1:
+        payload["n"] = n
+    owned = pool is None
+    if pool is None:
+        pool = create_connection_pool(api_base, api_key, size=1, timeout=timeout)
+    try:
+        if stream:
+            return stream_chat_completion(pool, payload, timeout, budget)
+        body = pool.request(
+            "POST", "chat/completions", body=json.dumps(payload).encode("utf-8"), timeout=timeout
+        )
+    finally:
+        if owned:
+            pool.close()
+    result = json.loads(body.decode("utf-8"))
+    choices = [
+        {
+            "content": choice["message"]["content"],
+            "finish_reason": choice.get("finish_reason"),
+            "truncated_early": None,
+        }
+        for choice in sorted(result["choices"], key=lambda c: c.get("index", 0))
+    ]
+    return {**choices[0], "usage": result.get("usage"), "ttft": None, "choices": choices}
+
+
+def stream_chat_completion(
+    pool: ConnectionPool, payload: Dict[str, Any], timeout: float, budget: float = 0.0
+) -> Dict[str, Any]:
+    """Stream a completion, cancelling once every choice has a closed fenced diff (or has
+    finished) or ``budget`` seconds pass.
+
+    Cancelling closes the connection, which makes vLLM abort the sequences.
+    """
+    n = max(1, int(payload.get("n", 1)))
+    payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+    started = time.monotonic()
+    deadline = started + budget if budget > 0 else None
+    ttft = None
+    read_timeout = min(timeout, budget) if deadline is not None else timeout
+    monitors = [DiffStreamMonitor() for _ in range(n)]
+    finish_reasons: List[Optional[str]] = [None] * n
+    usage = None
+    truncated_early = None
+    with pool.stream(
+        "POST", "chat/completions", body=json.dumps(payload).encode("utf-8"), timeout=read_timeout
+    ) as response:
+        try:
+            for data in iter_sse_data(response):
+                chunk = json.loads(data)
+                usage = chunk.get("usage") or usage
+                for choice in chunk.get("choices") or []:
+                    index = int(choice.get("index", 0))
+                    if index >= n:
+                        continue
+                    delta = (choice.get("delta") or {}).get("content") or ""
+                    if delta and ttft is None:
+                        ttft = time.monotonic() - started
+                    if delta:
+                        monitors[index].feed(delta)
+                    finish_reasons[index] = choice.get("finish_reason") or finish_reasons[index]
+                completed = [m.complete_at is not None for m in monitors]
+                if any(completed) and all(
+                    done or reason for done, reason in zip(completed, finish_reasons)
+                ):
+                    truncated_early = "diff_complete"
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    truncated_early = "budget"
+                    break
+        except socket.timeout:
+            if deadline is None:
+                raise
+            truncated_early = "budget"
+        if truncated_early is None:
+            response.read()
+    choices = []
+    for monitor, reason in zip(monitors, finish_reasons):
+        content = monitor.text
+        stopped = None
+        if truncated_early == "budget" and reason is None:
+            stopped = "budget"
+        elif truncated_early == "diff_complete" and monitor.complete_at is not None and reason is None:
+            content = content[: monitor.complete_at]
+            stopped = "diff_complete"
+        choices.append({"content": content, "finish_reason": reason, "truncated_early": stopped})
+    return {**choices[0], "usage": usage, "ttft": ttft, "choices": choices}
+
+
+class DiffStreamMonitor:
+    """Incrementally detect a closing code fence that follows a complete diff.
+
+    A diff counts as complete once a fenced block has shown a ``+++`` file header and
+    at least one ``@@`` hunk header; ``complete_at`` is the offset just past the
+    closing fence line.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.complete_at: Optional[int] = None
+        self._scanned = 0
+        self._in_fence = False
+        self._saw_header = False
+        self._saw_hunk = False
+
+    def feed(self, delta: str) -> bool:
+        self.text += delta
+        if self.complete_at is not None:
+            return True
+        while True:
+            newline = self.text.find("\n", self._scanned)
+            if newline < 0:
+                return False
+            line = self.text[self._scanned : newline].strip()
+            self._scanned = newline + 1
+            if self._scan_line(line):
+                self.complete_at = self._scanned
+                return True
+
+    def _scan_line(self, line: str) -> bool:
+        if line.startswith("```"):
+            if self._in_fence and self._saw_header and self._saw_hunk:
+                return True
+            self._in_fence = not self._in_fence
+            self._saw_header = self._saw_hunk = False
+        elif self._in_fence:
+            if line.startswith("+++ "):
+                self._saw_header = True
+            elif line.startswith("@@") and self._saw_header:
+                self._saw_hunk = True
+        return False
 
 
 def sanitize_patch(patch: str) -> str:
@@ -128,6 +353,81 @@ def sanitize_patch(patch: str) -> str:
     return "\n".join(lines) + "\n"
 
 
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def validate_patch(patch: str) -> Dict[str, bool]:
+    """Cheap structural checks on a sanitized patch.
+
+    ``parses``: at least one ``---``/``+++`` file header followed by a hunk, with nothing
+    but diff lines inside hunks. ``hunks_consistent``: every hunk body matches the line
+    counts in its ``@@`` header.
+    """
+    checks = {"non_empty": bool(patch.strip()), "parses": False, "hunks_consistent": False}
+    if not checks["non_empty"]:
+        return checks
+    lines = patch.splitlines()
+    saw_header = saw_hunk = False
+    parses = consistent = True
+    old_left = new_left = 0
+    idx = 0
+    while idx < len(lines):
+        line = lines[idx]
+        if old_left > 0 or new_left > 0:
+            if line.startswith("\\"):
+                idx += 1
+                continue
+            tag = line[:1] if line else " "
+            if tag == " ":
+                old_left -= 1
+                new_left -= 1
+            elif tag == "-":
+                old_left -= 1
+            elif tag == "+":
+                new_left -= 1
+            else:
+                parses = False
+                break
+            if old_left < 0 or new_left < 0:
+                consistent = False
+                old_left = new_left = 0
+            idx += 1
+            continue
+        match = HUNK_HEADER_RE.match(line)
+        if match:
+            if not saw_header:
+                parses = False
+                break
+            saw_hunk = True
+            old_left = int(match.group(2)) if match.group(2) is not None else 1
+            new_left = int(match.group(4)) if match.group(4) is not None else 1
+        elif line.startswith("--- ") and idx + 1 < len(lines) and lines[idx + 1].startswith("+++ "):
+            saw_header = True
+            idx += 1
+        elif line.startswith(("+", "-", " ")) and saw_hunk:
+            # Extra body lines after a hunk's counts are exhausted.
+            consistent = False
+        idx += 1
+    if old_left > 0 or new_left > 0:
+        consistent = False
+    checks["parses"] = parses and saw_header and saw_hunk
+    checks["hunks_consistent"] = checks["parses"] and consistent
+    return checks
+
+
+def select_candidate(candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Best candidate by (non_empty, parses, hunks_consistent); ties go to the lowest index."""
+    return max(
+        candidates,
+        key=lambda c: (
+            c["checks"]["non_empty"],
+            c["checks"]["parses"],
+            c["checks"]["hunks_consistent"],
+            -c["index"],
+        ),
+    )
+
+
 def read_existing_swebench_predictions(path: str) -> Set[str]:
     if not os.path.exists(path):
         return set()
@@ -153,20 +453,141 @@ def append_jsonl(path: str, payload: Dict[str, Any]) -> None:
         handle.write(json.dumps(payload, ensure_ascii=False) + "\n")
 
 
-def read_existing_live_predictions(path: str) -> Dict[str, Dict[str, Any]]:
+def live_journal_path(path: str) -> str:
+    return f"{path}.journal.jsonl"
+
+
+def read_live_journal(path: str) -> Dict[str, Dict[str, Any]]:
+    """Replay a Live predictions journal; undecodable (torn) lines are skipped."""
+    entries: Dict[str, Dict[str, Any]] = {}
     if not os.path.exists(path):
-        return {}
+        return entries
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(data, dict):
+                continue
+            instance_id = data.pop("instance_id", None)
+            if instance_id:
+                entries[instance_id] = data
+    return entries
+
+
+def read_swebench_prediction_records(path: str) -> List[Dict[str, Any]]:
+    """All decodable records of a SWE-bench predictions JSONL, in file order."""
+    records = []
     with open(path, "r", encoding="utf-8") as handle:
-        data = json.load(handle)
-    if not isinstance(data, dict):
-        raise ValueError("Expected a JSON object mapping instance_id to patch entries.")
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if data.get("instance_id"):
+                records.append(data)
+    return records
+
+
+def read_existing_live_predictions(path: str) -> Dict[str, Dict[str, Any]]:
+    data: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object mapping instance_id to patch entries.")
+    data.update(read_live_journal(live_journal_path(path)))
     return data
 
 
 def write_live_predictions(path: str, payload: Dict[str, Dict[str, Any]]) -> None:
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    with open(path, "w", encoding="utf-8") as handle:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
         json.dump(payload, handle, indent=2, ensure_ascii=False)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+
+class LivePredictionJournal:
+    """Append-only working store for SWE-bench-Live predictions.
+
+    Each result becomes one line in ``<output>.journal.jsonl``, fsynced every
+    ``fsync_every`` records. The ``{instance_id: {...}}`` JSON the evaluation harness
+    reads is only rewritten every ``checkpoint_every`` records and on ``close()``,
+    after which the journal is truncated.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        predictions: Dict[str, Dict[str, Any]],
+        fsync_every: int = 8,
+        checkpoint_every: int = 25,
+    ) -> None:
+        self.path = path
+        self.journal_path = live_journal_path(path)
+        self.predictions = predictions
+        self.fsync_every = max(1, fsync_every)
+        self.checkpoint_every = checkpoint_every
+        self._unsynced = 0
+        self._since_checkpoint = 0
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        self._handle = open(self.journal_path, "a+b")
+        self._drop_torn_tail()
+
+    def _drop_torn_tail(self) -> None:
+        """Truncate a partial last line left by a crash so new records start cleanly."""
+        self._handle.seek(0, os.SEEK_END)
+        size = self._handle.tell()
+        if size == 0:
+            return
+        self._handle.seek(size - 1)
+        if self._handle.read(1) == b"\n":
+            return
+        self._handle.seek(0)
+        content = self._handle.read()
+        self._handle.truncate(content.rfind(b"\n") + 1)
+        self._handle.seek(0, os.SEEK_END)
+
+    def append(self, instance_id: str, entry: Dict[str, Any]) -> None:
+        self.predictions[instance_id] = entry
+        record = {"instance_id": instance_id, **entry}
+        self._handle.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._unsynced += 1
+        self._since_checkpoint += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+        if self.checkpoint_every and self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def sync(self) -> None:
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._unsynced = 0
+
+    def checkpoint(self) -> None:
+        """Compact the journal into the harness JSON, then truncate the journal."""
+        self.sync()
+        write_live_predictions(self.path, self.predictions)
+        self._handle.truncate(0)
+        self._handle.seek(0)
+        self._since_checkpoint = 0
+
+    def close(self) -> None:
+        if self._handle.closed:
+            return
+        self.checkpoint()
+        self._handle.close()
+        os.remove(self.journal_path)
 
 
 def generate_patch(
@@ -178,14 +599,29 @@ def generate_patch(
     timeout: int,
     api_key: Optional[str],
     dry_run: bool,
-) -> str:
-    messages = [
-        {"role": "system", "content": DEFAULT_SYSTEM_PROMPT},
-        {"role": "user", "content": build_user_prompt(instance)},
-    ]
+    pool: Optional[ConnectionPool] = None,
+    stream: bool = False,
+    budget: float = 0.0,
+    cache: Optional[ResponseCache] = None,
+    n: int = 1,
+) -> Dict[str, Any]:
+    """Return the raw completion for ``instance`` (``n`` choices from one request).
+
+    With a ``cache``, deterministic (temperature 0) requests are served from disk when
+    possible, and their completions are stored unless the wall-clock budget cut them short.
+    Streamed requests are keyed apart, since they may end once the diff is complete.
+    """
+    messages = build_messages(instance)
+    user_prompt = messages[1]["content"]
     if dry_run:
-        return ""
-    return openai_chat_completion(
+        return {"content": "", "finish_reason": "dry_run", "usage": None, "truncated_early": None, "ttft": None}
+    key = None
+    if cache is not None and temperature == 0:
+        key = cache_key(model, DEFAULT_SYSTEM_PROMPT, user_prompt, temperature, max_tokens, n, stream=stream)
+        cached = cache.get(key)
+        if cached is not None:
+            return {**cached, "cache_hit": True}
+    completion = openai_chat_completion(
         api_base=api_base,
         model=model,
         messages=messages,
@@ -193,74 +629,583 @@ def generate_patch(
         max_tokens=max_tokens,
         timeout=timeout,
         api_key=api_key,
+        pool=pool,
+        stream=stream,
+        budget=budget,
+        n=n,
     )
+    if key is not None and completion["truncated_early"] != "budget":
+        cache.put(key, completion)
+    return completion
 
 
-def run_swebench(args: argparse.Namespace) -> None:
-    dataset = load_dataset_swebench(args.split)
-    seen = read_existing_swebench_predictions(args.output) if args.resume else set()
-    processed = 0
-    for instance in dataset:
-        instance_id = instance["instance_id"]
-        if instance_id in seen:
-            continue
-        patch = generate_patch(
+class RunContext:
+    """Per-run resources shared by every worker thread."""
+
+    def __init__(
+        self,
+        balancer: Optional[EndpointBalancer] = None,
+        cache: Optional[ResponseCache] = None,
+        admission: Optional[AdmissionController] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+    ) -> None:
+        self.balancer = balancer
+        self.cache = cache
+        self.admission = admission
+        self.concurrency = concurrency
+
+    def close(self) -> None:
+        if self.balancer is not None:
+            self.balancer.close()
+        if self.concurrency is not None:
+            print(self.concurrency.summary(), file=sys.stderr)
+
+
+def complete_on_endpoint(
+    args: argparse.Namespace,
+    instance: Dict[str, Any],
+    context: RunContext,
+    max_tokens: int,
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Run ``generate_patch`` on the least-loaded endpoint, failing over on endpoint errors."""
+
+    def generate(pool: Optional[ConnectionPool]) -> Dict[str, Any]:
+        return generate_patch(
             api_base=args.api_base,
             model=args.model,
             instance=instance,
             temperature=args.temperature,
-            max_tokens=args.max_tokens,
+            max_tokens=max_tokens,
             timeout=args.timeout,
             api_key=args.api_key,
             dry_run=args.dry_run,
+            pool=pool,
+            stream=args.stream,
+            budget=args.instance_budget,
+            cache=context.cache,
+            n=args.n,
         )
+
+    balancer = context.balancer
+    if balancer is None:
+        return generate(None), None
+    attempts = len(balancer.endpoints)
+    for attempt in range(attempts):
+        endpoint: Optional[Endpoint] = None
+        try:
+            with balancer.acquire() as endpoint:
+                completion = generate(endpoint.pool)
+            return completion, endpoint.base_url
+        except Exception as exc:
+            if endpoint is None or attempt + 1 >= attempts or not is_endpoint_failure(exc):
+                raise
+            print(
+                f"{instance['instance_id']}: {endpoint.base_url} failed ({exc}); retrying elsewhere",
+                file=sys.stderr,
+            )
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+def process_instance(
+    args: argparse.Namespace,
+    instance: Dict[str, Any],
+    context: Optional[RunContext] = None,
+    dispatched_at: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Generate and sanitize one patch; the result also carries per-request telemetry.
+
+    An instance the admission controller rejects comes back as a ``deferred`` result
+    with no patch: the caller retries it later and never records it as a prediction.
+    """
+    context = context or RunContext()
+    if dispatched_at is None:
+        dispatched_at = time.monotonic()
+    admission = context.admission
+    max_tokens = args.max_tokens
+    reserved = 0
+    messages = build_messages(instance)
+    if admission is not None and not args.dry_run:
+        prompt_tokens = admission.estimator.estimate(messages)
+        try:
+            max_tokens = admission.plan(prompt_tokens, max_tokens)
+        except AdmissionRejected as exc:
+            print(f"Deferring {instance['instance_id']}: {exc}", file=sys.stderr)
+            return {
+                "instance_id": instance["instance_id"],
+                "deferred": True,
+                "truncated_early": False,
+                "usage": None,
+                "cached_tokens": None,
+                "cache_hit": False,
+                "finish_reason": "admission_rejected",
+                "ttft": None,
+                "latency": 0.0,
+                "queue_time": time.monotonic() - dispatched_at,
+            }
+        reserved = prompt_tokens + max_tokens
+        admission.acquire(reserved)
+    started = time.monotonic()
+    try:
+        completion, endpoint = complete_on_endpoint(args, instance, context, max_tokens)
+    finally:
+        if reserved:
+            admission.release(reserved)
+    latency = time.monotonic() - started
+    usage = completion.get("usage")
+    if admission is not None and usage and not completion.get("cache_hit"):
+        admission.estimator.observe(messages, usage.get("prompt_tokens"))
+    candidates = []
+    for index, choice in enumerate(completion.get("choices") or [completion]):
+        patch = choice["content"] or ""
         if args.sanitize_diff:
             patch = sanitize_patch(patch)
-        append_jsonl(
-            args.output,
+        candidates.append(
             {
-                "instance_id": instance_id,
-                "model_name_or_path": args.model,
-                "model_patch": patch,
-                "pred_patch": patch,
-            },
+                "index": index,
+                "patch": patch,
+                "finish_reason": choice.get("finish_reason"),
+                "checks": validate_patch(patch),
+            }
         )
-        processed += 1
-        if args.max_instances and processed >= args.max_instances:
-            break
-        if args.sleep > 0:
-            time.sleep(args.sleep)
+    selected = select_candidate(candidates)
+    result = {
+        "instance_id": instance["instance_id"],
+        "patch": selected["patch"],
+        "truncated_early": bool(completion["truncated_early"]),
+        "usage": usage,
+        "cached_tokens": usage_cached_tokens(usage),
+        "cache_hit": bool(completion.get("cache_hit")),
+        "finish_reason": completion.get("finish_reason"),
+        "ttft": completion.get("ttft"),
+        "latency": latency,
+        "queue_time": started - dispatched_at,
+        "endpoint": None if completion.get("cache_hit") else endpoint,
+    }
+    if args.n > 1:
+        result["selected"] = selected["index"]
+        result["candidates"] = candidates
+    return result
 
 
-def run_live(args: argparse.Namespace) -> None:
-    splits = parse_csv_list(args.splits)
-    dataset_splits = load_dataset_live(splits)
-    predictions = read_existing_live_predictions(args.output) if args.resume else {}
+def overload_reason(exc: BaseException) -> Optional[str]:
+    """Classify errors that mean the server is saturated (worth backing off and retrying)."""
+    if isinstance(exc, HTTPStatusError) and exc.status in (429, 503):
+        return f"http_{exc.status}"
+    if isinstance(exc, (socket.timeout, TimeoutError)):
+        return "timeout"
+    return None
+
+
+def latency_signal(result: Dict[str, Any]) -> Optional[float]:
+    """Time to first token, else time per output token; None for cache hits."""
+    if result.get("cache_hit"):
+        return None
+    if result.get("ttft") is not None:
+        return result["ttft"]
+    completion_tokens = (result.get("usage") or {}).get("completion_tokens")
+    if completion_tokens:
+        return result["latency"] / completion_tokens
+    return None
+
+
+def generate_predictions(
+    args: argparse.Namespace,
+    instances: Iterable[Dict[str, Any]],
+    seen: Container[str],
+    write_result: Callable[[Dict[str, Any]], None],
+    context: Optional[RunContext] = None,
+) -> int:
+    """Generate patches for unseen instances, keeping up to ``args.concurrency`` requests in flight.
+
+    ``write_result`` is always called from the calling thread, in completion order.
+    ``--sleep`` is applied between dispatches, and ``--max-instances`` bounds how many
+    instances are dispatched. With an adaptive controller in ``context`` the in-flight
+    limit follows the controller, and instances that hit an overload error are retried
+    up to ``--max-retries`` times. Deferred (admission-rejected) instances get one more
+    try once everything else is dispatched, when the token estimator has calibrated; a
+    second deferral is still passed to ``write_result``, which must not persist it.
+    Returns the number of predictions written.
+    """
+    pending: Iterable[Dict[str, Any]] = (
+        instance for instance in instances if instance["instance_id"] not in seen
+    )
+    if args.max_instances:
+        pending = itertools.islice(pending, args.max_instances)
+
+    pending = iter(pending)
+    deferred: "deque[Dict[str, Any]]" = deque()
+    held_back: Set[str] = set()
+
+    def settle(instance: Dict[str, Any], result: Dict[str, Any]) -> int:
+        if result.get("deferred") and instance["instance_id"] not in held_back:
+            held_back.add(instance["instance_id"])
+            deferred.append(instance)
+            return 0
+        write_result(result)
+        return 0 if result.get("deferred") else 1
+
+    def next_fresh() -> Optional[Dict[str, Any]]:
+        instance = next(pending, None)
+        if instance is None and deferred:
+            return deferred.popleft()
+        return instance
+
+    concurrency = max(1, args.concurrency)
     processed = 0
-    for split, dataset in dataset_splits:
-        for instance in dataset:
-            instance_id = instance["instance_id"]
-            if instance_id in predictions:
+    if concurrency == 1 and (context is None or context.concurrency is None):
+        for idx, instance in enumerate(iter(next_fresh, None)):
+            if idx and args.sleep > 0:
+                time.sleep(args.sleep)
+            processed += settle(instance, process_instance(args, instance, context))
+        return processed
+
+    controller = context.concurrency if context is not None else None
+    error: Optional[BaseException] = None
+    retries: "deque[Dict[str, Any]]" = deque()
+    attempts: Dict[str, int] = {}
+    submitted: Dict[Future, Dict[str, Any]] = {}
+
+    def limit() -> int:
+        return controller.limit if controller is not None else concurrency
+
+    def collect(done: Iterable[Future]) -> None:
+        nonlocal processed, error
+        for future in done:
+            instance = submitted.pop(future)
+            try:
+                result = future.result()
+            except Exception as exc:  # keep draining so finished work is not lost
+                reason = overload_reason(exc)
+                if controller is not None and reason is not None:
+                    controller.record_overload(reason)
+                    instance_id = instance["instance_id"]
+                    attempts[instance_id] = attempts.get(instance_id, 0) + 1
+                    if attempts[instance_id] <= args.max_retries:
+                        retries.append(instance)
+                        continue
+                if error is None:
+                    error = exc
                 continue
-            patch = generate_patch(
-                api_base=args.api_base,
-                model=args.model,
-                instance=instance,
-                temperature=args.temperature,
-                max_tokens=args.max_tokens,
-                timeout=args.timeout,
-                api_key=args.api_key,
-                dry_run=args.dry_run,
-            )
-            if args.sanitize_diff:
-                patch = sanitize_patch(patch)
-            predictions[instance_id] = {"model_patch": patch, "pred_patch": patch}
-            write_live_predictions(args.output, predictions)
-            processed += 1
-            if args.max_instances and processed >= args.max_instances:
-                return
-            if args.sleep > 0:
+            if controller is not None:
+                controller.record_success(latency_signal(result))
+            processed += settle(instance, result)
+
+    def next_instance() -> Optional[Dict[str, Any]]:
+        if retries:
+            return retries.popleft()
+        return next_fresh()
+
+    in_flight: Set[Future] = set()
+    max_workers = controller.maximum if controller is not None else concurrency
+    dispatched = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while error is None:
+            while len(in_flight) >= limit():
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            instance = next_instance() if error is None else None
+            if instance is None:
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+                continue
+            if dispatched and args.sleep > 0:
                 time.sleep(args.sleep)
+            future = executor.submit(process_instance, args, instance, context, time.monotonic())
+            submitted[future] = instance
+            in_flight.add(future)
+            dispatched += 1
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+    if error is not None:
+        raise error
+    return processed
+
+
+def create_run_context(args: argparse.Namespace, estimator: TokenEstimator) -> RunContext:
+    concurrency = None
+    if args.adaptive_concurrency:
+        concurrency = AdaptiveConcurrency(
+            initial=max(1, args.concurrency),
+            maximum=args.max_concurrency,
+            log_path=f"{args.output}.concurrency.jsonl",
+        )
+    size = args.pool_size or (concurrency.maximum if concurrency else max(1, args.concurrency))
+    balancer = EndpointBalancer(
+        parse_csv_list(args.api_base) or [DEFAULT_API_BASE],
+        lambda url: create_connection_pool(url, args.api_key, size=size, timeout=args.timeout),
+        cooldown=args.endpoint_cooldown,
+    )
+    cache = None
+    if args.cache_dir and not args.dry_run:
+        cache = ResponseCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+    admission = None
+    if args.max_model_len or args.kv_capacity:
+        admission = AdmissionController(
+            estimator, max_model_len=args.max_model_len, kv_capacity=args.kv_capacity
+        )
+    return RunContext(balancer=balancer, cache=cache, admission=admission, concurrency=concurrency)
+
+
+def candidates_path(output: str) -> str:
+    return f"{output}.candidates.jsonl"
+
+
+def write_candidates(args: argparse.Namespace, result: Dict[str, Any]) -> None:
+    """Append every best-of-n candidate for one instance to the candidates sidecar."""
+    if "candidates" not in result:
+        return
+    append_jsonl(
+        candidates_path(args.output),
+        {
+            "instance_id": result["instance_id"],
+            "selected": result["selected"],
+            "candidates": result["candidates"],
+        },
+    )
+
+
+def queue_work(
+    args: argparse.Namespace, instances: Iterable[Dict[str, Any]]
+) -> Tuple[Iterable[Dict[str, Any]], LeaseKeeper]:
+    """Claim instances from the shared ``--queue`` instead of walking the dataset.
+
+    Every worker enqueues the dataset (idempotent), so the first one to start
+    populates the queue and resumed or late workers simply claim what is unleased.
+    """
+    rows = list(instances)
+    queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds)
+    queue.add(row["instance_id"] for row in rows)
+    keeper = LeaseKeeper(queue, args.worker_id)
+    return claim_instances(queue, keeper, {row["instance_id"]: row for row in rows}), keeper
+
+
+def defer_task(keeper: Optional[LeaseKeeper], instance_id: str) -> None:
+    """Hand a deferred instance back to the queue for a worker with more context room."""
+    if keeper is not None:
+        keeper.skip(instance_id, "admission rejected")
+
+
+def finish_task(
+    keeper: Optional[LeaseKeeper], instance_id: str, record: Dict[str, Any], dry_run: bool = False
+) -> None:
+    """Mark the task done with ``record``; a dry run's empty patch hands it back instead."""
+    if keeper is None:
+        return
+    if dry_run:
+        keeper.skip(instance_id, "dry run")
+        return
+    keeper.drop(instance_id)
+    if not keeper.queue.complete(keeper.worker, instance_id, record):
+        print(
+            f"{instance_id}: lease was taken over by another worker; result kept locally only",
+            file=sys.stderr,
+        )
+
+
+def metrics_path(output: str) -> str:
+    return f"{output}.metrics.jsonl"
+
+
+def report_telemetry(args: argparse.Namespace, telemetry: RunTelemetry, context: RunContext) -> None:
+    endpoint_stats = context.balancer.stats() if context.balancer is not None else None
+    summary = telemetry.write_summary(f"{args.output}.metrics-summary.json", endpoint_stats)
+    print(telemetry.render_summary(summary), file=sys.stderr)
+
+
+def run_swebench(args: argparse.Namespace) -> None:
+    estimator = TokenEstimator(args.tokenizer)
+    with load_dataset_swebench(args.split, DATASET_COLUMNS, args.dataset_cache, args.refresh_dataset) as snapshot:
+        dataset = schedule_instances(select_shard(snapshot, args.shard), args.schedule, estimator)
+        seen = read_existing_swebench_predictions(args.output) if args.resume else set()
+        keeper = None
+        if args.queue:
+            dataset, keeper = queue_work(args, dataset)
+            seen = set()
+        telemetry = RunTelemetry(metrics_path(args.output))
+
+        def write_result(result: Dict[str, Any]) -> None:
+            telemetry.add(result)
+            if result.get("deferred"):
+                defer_task(keeper, result["instance_id"])
+                return
+            write_candidates(args, result)
+            record = {
+                "instance_id": result["instance_id"],
+                "model_name_or_path": args.model,
+                "model_patch": result["patch"],
+                "pred_patch": result["patch"],
+                "truncated_early": result["truncated_early"],
+            }
+            append_jsonl(args.output, record)
+            finish_task(keeper, result["instance_id"], record, dry_run=args.dry_run)
+
+        context = create_run_context(args, estimator)
+        try:
+            with keeper or contextlib.nullcontext():
+                generate_predictions(args, dataset, seen, write_result, context)
+        finally:
+            context.close()
+            report_telemetry(args, telemetry, context)
+
+
+def run_live(args: argparse.Namespace) -> None:
+    splits = parse_csv_list(args.splits)
+    with contextlib.ExitStack() as snapshots:
+        dataset_splits = [
+            (name, snapshots.enter_context(snapshot))
+            for name, snapshot in load_dataset_live(splits, DATASET_COLUMNS, args.dataset_cache, args.refresh_dataset)
+        ]
+        if not args.resume and os.path.exists(live_journal_path(args.output)):
+            os.remove(live_journal_path(args.output))
+        predictions = read_existing_live_predictions(args.output) if args.resume else {}
+        estimator = TokenEstimator(args.tokenizer)
+        instances = schedule_instances(
+            select_shard(itertools.chain.from_iterable(dataset for _, dataset in dataset_splits), args.shard),
+            args.schedule,
+            estimator,
+        )
+        keeper = None
+        seen: Container[str] = predictions
+        if args.queue:
+            instances, keeper = queue_work(args, instances)
+            seen = set()
+        telemetry = RunTelemetry(metrics_path(args.output))
+        journal = LivePredictionJournal(
+            args.output,
+            predictions,
+            fsync_every=args.fsync_every,
+            checkpoint_every=args.checkpoint_every,
+        )
+
+        def write_result(result: Dict[str, Any]) -> None:
+            telemetry.add(result)
+            if result.get("deferred"):
+                defer_task(keeper, result["instance_id"])
+                return
+            write_candidates(args, result)
+            patch = result["patch"]
+            entry = {"model_patch": patch, "pred_patch": patch, "truncated_early": result["truncated_early"]}
+            journal.append(result["instance_id"], entry)
+            finish_task(keeper, result["instance_id"], entry, dry_run=args.dry_run)
+
+        context = create_run_context(args, estimator)
+        try:
+            with keeper or contextlib.nullcontext():
+                generate_predictions(args, instances, seen, write_result, context)
+        finally:
+            context.close()
+            journal.close()
+            report_telemetry(args, telemetry, context)
+
+
+def merge_shards(
+    suite: str, paths: Sequence[str], expected: Optional[Sequence[str]] = None
+) -> Tuple[Any, Dict[str, List[str]]]:
+    """Combine shard outputs into one harness-ready payload.
+
+    Returns the merged predictions (a JSONL record list for SWE-bench Multilingual, an
+    ``{instance_id: {...}}`` mapping for SWE-bench-Live) in ``expected`` order when given,
+    plus the ``missing``, ``duplicates`` and ``unexpected`` instance_ids found.
+    """
+    entries: Dict[str, Any] = {}
+    duplicates: List[str] = []
+    for path in paths:
+        if suite == "swebench-multilingual":
+            items = [(record["instance_id"], record) for record in read_swebench_prediction_records(path)]
+        else:
+            items = list(read_existing_live_predictions(path).items())
+        for instance_id, entry in items:
+            if instance_id in entries:
+                duplicates.append(instance_id)
+            entries[instance_id] = entry
+    order = list(entries)
+    missing: List[str] = []
+    unexpected: List[str] = []
+    if expected is not None:
+        wanted = set(expected)
+        missing = [instance_id for instance_id in expected if instance_id not in entries]
+        unexpected = [instance_id for instance_id in order if instance_id not in wanted]
+        order = [instance_id for instance_id in expected if instance_id in entries] + unexpected
+    problems = {"missing": missing, "duplicates": sorted(set(duplicates)), "unexpected": unexpected}
+    if suite == "swebench-multilingual":
+        return [entries[instance_id] for instance_id in order], problems
+    return {instance_id: entries[instance_id] for instance_id in order}, problems
+
+
+def run_merge(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="swebench_generate_predictions.py merge",
+        description="Merge --shard outputs into the predictions file the evaluation harness reads.",
+    )
+    parser.add_argument(
+        "--suite",
+        choices=["swebench-multilingual", "swebench-live-multilang"],
+        required=True,
+        help="Which suite the shards belong to.",
+    )
+    parser.add_argument("--output", required=True, help="Merged output path (the --output given to each shard).")
+    parser.add_argument("--shards", type=int, required=True, help="Shard count N used for the runs.")
+    parser.add_argument("--split", default="test", help="Dataset split for SWE-bench Multilingual.")
+    parser.add_argument(
+        "--splits",
+        default="",
+        help="Comma-separated splits for SWE-bench-Live MultiLang (default: all).",
+    )
+    parser.add_argument(
+        "--dataset-cache",
+        default="",
+        help="Dataset snapshot directory (default: work/swebench/cache/datasets).",
+    )
+    parser.add_argument(
+        "--no-dataset-check",
+        dest="dataset_check",
+        action="store_false",
+        help="Skip checking the merged instance_ids against the dataset.",
+    )
+    parser.add_argument(
+        "--allow-missing",
+        action="store_true",
+        help="Write the merged file even if some dataset instances have no prediction.",
+    )
+    args = parser.parse_args(argv)
+
+    paths = [shard_output_path(args.output, index, args.shards) for index in range(args.shards)]
+    absent = [path for path in paths if not os.path.exists(path)]
+    if absent:
+        print(f"Missing shard outputs: {', '.join(absent)}", file=sys.stderr)
+        return 1
+    expected = None
+    if args.dataset_check:
+        if args.suite == "swebench-multilingual":
+            with load_dataset_swebench(args.split, ("instance_id",), args.dataset_cache) as dataset:
+                expected = [row["instance_id"] for row in dataset]
+        else:
+            expected = []
+            for _, dataset in load_dataset_live(parse_csv_list(args.splits), ("instance_id",), args.dataset_cache):
+                with dataset:
+                    expected.extend(row["instance_id"] for row in dataset)
+    merged, problems = merge_shards(args.suite, paths, expected)
+    for kind, instance_ids in problems.items():
+        if instance_ids:
+            preview = ", ".join(instance_ids[:10]) + (" ..." if len(instance_ids) > 10 else "")
+            print(f"{len(instance_ids)} {kind} instance_ids: {preview}", file=sys.stderr)
+    if problems["duplicates"] or (problems["missing"] and not args.allow_missing):
+        print("Merge aborted; nothing written.", file=sys.stderr)
+        return 1
+    if args.suite == "swebench-multilingual":
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        tmp_path = f"{args.output}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            for record in merged:
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, args.output)
+    else:
+        write_live_predictions(args.output, merged)
+    print(f"Merged {len(merged)} predictions from {args.shards} shards into {args.output}")
+    return 0
 
 
 def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
@@ -275,14 +1220,113 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     )
     parser.add_argument("--model", required=True, help="Model name as served by vLLM.")
     parser.add_argument("--output", required=True, help="Output path for predictions.")
-    parser.add_argument("--api-base", default=DEFAULT_API_BASE, help="OpenAI API base URL.")
+    parser.add_argument(
+        "--api-base",
+        default=DEFAULT_API_BASE,
+        help="OpenAI API base URL, or a comma-separated list to balance across several servers.",
+    )
+    parser.add_argument(
+        "--endpoint-cooldown",
+        type=float,
+        default=30.0,
+        help="Seconds before an ejected endpoint is health-checked for re-admission.",
+    )
     parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="Optional API key.")
     parser.add_argument("--temperature", type=float, default=0.0, help="Sampling temperature.")
     parser.add_argument("--max-tokens", type=int, default=2048, help="Max tokens to generate.")
     parser.add_argument("--timeout", type=int, default=120, help="Request timeout (seconds).")
+    parser.add_argument(
+        "--n",
+        type=int,
+        default=1,
+        help="Sample n choices per request (one shared prefill) and keep the best-ranked patch; "
+        "all candidates go to <output>.candidates.jsonl.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream responses and stop as soon as a fenced diff is complete.",
+    )
+    parser.add_argument(
+        "--instance-budget",
+        type=float,
+        default=0.0,
+        help="With --stream: wall-clock seconds per instance before cancelling (0 = no budget).",
+    )
     parser.add_argument("--max-instances", type=int, default=0, help="Limit number of instances.")
     parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to sleep between requests.")
-    parser.add_argument("--dry-run", action="store_true", help="Skip API calls, write empty patches.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of requests to keep in flight (default: 1, sequential).",
+    )
+    parser.add_argument(
+        "--adaptive-concurrency",
+        action="store_true",
+        help="Adjust concurrency with AIMD from latency and 429/503/timeouts, starting at --concurrency.",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=64,
+        help="Upper bound for --adaptive-concurrency.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help="With --adaptive-concurrency: retries per instance after an overload error.",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=["dataset", "prefix", "longest-first"],
+        default="dataset",
+        help=(
+            "Dispatch order: dataset order, grouped by repo to maximize vLLM prefix-cache hits, "
+            "or longest estimated prompt first."
+        ),
+    )
+    parser.add_argument(
+        "--max-model-len",
+        type=int,
+        default=0,
+        help="Served --max-model-len; clamps max_tokens to the remaining context (0 = off).",
+    )
+    parser.add_argument(
+        "--kv-capacity",
+        type=int,
+        default=0,
+        help="Cap on prompt+max_tokens summed over in-flight requests (0 = off).",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        default="",
+        help="HuggingFace tokenizer for prompt estimates (default: calibrated heuristic).",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=0,
+        help="Keep-alive HTTP connections per endpoint (default: --concurrency).",
+    )
+    parser.add_argument(
+        "--fsync-every",
+        type=int,
+        default=8,
+        help="SWE-bench-Live: fsync the predictions journal every N records.",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=25,
+        help="SWE-bench-Live: compact the journal into the output JSON every N records (0 = only at exit).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Skip API calls, write empty patches (--queue tasks are handed back, not completed).",
+    )
     parser.add_argument(
         "--no-sanitize-diff",
         dest="sanitize_diff",
@@ -290,6 +1334,20 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         help="Disable patch sanitization (strip code fences/whitespace).",
     )
     parser.add_argument("--no-resume", dest="resume", action="store_false", help="Do not resume.")
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help="Response cache directory; temperature-0 requests are served from it (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--no-cache", dest="cache_dir", action="store_const", const="", help="Disable the response cache."
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=1024,
+        help="Evict least recently used cache entries beyond this size (MiB).",
+    )
     parser.set_defaults(resume=True, sanitize_diff=True)
     parser.add_argument("--split", default="test", help="Dataset split for SWE-bench Multilingual.")
     parser.add_argument(
@@ -297,11 +1355,50 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default="",
         help="Comma-separated splits for SWE-bench-Live MultiLang (default: all).",
     )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="I/N",
+        help="Only generate instances whose stable instance_id hash falls in shard I of N (0-based); "
+        "writes <output stem>.shard-I-of-N<ext>. Combine shards with the merge subcommand.",
+    )
+    parser.add_argument(
+        "--queue",
+        default="",
+        help="Shared SQLite work queue (see swebench_work_queue.py); claim instances from it "
+        "instead of iterating the dataset. Output goes to <output stem>.worker-<id><ext>.",
+    )
+    parser.add_argument("--worker-id", default=default_worker_id(), help="Worker name for --queue leases.")
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=600.0,
+        help="With --queue: lease length; a task is re-claimable if heartbeats stop this long.",
+    )
+    parser.add_argument(
+        "--dataset-cache",
+        default="",
+        help="Dataset snapshot directory (default: work/swebench/cache/datasets).",
+    )
+    parser.add_argument(
+        "--refresh-dataset",
+        action="store_true",
+        help="Rebuild the dataset snapshot from HuggingFace.",
+    )
     return parser.parse_args(argv)
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["merge"]:
+        return run_merge(argv[1:])
     args = parse_args(argv)
+    if args.shard is not None:
+        args.output = shard_output_path(args.output, *args.shard)
+    if args.queue:
+        root, ext = os.path.splitext(args.output)
+        args.output = f"{root}.worker-{args.worker_id}{ext}"
     if args.suite == "swebench-multilingual":
         run_swebench(args)
     else:
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Keep-alive HTTP/1.1 connection pooling and endpoint balancing for the OpenAI-compatible client path."""
+
+from __future__ import annotations
+
+import http.client
+import queue
+import sys
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+# Errors that mean a reused keep-alive connection was closed by the server while idle.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class HTTPStatusError(RuntimeError):
+    def __init__(self, status: int, reason: str, body: bytes = b"") -> None:
+        super().__init__(f"HTTP {status} {reason}: {body[:200].decode('utf-8', 'replace')}")
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+
+class ConnectionPool:
+    """Thread-safe pool of persistent connections to a single ``scheme://host:port``.
+
+    At most ``size`` connections exist at once; callers block until one is free.
+    Idle connections are reused (most recently used first) so TCP setup and teardown
+    stay out of per-request latency.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        size: int = 1,
+        timeout: float = 120,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        parsed = urllib.parse.urlsplit(base_url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Unsupported base URL: {base_url}")
+        self.base_url = base_url
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip("/")
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self.connections_opened = 0
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        with self._lock:
+            self.connections_opened += 1
+        return cls(self.host, self.port, timeout=timeout)
+
+    def _checkout(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._new_connection(timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _checkin(self, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable and not self._closed:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def url_path(self, path: str) -> str:
+        return f"{self.base_path}/{path.lstrip('/')}"
+
+    @contextmanager
+    def stream(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[http.client.HTTPResponse]:
+        """Send a request and yield the open response for incremental reads.
+
+        The connection returns to the pool only if the body was read to the end; a
+        caller that stops reading early (e.g. to cancel generation) gets it closed.
+        Raises HTTPStatusError on >= 400.
+        """
+        merged = {**self.headers, **(headers or {})}
+        self._slots.acquire()
+        conn, reused = self._checkout(self.timeout if timeout is None else timeout)
+        reusable = False
+        try:
+            while True:
+                try:
+                    conn.request(method, self.url_path(path), body=body, headers=merged)
+                    response = conn.getresponse()
+                    break
+                except STALE_CONNECTION_ERRORS:
+                    conn.close()
+                    if not reused:
+                        raise
+                    conn, reused = self._new_connection(conn.timeout), False
+            if response.status >= 400:
+                data = response.read()
+                reusable = not response.will_close
+                raise HTTPStatusError(response.status, response.reason, data)
+            yield response
+            reusable = response.isclosed() and not response.will_close
+        finally:
+            if not reusable:
+                conn.close()
+            self._checkin(conn, reusable)
+            self._slots.release()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> bytes:
+        """Send a request and return the response body; raises HTTPStatusError on >= 400."""
+        with self.stream(method, path, body=body, headers=headers, timeout=timeout) as response:
+            return response.read()
+
+    def probe(self, path: str, timeout: float) -> bool:
+        """GET ``path`` on a dedicated connection, outside the pool's slots; True on a < 400 reply.
+
+        Requests hung on every pooled connection would otherwise hold the probe back too.
+        """
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        conn = cls(self.host, self.port, timeout=timeout)
+        try:
+            conn.request("GET", self.url_path(path), headers=self.headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status < 400
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def iter_sse_data(response: http.client.HTTPResponse) -> Iterator[str]:
+    """Yield the ``data:`` payload of each server-sent event until ``[DONE]`` or EOF."""
+    data_lines = []
+    for raw in response:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data_lines:
+                payload = "\n".join(data_lines)
+                data_lines = []
+                if payload == "[DONE]":
+                    return
+                yield payload
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[5:].lstrip(" "))
+    if data_lines and "\n".join(data_lines) != "[DONE]":
+        yield "\n".join(data_lines)
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """Errors that point at a broken endpoint rather than an overloaded or slow one."""
+    if isinstance(exc, HTTPStatusError):
+        return exc.status in (500, 502, 504)
+    return isinstance(exc, (ConnectionError, http.client.HTTPException))
+
+
+class Endpoint:
+    def __init__(self, base_url: str, pool: ConnectionPool) -> None:
+        self.base_url = base_url
+        self.pool = pool
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.requests = 0
+        self.failures = 0
+
+
+class EndpointBalancer:
+    """Least-outstanding-requests dispatch across several OpenAI-compatible servers.
+
+    An endpoint is ejected after ``eject_after`` consecutive failures and probed with
+    ``GET <base>/models`` once ``cooldown`` seconds have passed; a successful probe
+    re-admits it. If every endpoint is ejected, the one due back soonest is used
+    anyway so the run keeps making progress.
+    """
+
+    def __init__(
+        self,
+        base_urls: Sequence[str],
+        pool_factory: Callable[[str], ConnectionPool],
+        eject_after: int = 2,
+        cooldown: float = 30.0,
+        probe_timeout: float = 5.0,
+    ) -> None:
+        if not base_urls:
+            raise ValueError("At least one endpoint is required.")
+        self.endpoints = [Endpoint(url, pool_factory(url)) for url in base_urls]
+        self.eject_after = max(1, eject_after)
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def _probe(self, endpoint: Endpoint) -> bool:
+        return endpoint.pool.probe("models", self.probe_timeout)
+
+    def _readmit_due(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            due = [e for e in self.endpoints if not e.healthy and e.ejected_until <= now]
+            for endpoint in due:
+                endpoint.ejected_until = now + self.cooldown
+        for endpoint in due:
+            if self._probe(endpoint):
+                with self._lock:
+                    endpoint.healthy = True
+                    endpoint.consecutive_failures = 0
+
+    def _select(self) -> Endpoint:
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.healthy]
+            if not candidates:
+                candidates = [min(self.endpoints, key=lambda e: e.ejected_until)]
+            count = len(self.endpoints)
+            # Rotate the starting point so ties spread across endpoints.
+            order = {id(e): (idx - self._next) % count for idx, e in enumerate(self.endpoints)}
+            endpoint = min(candidates, key=lambda e: (e.outstanding, order[id(e)]))
+            self._next = (self._next + 1) % count
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    @contextmanager
+    def acquire(self) -> Iterator[Endpoint]:
+        """Borrow the least-loaded healthy endpoint, recording success or failure."""
+        self._readmit_due()
+        endpoint = self._select()
+        try:
+            yield endpoint
+        except BaseException as exc:
+            self._finish(endpoint, failed=is_endpoint_failure(exc))
+            raise
+        self._finish(endpoint, failed=False)
+
+    def _finish(self, endpoint: Endpoint, failed: bool) -> None:
+        with self._lock:
+            endpoint.outstanding -= 1
+            if not failed:
+                endpoint.consecutive_failures = 0
+                return
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.healthy and endpoint.consecutive_failures >= self.eject_after:
+                endpoint.healthy = False
+                endpoint.ejections += 1
+                endpoint.ejected_until = time.monotonic() + self.cooldown
+                print(f"Ejected endpoint {endpoint.base_url} for {self.cooldown:.0f}s", file=sys.stderr)
+
+    def healthy_count(self) -> int:
+        with self._lock:
+            return sum(1 for e in self.endpoints if e.healthy)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                e.base_url: {"requests": e.requests, "failures": e.failures, "ejections": e.ejections}
+                for e in self.endpoints
+            }
+
+    def close(self) -> None:
+        for endpoint in self.endpoints:
+            endpoint.pool.close()
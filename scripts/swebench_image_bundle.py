@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""Content-addressed image bundles: export a suite's images with each layer stored once,
+then import them on another box without touching Docker Hub.
+
+Layout::
+
+    <bundle>/index.json           {"version": 1, "images": {image: entry}, "suites": {suite: [image, ...]}}
+    <bundle>/blobs/sha256/<hex>   image configs and (uncompressed) layer tars, one file per digest
+
+An image entry is ``{"config": digest, "layers": [digest, ...], "size": bytes}``.
+
+Export streams ``docker save`` output for a batch of images, hashes each file as it
+arrives and writes it only if the store does not already hold that digest. Import either
+rebuilds a ``docker load`` archive from the blobs, or pushes them to a registry through
+the v2 HTTP API. The push target must be a plain ``registry:2``: a pull-through cache
+(the ``registry-cache`` container) answers uploads with 405, and even if seeded it would
+prefer the upstream manifests, whose compressed layers the bundle does not hold. Run a
+plain registry next to it and list it first in the daemon's ``registry-mirrors``.
+
+``swebench_pull_images.py --export-bundle/--import-bundle`` drives this for a suite's
+dataset; the ``export``, ``import`` and ``push`` commands here work on explicit image
+lists or on what a bundle already holds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+import subprocess
+import sys
+import tarfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import IO, Any, Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.swebench_image_plan import format_bytes, local_images, normalize_ref  # noqa: E402
+
+BLOB_PATH_RE = re.compile(r"^blobs/sha256/([0-9a-f]{64})$")
+# Top-level docker save files that describe the archive rather than image content.
+ARCHIVE_METADATA = {"manifest.json", "index.json", "oci-layout", "repositories"}
+CHUNK_SIZE = 1 << 20
+
+OCI_MANIFEST = "application/vnd.oci.image.manifest.v1+json"
+OCI_CONFIG = "application/vnd.oci.image.config.v1+json"
+OCI_LAYER = "application/vnd.oci.image.layer.v1.tar"
+
+
+def blob_name(digest: str) -> str:
+    return "blobs/sha256/" + digest.split(":", 1)[1]
+
+
+class Bundle:
+    """A bundle directory: the blob store plus ``index.json``."""
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self.index: Dict[str, Any] = {"version": 1, "images": {}, "suites": {}}
+        if self.index_path.exists():
+            self.index = json.loads(self.index_path.read_text(encoding="utf-8"))
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / blob_name(digest)
+
+    def has_blob(self, digest: str) -> bool:
+        return self.blob_path(digest).exists()
+
+    def blobs_of(self, image: str) -> List[str]:
+        entry = self.index["images"][image]
+        return [entry["config"], *entry["layers"]]
+
+    def has_image(self, image: str) -> bool:
+        return image in self.index["images"] and all(self.has_blob(d) for d in self.blobs_of(image))
+
+    def suite_images(self, suite: str) -> List[str]:
+        return [image for image in self.index["suites"].get(suite, []) if image in self.index["images"]]
+
+    def add_blob(self, source: IO[bytes]) -> Tuple[str, bool]:
+        """Store ``source`` under its sha256; returns ``(digest, created)``."""
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = tmp_dir / f"blob.{os.getpid()}.{time.monotonic_ns()}"
+        hasher = hashlib.sha256()
+        with open(tmp_path, "wb") as handle:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                handle.write(chunk)
+        digest = f"sha256:{hasher.hexdigest()}"
+        target = self.blob_path(digest)
+        if target.exists():
+            tmp_path.unlink()
+            return digest, False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+        return digest, True
+
+    def add_images(self, suite: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        self.index["images"].update(entries)
+        members = self.index["suites"].setdefault(suite, [])
+        members.extend(image for image in entries if image not in members)
+
+    def add_to_suite(self, suite: str, images: Sequence[str]) -> None:
+        members = self.index["suites"].setdefault(suite, [])
+        members.extend(image for image in images if image not in members)
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(f"index.json.tmp.{os.getpid()}")
+        tmp_path.write_text(json.dumps(self.index, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.index_path)
+
+    def stats(self, images: Sequence[str]) -> Dict[str, int]:
+        """``logical`` bytes (sum over images) versus ``stored`` bytes (unique blobs)."""
+        unique = {digest for image in images for digest in self.blobs_of(image)}
+        return {
+            "images": len(images),
+            "blobs": len(unique),
+            "logical": sum(self.index["images"][image]["size"] for image in images),
+            "stored": sum(self.blob_path(digest).stat().st_size for digest in unique),
+        }
+
+
+def ingest_save_stream(bundle: Bundle, stream: IO[bytes], images: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """Read a ``docker save`` tar stream of ``images`` into the blob store.
+
+    Handles both the legacy layout (``<id>/layer.tar``) and the OCI layout of newer
+    daemons, including its symlinks. Returns index entries for the images found.
+    """
+    paths: Dict[str, str] = {}
+    links: Dict[str, str] = {}
+    created: set = set()
+    manifest: Optional[List[Dict[str, Any]]] = None
+    with tarfile.open(fileobj=stream, mode="r|") as archive:
+        for member in archive:
+            name = posixpath.normpath(member.name)
+            if member.issym():
+                links[name] = posixpath.normpath(posixpath.join(posixpath.dirname(name), member.linkname))
+                continue
+            if member.islnk():
+                links[name] = posixpath.normpath(member.linkname)
+                continue
+            if not member.isfile():
+                continue
+            if name == "manifest.json":
+                manifest = json.load(archive.extractfile(member))
+                continue
+            if name in ARCHIVE_METADATA:
+                continue
+            match = BLOB_PATH_RE.match(name)
+            if match and bundle.has_blob(f"sha256:{match.group(1)}"):
+                paths[name] = f"sha256:{match.group(1)}"
+                continue
+            digest, new = bundle.add_blob(archive.extractfile(member))
+            paths[name] = digest
+            if new:
+                created.add(digest)
+    if manifest is None:
+        raise ValueError("docker save output has no manifest.json")
+
+    def resolve(path: str) -> str:
+        path = posixpath.normpath(path)
+        for _ in range(8):
+            if path not in links:
+                break
+            path = links[path]
+        return paths[path]
+
+    wanted = {normalize_ref(image): image for image in images}
+    entries: Dict[str, Dict[str, Any]] = {}
+    for item in manifest:
+        matched = [wanted[tag] for tag in map(normalize_ref, item.get("RepoTags") or []) if tag in wanted]
+        if not matched and len(images) == 1 and len(manifest) == 1:
+            matched = list(images)
+        config = resolve(item["Config"])
+        layers = [resolve(path) for path in item["Layers"]]
+        size = sum(bundle.blob_path(digest).stat().st_size for digest in {config, *layers})
+        for image in matched:
+            entries[image] = {"config": config, "layers": layers, "size": size}
+    # Archive files that belong to no exported image (legacy per-layer json, VERSION).
+    referenced = {digest for entry in entries.values() for digest in (entry["config"], *entry["layers"])}
+    for digest in created - referenced:
+        bundle.blob_path(digest).unlink()
+    return entries
+
+
+@contextlib.contextmanager
+def docker_save(images: Sequence[str]) -> Iterator[IO[bytes]]:
+    proc = subprocess.Popen(["docker", "save", *images], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        yield proc.stdout
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        code = proc.wait()
+    if code != 0:
+        raise RuntimeError(f"docker save failed: {stderr.decode(errors='replace').strip()}")
+
+
+def export_images(
+    bundle: Bundle,
+    images: Sequence[str],
+    suite: str,
+    batch_size: int = 8,
+    save: Callable[[Sequence[str]], ContextManager[IO[bytes]]] = docker_save,
+) -> List[str]:
+    """Export ``images`` not yet in the bundle, ``batch_size`` per ``docker save``; returns failures.
+
+    The index is rewritten after each batch, so an interrupted export resumes.
+    """
+    bundle.add_to_suite(suite, [image for image in images if bundle.has_image(image)])
+    todo = [image for image in images if not bundle.has_image(image)]
+    failed: List[str] = []
+    for start in range(0, len(todo), max(1, batch_size)):
+        batch = todo[start : start + max(1, batch_size)]
+        try:
+            with save(batch) as stream:
+                entries = ingest_save_stream(bundle, stream, batch)
+        except (OSError, RuntimeError, ValueError, KeyError, tarfile.TarError) as exc:
+            print(f"Export failed for {len(batch)} images ({exc})")
+            failed.extend(batch)
+            continue
+        failed.extend(image for image in batch if image not in entries)
+        bundle.add_images(suite, entries)
+        bundle.save()
+        print(f"[{min(start + len(batch), len(todo))}/{len(todo)}] exported {len(entries)} images")
+    bundle.save()
+    return failed
+
+
+def export_present_images(
+    bundle: Bundle,
+    images: Sequence[str],
+    suite: str,
+    batch_size: int = 8,
+    save: Callable[[Sequence[str]], ContextManager[IO[bytes]]] = docker_save,
+    list_local: Callable[[], Optional[Dict[str, Dict[str, Any]]]] = local_images,
+    dry_run: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """Export the locally present ``images`` and print the bundle totals.
+
+    Returns the ``Bundle.stats`` of the exported images plus ``failed`` and ``missing``
+    (images not present locally), or None when docker cannot list local images.
+    ``dry_run`` only prints the images that would be exported and returns ``missing``,
+    ``already`` (present images the bundle holds) and ``to_export``.
+    """
+    local = list_local()
+    if local is None:
+        print("docker image ls failed; is the daemon running?", file=sys.stderr)
+        return None
+    present = [image for image in images if normalize_ref(image) in local]
+    if len(present) < len(images):
+        print(f"{len(images) - len(present)} images are not present locally and are left out; pull them first.")
+    if dry_run:
+        todo = [image for image in present if not bundle.has_image(image)]
+        for idx, image in enumerate(todo, start=1):
+            print(f"[{idx}/{len(todo)}] would export {image}")
+        print(f"Bundle {bundle.root}: {len(present) - len(todo)} of {len(present)} present images already exported")
+        return {"missing": len(images) - len(present), "already": len(present) - len(todo), "to_export": todo}
+    failed = export_images(bundle, present, suite, batch_size=batch_size, save=save)
+    stats: Dict[str, Any] = bundle.stats([image for image in present if bundle.has_image(image)])
+    print(
+        f"Bundle {bundle.root}: {stats['images']} images, {stats['blobs']} unique blobs, "
+        f"{format_bytes(stats['stored'])} stored for {format_bytes(stats['logical'])} of image data"
+    )
+    stats.update(failed=failed, missing=len(images) - len(present))
+    return stats
+
+
+def write_load_stream(bundle: Bundle, images: Sequence[str], stream: IO[bytes]) -> None:
+    """Write a ``docker load`` archive for ``images`` with every blob included once."""
+    manifest = []
+    digests: List[str] = []
+    for image in images:
+        entry = bundle.index["images"][image]
+        ref = normalize_ref(image)
+        manifest.append(
+            {
+                "Config": blob_name(entry["config"]),
+                "RepoTags": [] if "@" in ref else [ref],
+                "Layers": [blob_name(digest) for digest in entry["layers"]],
+            }
+        )
+        digests.extend(digest for digest in bundle.blobs_of(image) if digest not in digests)
+    with tarfile.open(fileobj=stream, mode="w|") as archive:
+        data = json.dumps(manifest).encode("utf-8")
+        info = tarfile.TarInfo("manifest.json")
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+        for digest in digests:
+            path = bundle.blob_path(digest)
+            info = tarfile.TarInfo(blob_name(digest))
+            info.size = path.stat().st_size
+            with open(path, "rb") as handle:
+                archive.addfile(info, handle)
+
+
+def load_images(
+    bundle: Bundle,
+    images: Sequence[str],
+    batch_size: int = 8,
+    on_batch: Optional[Callable[[Sequence[str], bool, str], None]] = None,
+) -> List[str]:
+    """``docker load`` ``images`` from the bundle, ``batch_size`` per call; returns failures."""
+    failed: List[str] = []
+    for start in range(0, len(images), max(1, batch_size)):
+        batch = images[start : start + max(1, batch_size)]
+        ok, error = docker_load(bundle, batch)
+        if on_batch is not None:
+            on_batch(batch, ok, error)
+        if not ok:
+            failed.extend(batch)
+            print(f"docker load failed: {error}", file=sys.stderr)
+        print(f"[{min(start + len(batch), len(images))}/{len(images)}] loaded {len(batch)} images")
+    return failed
+
+
+def docker_load(bundle: Bundle, images: Sequence[str]) -> Tuple[bool, str]:
+    proc = subprocess.Popen(
+        ["docker", "load"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        write_load_stream(bundle, images, proc.stdin)
+    except BrokenPipeError:
+        pass
+    finally:
+        with contextlib.suppress(BrokenPipeError):
+            proc.stdin.close()
+    stdout, stderr = proc.communicate()
+    return proc.returncode == 0, stderr.decode(errors="replace").strip()
+
+
+def split_ref(image: str) -> Tuple[str, Optional[str]]:
+    """Repository path and tag for a registry push (``None`` tag for digest references)."""
+    ref = normalize_ref(image)
+    if "@" in ref:
+        return ref.split("@", 1)[0], None
+    repo, _, tag = ref.rpartition(":")
+    return repo, tag
+
+
+class PushUnsupported(RuntimeError):
+    """The registry refuses uploads altogether (a pull-through cache)."""
+
+
+class RegistryClient:
+    """Minimal registry v2 push client (no auth; meant for a local registry)."""
+
+    def __init__(
+        self,
+        url: str,
+        opener: Callable[..., Any] = urllib.request.urlopen,
+        timeout: float = 600.0,
+    ) -> None:
+        self.url = url if "://" in url else f"http://{url}"
+        self.url = self.url.rstrip("/")
+        self.opener = opener
+        self.timeout = timeout
+
+    def _request(
+        self, method: str, url: str, data: Any = None, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Any]:
+        if not url.startswith("http"):
+            url = urllib.parse.urljoin(self.url + "/", url.lstrip("/"))
+        request = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+        try:
+            with self.opener(request, timeout=self.timeout) as response:
+                return response.status, response.headers
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.headers
+
+    def has_blob(self, repo: str, digest: str) -> bool:
+        status, _ = self._request("HEAD", f"/v2/{repo}/blobs/{digest}")
+        return status == 200
+
+    def mount(self, repo: str, digest: str, source: str) -> bool:
+        query = urllib.parse.urlencode({"mount": digest, "from": source})
+        status, _ = self._request("POST", f"/v2/{repo}/blobs/uploads/?{query}")
+        return status == 201
+
+    def upload(self, repo: str, digest: str, path: Path) -> None:
+        status, headers = self._request("POST", f"/v2/{repo}/blobs/uploads/")
+        location = headers.get("Location") if headers else None
+        if status == 405:
+            raise PushUnsupported(
+                f"{self.url} does not accept pushes (a pull-through cache?); "
+                "push to a plain registry:2 listed in registry-mirrors instead"
+            )
+        if status != 202 or not location:
+            raise RuntimeError(f"upload start for {repo} returned HTTP {status}")
+        separator = "&" if "?" in location else "?"
+        size = path.stat().st_size
+        with open(path, "rb") as handle:
+            status, _ = self._request(
+                "PUT",
+                f"{location}{separator}digest={urllib.parse.quote(digest)}",
+                data=handle,
+                headers={"Content-Type": "application/octet-stream", "Content-Length": str(size)},
+            )
+        if status != 201:
+            raise RuntimeError(f"blob upload {digest} to {repo} returned HTTP {status}")
+
+    def put_manifest(self, repo: str, tag: str, manifest: Dict[str, Any]) -> None:
+        status, _ = self._request(
+            "PUT",
+            f"/v2/{repo}/manifests/{tag}",
+            data=json.dumps(manifest).encode("utf-8"),
+            headers={"Content-Type": OCI_MANIFEST},
+        )
+        if status != 201:
+            raise RuntimeError(f"manifest push {repo}:{tag} returned HTTP {status}")
+
+
+def push_image(bundle: Bundle, client: RegistryClient, image: str, sources: Dict[str, str]) -> int:
+    """Push ``image`` under its own repository path; returns bytes uploaded.
+
+    Blobs already pushed to another repository in this run are cross-mounted instead of
+    uploaded again; ``sources`` maps digest -> repository and is updated in place.
+    """
+    repo, tag = split_ref(image)
+    if tag is None:
+        raise ValueError(f"{image} is a digest reference; only tagged images can be pushed")
+    entry = bundle.index["images"][image]
+    uploaded = 0
+    for digest in bundle.blobs_of(image):
+        if not client.has_blob(repo, digest):
+            source = sources.get(digest)
+            if not (source and client.mount(repo, digest, source)):
+                client.upload(repo, digest, bundle.blob_path(digest))
+                uploaded += bundle.blob_path(digest).stat().st_size
+        sources.setdefault(digest, repo)
+
+    def descriptor(media_type: str, digest: str) -> Dict[str, Any]:
+        return {"mediaType": media_type, "digest": digest, "size": bundle.blob_path(digest).stat().st_size}
+
+    client.put_manifest(
+        repo,
+        tag,
+        {
+            "schemaVersion": 2,
+            "mediaType": OCI_MANIFEST,
+            "config": descriptor(OCI_CONFIG, entry["config"]),
+            "layers": [descriptor(OCI_LAYER, digest) for digest in entry["layers"]],
+        },
+    )
+    return uploaded
+
+
+def push_images(bundle: Bundle, client: RegistryClient, images: Sequence[str]) -> int:
+    """Push ``images`` to ``client``'s registry; returns how many failed.
+
+    Stops at the first ``PushUnsupported``: no other image would get through either.
+    """
+    sources: Dict[str, str] = {}
+    failures = 0
+    for idx, image in enumerate(images, start=1):
+        try:
+            uploaded = push_image(bundle, client, image, sources)
+        except PushUnsupported as exc:
+            print(f"[{idx}/{len(images)}] FAILED {image}: {exc}", file=sys.stderr)
+            return failures + len(images) - idx + 1
+        except (OSError, RuntimeError, ValueError) as exc:
+            failures += 1
+            print(f"[{idx}/{len(images)}] FAILED {image}: {exc}", file=sys.stderr)
+            continue
+        print(f"[{idx}/{len(images)}] pushed {image} ({format_bytes(uploaded)} uploaded)")
+    return failures
+
+
+def read_image_list(path: str) -> List[str]:
+    """One image per line, as ``swebench_pull_images.py --output`` writes it."""
+    with open(path, "r", encoding="utf-8") as handle:
+        lines = (line.strip() for line in handle)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export, load or push content-addressed SWE-bench image bundles.")
+    parser.add_argument("--bundle", required=True, help="Bundle directory.")
+    parser.add_argument("--suite", default="swebench-multilingual", help="Image group in the bundle index.")
+    parser.add_argument("--batch", type=int, default=8, help="Images per docker save / docker load call.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Add locally present images to the bundle.")
+    export.add_argument("images", nargs="*", help="Images to export.")
+    export.add_argument("--images-file", default="", help="File with one image per line (pull_images --output).")
+
+    sub.add_parser("import", help="docker load the suite's images that are not present locally.")
+
+    push = sub.add_parser("push", help="Push the suite's images to a registry through the v2 API.")
+    push.add_argument(
+        "--registry",
+        required=True,
+        help="Plain registry:2 (e.g. localhost:5001); a pull-through cache rejects pushes.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    bundle = Bundle(args.bundle)
+    if args.command == "export":
+        images = list(args.images)
+        if args.images_file:
+            images.extend(read_image_list(args.images_file))
+        images = list(dict.fromkeys(images))
+        summary = export_present_images(bundle, images, args.suite, batch_size=args.batch)
+        if summary is None:
+            return 2
+        return 3 if summary["failed"] else 0
+
+    images = [image for image in bundle.suite_images(args.suite) if bundle.has_image(image)]
+    if not images:
+        print(f"No {args.suite} images in bundle {args.bundle}.")
+        return 1
+    if args.command == "push":
+        return 3 if push_images(bundle, RegistryClient(args.registry), images) else 0
+    local = local_images()
+    if local is not None:
+        images = [image for image in images if normalize_ref(image) not in local]
+    return 3 if load_images(bundle, images, args.batch) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
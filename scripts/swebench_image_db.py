@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Persistent per-image manifest cache shared by the pull, prefetch and status tools.
+
+One JSON file (default ``work/swebench/cache/images.json``) with an entry per image::
+
+    {"images": {"<image>": {
+        "platform": "linux/amd64",
+        "status": "pulled" | "failed" | "removed" | null,
+        "digest": "sha256:...",          # repo digest of the local copy
+        "size": 1234,                    # bytes, from docker image inspect
+        "layers": [["sha256:...", 567]], # remote manifest for the platform, if read
+        "last_pulled": 1700000000.0,
+        "attempts": 1,
+        "last_failure": {"time": ..., "error": "..."} | null,
+        "instances": {"<suite>": {"<split>": ["<instance_id>", ...]}}
+    }}}
+
+Several processes (pull, prefetch, status report) can share the file. Each one remembers
+which fields it changed and ``save`` re-reads the file under an ``fcntl`` lock, applies
+only those fields and writes it back atomically (temp file + rename), so concurrent
+writers do not drop each other's updates. Updates are flushed in batches of
+``FLUSH_EVERY`` updates or every ``FLUSH_SECONDS``; call ``save`` (or use the DB as a
+context manager) when done.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+WORK_DIR = REPO_ROOT / "work" / "swebench"
+DEFAULT_IMAGE_DB = WORK_DIR / "cache" / "images.json"
+FLUSH_EVERY = 50
+FLUSH_SECONDS = 5.0
+
+_DELETE = object()
+
+
+def _apply(images: Dict[str, Dict[str, Any]], keys: Tuple[str, ...], value: Any) -> None:
+    """Set (or delete, for ``_DELETE``) ``images[keys[0]][keys[1]]...``."""
+    node = images.setdefault(keys[0], {"instances": {}})
+    for key in keys[1:-1]:
+        node = node.setdefault(key, {})
+    if value is _DELETE:
+        node.pop(keys[-1], None)
+    else:
+        node[keys[-1]] = value
+
+
+class ImageDB:
+    """Image entries keyed by reference; ``path=""`` keeps everything in memory."""
+
+    def __init__(
+        self,
+        path: str,
+        platform: str = "linux/amd64",
+        flush_every: int = FLUSH_EVERY,
+        flush_seconds: float = FLUSH_SECONDS,
+    ) -> None:
+        self.path = path
+        self.platform = platform
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.images: Dict[str, Dict[str, Any]] = self._read()
+        self._lock = threading.RLock()
+        self._dirty: Dict[Tuple[str, ...], Any] = {}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> "ImageDB":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.save()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        return json.loads(Path(self.path).read_text(encoding="utf-8")).get("images", {})
+
+    def _entry(self, image: str) -> Dict[str, Any]:
+        entry = self.images.setdefault(image, {"instances": {}})
+        entry.setdefault("instances", {})
+        return entry
+
+    def _set(self, keys: Tuple[str, ...], value: Any) -> None:
+        _apply(self.images, keys, value)
+        self._dirty[keys] = value
+
+    def _changed(self) -> None:
+        """Flush once ``flush_every`` updates piled up or the last flush is old enough."""
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.save()
+
+    def save(self) -> None:
+        """Merge this process's changes into the file and reload everyone else's."""
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(f"{self.path}.lock", "a", encoding="utf-8") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                images = self._read()
+                for keys, value in self._dirty.items():
+                    _apply(images, keys, value)
+                tmp_path = f"{self.path}.tmp.{os.getpid()}"
+                with open(tmp_path, "w", encoding="utf-8") as handle:
+                    json.dump({"images": images}, handle, indent=1, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            self.images = images
+            self._dirty.clear()
+            self._pending = 0
+            self._last_flush = time.monotonic()
+
+    def set_instances(self, suite: str, split: str, pairs: Iterable[Tuple[str, str]]) -> Dict[str, int]:
+        """Replace the ``suite``/``split`` references with ``(instance_id, image)`` pairs.
+
+        Returns how many images were ``added`` to and ``dropped`` from the split.
+        """
+        refs: Dict[str, List[str]] = {}
+        for instance_id, image in pairs:
+            refs.setdefault(image, []).append(instance_id)
+        with self._lock:
+            before = {
+                image
+                for image, entry in self.images.items()
+                if entry.get("instances", {}).get(suite, {}).get(split)
+            }
+            for image in before - set(refs):
+                self._set((image, "instances", suite, split), _DELETE)
+            for image, instance_ids in refs.items():
+                self._set((image, "instances", suite, split), instance_ids)
+            self._changed()
+        return {"added": len(set(refs) - before), "dropped": len(before - set(refs))}
+
+    def is_done(self, image: str) -> bool:
+        entry = self.images.get(image, {})
+        return entry.get("status") == "pulled" and entry.get("platform") == self.platform
+
+    def record(self, image: str, ok: bool, attempts: int, error: str = "") -> None:
+        """Record a pull attempt."""
+        now = round(time.time(), 3)
+        with self._lock:
+            self._set((image, "platform"), self.platform)
+            self._set((image, "attempts"), attempts)
+            if ok:
+                self._set((image, "status"), "pulled")
+                self._set((image, "last_pulled"), now)
+            else:
+                self._set((image, "status"), "failed")
+                self._set((image, "last_failure"), {"time": now, "error": error or None})
+            self._changed()
+
+    def mark_removed(self, image: str) -> None:
+        with self._lock:
+            self._set((image, "status"), "removed")
+            self._changed()
+
+    def update_local(self, details: Dict[str, Dict[str, Any]], absent: Iterable[str] = ()) -> None:
+        """Store digest and size of local images; mark ``absent`` pulled images as removed."""
+        with self._lock:
+            for image, info in details.items():
+                entry = self._entry(image)
+                self._set((image, "digest"), info.get("digest") or entry.get("digest"))
+                self._set((image, "size"), info.get("size", entry.get("size")))
+                self._set((image, "platform"), self.platform)
+                if entry.get("status") != "pulled":
+                    self._set((image, "status"), "pulled")
+            for image in absent:
+                if self.images.get(image, {}).get("status") == "pulled":
+                    self._set((image, "status"), "removed")
+            self._changed()
+
+    def record_manifests(self, manifests: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            for image, manifest in manifests.items():
+                self._set((image, "layers"), [list(layer) for layer in manifest["layers"]])
+                self._set((image, "manifest_digest"), manifest.get("digest"))
+                self._set((image, "manifest_platform"), self.platform)
+            self._changed()
+
+    def manifests(self, images: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Cached manifests for ``images`` read earlier for this platform."""
+        cached = {}
+        for image in images:
+            entry = self.images.get(image, {})
+            if entry.get("layers") is not None and entry.get("manifest_platform") == self.platform:
+                cached[image] = {
+                    "digest": entry.get("manifest_digest"),
+                    "layers": [tuple(layer) for layer in entry["layers"]],
+                }
+        return cached
+
+    def footprint(self, suite: Optional[str] = None) -> Dict[str, Any]:
+        """Image count and on-disk bytes of pulled images per suite and split.
+
+        An image used by several splits counts once per split and once in the suite total.
+        """
+        report: Dict[str, Any] = {}
+        for image, entry in self.images.items():
+            pulled = entry.get("status") == "pulled"
+            size = int(entry.get("size") or 0) if pulled else 0
+            for suite_name, splits in entry.get("instances", {}).items():
+                if suite is not None and suite_name != suite:
+                    continue
+                if not splits:
+                    continue
+                suite_report = report.setdefault(
+                    suite_name, {"images": 0, "pulled": 0, "bytes": 0, "splits": {}}
+                )
+                suite_report["images"] += 1
+                suite_report["pulled"] += int(pulled)
+                suite_report["bytes"] += size
+                for split in splits:
+                    split_report = suite_report["splits"].setdefault(
+                        split, {"images": 0, "pulled": 0, "bytes": 0}
+                    )
+                    split_report["images"] += 1
+                    split_report["pulled"] += int(pulled)
+                    split_report["bytes"] += size
+        return report
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Pull planning for SWE-bench images: local presence, remote manifests and layer-aware order.
+
+Every docker invocation goes through ``run_docker`` so tests can stub the CLI.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+SIZE_UNITS = {"B": 1, "KB": 10**3, "MB": 10**6, "GB": 10**9, "TB": 10**12}
+SIZE_RE = re.compile(r"^\s*([\d.]+)\s*([KMGT]?B)\s*$", re.IGNORECASE)
+
+
+def run_docker(args: Sequence[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["docker", *args], check=False, capture_output=True, text=True, timeout=timeout
+    )
+
+
+def normalize_ref(image: str) -> str:
+    """Canonical short form docker uses in ``image ls``: no ``docker.io/library/``, explicit tag."""
+    ref = image.strip()
+    for prefix in ("docker.io/", "index.docker.io/", "registry-1.docker.io/"):
+        if ref.startswith(prefix):
+            ref = ref[len(prefix) :]
+            break
+    if ref.startswith("library/") and ref.count("/") == 1:
+        ref = ref[len("library/") :]
+    if "@" not in ref and ":" not in ref.rsplit("/", 1)[-1]:
+        ref = f"{ref}:latest"
+    return ref
+
+
+def parse_size(text: str) -> int:
+    """``docker image ls`` sizes (``1.23GB``, decimal units) to bytes; 0 if unparseable."""
+    match = SIZE_RE.match(text or "")
+    if not match:
+        return 0
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            break
+        value /= 1024
+    return f"{int(value)} B" if unit == "B" else f"{value:.1f} {unit}"
+
+
+def local_images() -> Optional[Dict[str, Dict[str, Any]]]:
+    """All local images from one ``docker image ls`` call: normalized ref -> ``{"id", "size", "digest"}``.
+
+    Returns None (with a warning) when docker is unavailable.
+    """
+    try:
+        result = run_docker(["image", "ls", "--digests", "--no-trunc", "--format", "{{json .}}"])
+    except (OSError, subprocess.SubprocessError) as exc:
+        print(f"docker image ls failed ({exc}); cannot skip present images.", file=sys.stderr)
+        return None
+    if result.returncode != 0:
+        print(f"docker image ls failed: {result.stderr.strip()}", file=sys.stderr)
+        return None
+    images: Dict[str, Dict[str, Any]] = {}
+    for line in result.stdout.splitlines():
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        repo = row.get("Repository") or ""
+        if not repo or repo == "<none>":
+            continue
+        digest = row.get("Digest") or ""
+        entry = {
+            "id": row.get("ID"),
+            "size": parse_size(row.get("Size", "")),
+            "digest": digest if digest.startswith("sha256:") else None,
+        }
+        tag = row.get("Tag") or ""
+        if tag and tag != "<none>":
+            images[normalize_ref(f"{repo}:{tag}")] = entry
+        if entry["digest"]:
+            images[normalize_ref(f"{repo}@{digest}")] = entry
+    return images
+
+
+def _manifest_layers(entry: Dict[str, Any]) -> Optional[List[Tuple[str, int]]]:
+    manifest = entry.get("SchemaV2Manifest") or entry.get("OCIManifest")
+    if not isinstance(manifest, dict):
+        return None
+    return [(layer["digest"], int(layer.get("size", 0))) for layer in manifest.get("layers", [])]
+
+
+def select_platform_manifest(data: Any, platform: str) -> Optional[Dict[str, Any]]:
+    """Pick the entry for ``platform`` (``os/arch[/variant]``) from ``manifest inspect --verbose``."""
+    entries = data if isinstance(data, list) else [data]
+    os_name, _, arch = platform.partition("/")
+    arch, _, variant = arch.partition("/")
+    for entry in entries:
+        descriptor = entry.get("Descriptor") or {}
+        spec = descriptor.get("platform")
+        if spec and (spec.get("os"), spec.get("architecture")) != (os_name, arch):
+            continue
+        if spec and variant and spec.get("variant") not in (None, variant):
+            continue
+        layers = _manifest_layers(entry)
+        if layers is not None:
+            return {"digest": descriptor.get("digest"), "layers": layers}
+    return None
+
+
+def inspect_manifest(image: str, platform: str, timeout: float = 60.0) -> Optional[Dict[str, Any]]:
+    """Remote manifest (``{"digest", "layers": [(digest, size), ...]}``) or None if unreachable."""
+    try:
+        result = run_docker(["manifest", "inspect", "--verbose", image], timeout=timeout)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        return select_platform_manifest(json.loads(result.stdout), platform)
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return None
+
+
+def order_by_layers(images: Sequence[str], manifests: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Order pulls so images sharing base layers run back to back.
+
+    Images are sorted by their layer-digest chain (base layer first), which groups
+    every image built on the same base. Groups with more members go first so the
+    most widely shared layers land early, and the daemon reuses them for the rest.
+    Images without a manifest keep their original order at the end.
+    """
+    known = [image for image in images if image in manifests]
+    unknown = [image for image in images if image not in manifests]
+    base_count: Dict[str, int] = {}
+    for image in known:
+        layers = manifests[image]["layers"]
+        base = layers[0][0] if layers else ""
+        base_count[base] = base_count.get(base, 0) + 1
+
+    def key(image: str) -> Tuple[int, Tuple[str, ...]]:
+        layers = manifests[image]["layers"]
+        base = layers[0][0] if layers else ""
+        return (-base_count[base], tuple(digest for digest, _ in layers))
+
+    return sorted(known, key=key) + unknown
+
+
+class PullPlan:
+    """What a pull run will do: ``to_pull`` in order, images already ``present``, and
+    the expected download (unique compressed layers of ``to_pull``; layers already on
+    disk through other images are not subtracted, so it is an upper bound).
+    ``checked_local`` is False when local presence could not be determined; otherwise
+    ``local`` maps each present image to its ``local_images`` entry."""
+
+    def __init__(
+        self,
+        to_pull: List[str],
+        present: List[str],
+        manifests: Dict[str, Dict[str, Any]],
+        checked_local: bool = True,
+        local: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        self.to_pull = to_pull
+        self.present = present
+        self.manifests = manifests
+        self.checked_local = checked_local
+        self.local = local or {}
+        layers: Dict[str, int] = {}
+        for image in to_pull:
+            for digest, size in manifests.get(image, {}).get("layers", []):
+                layers[digest] = size
+        self.unique_layers = len(layers)
+        self.expected_bytes = sum(layers.values())
+        self.total_layer_bytes = sum(
+            size for image in to_pull for _, size in manifests.get(image, {}).get("layers", [])
+        )
+        self.unknown = [image for image in to_pull if image not in manifests]
+
+    def summary(self) -> str:
+        line = f"Plan: {len(self.to_pull)} to pull, {len(self.present)} already present"
+        if self.manifests:
+            saved = self.total_layer_bytes - self.expected_bytes
+            line += (
+                f"; expected download {format_bytes(self.expected_bytes)} in {self.unique_layers} "
+                f"unique layers ({format_bytes(saved)} shared)"
+            )
+            if self.unknown:
+                line += f"; {len(self.unknown)} images without a reachable manifest"
+        return line
+
+
+def plan_pulls(
+    images: Sequence[str],
+    platform: str,
+    skip_present: bool = True,
+    inspect: bool = False,
+    parallel: int = 4,
+    cached_manifests: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> PullPlan:
+    """Drop locally present images (one ``docker image ls``), optionally read remote
+    manifests in parallel, and order the rest for layer reuse.
+
+    Manifests in ``cached_manifests`` are used as-is; only the other images are inspected.
+    """
+    present: List[str] = []
+    remaining = list(images)
+    checked_local = False
+    found_local: Dict[str, Dict[str, Any]] = {}
+    if skip_present:
+        local = local_images()
+        if local is not None:
+            checked_local = True
+            found_local = {
+                image: local[normalize_ref(image)] for image in remaining if normalize_ref(image) in local
+            }
+            present = [image for image in remaining if image in found_local]
+            remaining = [image for image in remaining if image not in found_local]
+    manifests: Dict[str, Dict[str, Any]] = {}
+    if inspect and remaining:
+        cached = cached_manifests or {}
+        manifests = {image: cached[image] for image in remaining if image in cached}
+        missing = [image for image in remaining if image not in manifests]
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+            found = executor.map(lambda image: inspect_manifest(image, platform), missing)
+            manifests.update({image: manifest for image, manifest in zip(missing, found) if manifest})
+        remaining = order_by_layers(remaining, manifests)
+    return PullPlan(remaining, present, manifests, checked_local, found_local)
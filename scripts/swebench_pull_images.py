@@ -6,14 +6,36 @@ from __future__ import annotations
 import argparse
 import json
 import os
-import subprocess
+import random
 import sys
+import threading
 import time
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Iterable, Optional, Sequence
+from typing import Any, Callable, Iterable, Optional, Sequence
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.swebench_datasets import load_dataset_live, load_dataset_swebench  # noqa: E402
+from scripts.swebench_image_bundle import (  # noqa: E402
+    Bundle,
+    RegistryClient,
+    export_present_images,
+    load_images,
+    push_images,
+)
+from scripts.swebench_image_db import DEFAULT_IMAGE_DB, ImageDB  # noqa: E402
+from scripts.swebench_image_plan import (  # noqa: E402
+    format_bytes,
+    local_images,
+    normalize_ref,
+    plan_pulls,
+    run_docker,
+)
+
 WORK_DIR = REPO_ROOT / "work" / "swebench"
 DEFAULT_IMAGE_FIELDS = (
     "docker_image",
@@ -22,6 +44,9 @@ DEFAULT_IMAGE_FIELDS = (
     "docker",
 )
 
+# Docker Hub and most registries report pull-rate limits with one of these in stderr.
+RATE_LIMIT_MARKERS = ("toomanyrequests", "too many requests", "rate limit")
+
 DOCKERHUB_AUTH_KEYS = (
     "https://index.docker.io/v1/",
     "https://registry-1.docker.io/v1/",
@@ -30,29 +55,6 @@ DOCKERHUB_AUTH_KEYS = (
 )
 
 
-def load_dataset_swebench(split: str) -> Iterable[dict[str, Any]]:
-    try:
-        from datasets import load_dataset  # type: ignore
-    except Exception as exc:  # pragma: no cover - import error path
-        raise RuntimeError(
-            f"datasets is required. Activate {WORK_DIR}/.venv first."
-        ) from exc
-    return load_dataset("SWE-bench/SWE-bench_Multilingual", split=split)
-
-
-def load_dataset_live(splits: Sequence[str]) -> list[tuple[str, Iterable[dict[str, Any]]]]:
-    try:
-        from datasets import load_dataset  # type: ignore
-    except Exception as exc:  # pragma: no cover - import error path
-        raise RuntimeError(
-            f"datasets is required. Activate {WORK_DIR}/.venv first."
-        ) from exc
-    dataset = load_dataset("SWE-bench-Live/MultiLang")
-    if not splits:
-        splits = list(dataset.keys())
-    return [(split, dataset[split]) for split in splits]
-
-
 def extract_image(
     row: dict[str, Any],
     image_field: Optional[str],
@@ -70,6 +72,12 @@ def extract_image(
     return None
 
 
+def image_columns(image_field: Optional[str]) -> list[str]:
+    """Dataset columns needed to collect images; snapshots hold only these."""
+    fields = [image_field] if image_field else list(DEFAULT_IMAGE_FIELDS)
+    return ["instance_id", *fields]
+
+
 def collect_images(rows: Iterable[dict[str, Any]], image_field: Optional[str]) -> Counter[str]:
     counter: Counter[str] = Counter()
     for row in rows:
@@ -79,6 +87,16 @@ def collect_images(rows: Iterable[dict[str, Any]], image_field: Optional[str]) -
     return counter
 
 
+def instance_images(rows: Iterable[dict[str, Any]], image_field: Optional[str]) -> list[tuple[str, str]]:
+    """``(instance_id, image)`` in dataset (run) order, for rows that name an image."""
+    pairs = []
+    for row in rows:
+        image = extract_image(row, image_field)
+        if image and row.get("instance_id"):
+            pairs.append((row["instance_id"], image))
+    return pairs
+
+
 def has_dockerhub_auth(config_path: Path) -> bool:
     auth_config = os.environ.get("DOCKER_AUTH_CONFIG")
     if auth_config:
@@ -98,14 +116,450 @@ def has_dockerhub_auth(config_path: Path) -> bool:
     return False
 
 
-def docker_pull(image: str, platform: str, dry_run: bool) -> bool:
-    if dry_run:
-        return True
-    result = subprocess.run(
-        ["docker", "pull", "--platform", platform, image],
-        check=False,
+def docker_pull(image: str, platform: str) -> tuple[bool, str]:
+    """Run ``docker pull``; returns success and the captured stderr (for rate-limit detection)."""
+    result = run_docker(["pull", "--platform", platform, image])
+    return result.returncode == 0, result.stderr or ""
+
+
+def registry_host(image: str) -> str:
+    """Registry host of an image reference (``docker.io`` when none is given)."""
+    first, sep, _ = image.partition("/")
+    if sep and ("." in first or ":" in first or first == "localhost"):
+        return first
+    return "docker.io"
+
+
+def is_rate_limited(stderr: str) -> bool:
+    lowered = stderr.lower()
+    return any(marker in lowered for marker in RATE_LIMIT_MARKERS)
+
+
+class TokenBucket:
+    """Allow ``rate`` acquisitions per second with bursts of up to ``burst``.
+
+    ``pause(seconds)`` empties the bucket and holds it closed, so a rate-limit response
+    seen by one worker also slows every other worker pulling from the same registry.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(self.capacity)
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_time(self) -> float:
+        now = self.clock()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                wait = self._wait_time()
+            if wait <= 0:
+                return
+            self.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.tokens = 0.0
+            self.updated = self.clock()
+            self.blocked_until = max(self.blocked_until, self.updated + seconds)
+
+
+class RegistryLimiter:
+    """One token bucket per registry host."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, image: str) -> TokenBucket:
+        host = registry_host(image)
+        with self._lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full-range jitter (50-150% of the nominal delay)."""
+    return min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+
+def pull_with_backoff(
+    image: str,
+    platform: str,
+    limiter: RegistryLimiter,
+    max_rate_limit_retries: int = 8,
+    base_delay: float = 30.0,
+    max_delay: float = 900.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> tuple[bool, str, int]:
+    """Pull ``image``, waiting out registry rate limits. Returns (ok, error, attempts)."""
+    bucket = limiter.bucket(image)
+    attempt = 0
+    while True:
+        bucket.acquire()
+        ok, stderr = docker_pull(image, platform)
+        attempt += 1
+        if ok:
+            return True, "", attempt
+        if not is_rate_limited(stderr) or attempt > max_rate_limit_retries:
+            error = stderr.strip().splitlines()[-1] if stderr.strip() else "docker pull failed"
+            return False, error, attempt
+        delay = backoff_delay(attempt - 1, base_delay, max_delay)
+        print(f"Rate limited pulling {image}; backing off {delay:.0f}s", file=sys.stderr)
+        bucket.pause(delay)
+        sleep(delay)
+
+
+def refresh_local(db: ImageDB, images: Sequence[str]) -> bool:
+    """Record digest and size of the local ``images`` (one ``docker image ls``) in ``db``;
+    images recorded as pulled but no longer listed are marked removed."""
+    local = local_images()
+    if local is None:
+        return False
+    found = {image: local[normalize_ref(image)] for image in images if normalize_ref(image) in local}
+    db.update_local(found, absent=[image for image in images if image not in found])
+    return True
+
+
+def print_footprint(db: ImageDB, suite: str) -> None:
+    report = db.footprint(suite).get(suite)
+    if not report:
+        print(f"No images recorded for {suite} in {db.path}.")
+        return
+    for split, totals in sorted(report["splits"].items()):
+        print(
+            f"{suite}/{split}: {totals['pulled']}/{totals['images']} images pulled, "
+            f"{format_bytes(totals['bytes'])}"
+        )
+    print(
+        f"{suite} total: {report['pulled']}/{report['images']} images pulled, "
+        f"{format_bytes(report['bytes'])} (shared images counted once)"
     )
-    return result.returncode == 0
+
+
+def pull_images(images: Sequence[str], args: argparse.Namespace, state: ImageDB) -> list[str]:
+    """Pull ``images`` with up to ``args.parallel`` concurrent pulls; returns failed images."""
+    limiter = RegistryLimiter(args.registry_rate, args.registry_burst)
+    stop = threading.Event()
+    total = len(images)
+    failures: list[str] = []
+    progress = {"finished": 0}
+    lock = threading.Lock()
+
+    def pull(image: str) -> tuple[str, bool, str]:
+        if stop.is_set():
+            return image, False, "skipped"
+        started = time.monotonic()
+        ok, error, attempts = pull_with_backoff(
+            image,
+            args.platform,
+            limiter,
+            max_rate_limit_retries=args.max_rate_limit_retries,
+            base_delay=args.backoff,
+        )
+        state.record(image, ok, attempts, error)
+        with lock:
+            progress["finished"] += 1
+            finished = progress["finished"]
+        status = "ok" if ok else "FAILED"
+        print(f"[{finished}/{total}] {status} {image} ({time.monotonic() - started:.1f}s)")
+        if args.sleep > 0:
+            time.sleep(args.sleep)
+        return image, ok, error
+
+    with ThreadPoolExecutor(max_workers=max(1, args.parallel)) as executor:
+        futures = [executor.submit(pull, image) for image in images]
+        for future in as_completed(futures):
+            image, ok, error = future.result()
+            if ok or error == "skipped":
+                continue
+            failures.append(image)
+            print(f"Failed to pull {image}: {error}", file=sys.stderr)
+            if args.stop_on_error:
+                stop.set()
+    return failures
+
+
+def read_instance_ids(path: str) -> set[str]:
+    """instance_ids in a predictions file: ``preds.json`` mapping/list or JSONL records."""
+    if not os.path.exists(path):
+        return set()
+    text = Path(path).read_text(encoding="utf-8")
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+    if isinstance(data, dict):
+        return set(data)
+    if isinstance(data, list):
+        return {entry["instance_id"] for entry in data if isinstance(entry, dict) and entry.get("instance_id")}
+    ids = set()
+    for line in text.splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(entry, dict) and entry.get("instance_id"):
+            ids.add(entry["instance_id"])
+    return ids
+
+
+def evaluated_instance_ids(eval_dirs: Sequence[str]) -> set[str]:
+    """Instances with a harness ``<eval_dir>/<instance_id>/report.json``."""
+    ids = set()
+    for eval_dir in eval_dirs:
+        for report in Path(eval_dir).glob("*/report.json"):
+            ids.add(report.parent.name)
+    return ids
+
+
+def docker_remove(image: str) -> bool:
+    """``docker image rm`` without force, so images used by containers are kept."""
+    return run_docker(["image", "rm", image]).returncode == 0
+
+
+class Prefetcher:
+    """Keep images ahead of the agent and evaluator within a disk budget.
+
+    Each ``step`` pins the images of the next ``window`` instances the agent has not
+    finished, plus instances it finished that still await evaluation, and pulls any
+    that are missing. When suite images on disk exceed ``budget_bytes`` it evicts
+    unpinned images whose instances finished both stages, least recently needed first;
+    with ``evict_upcoming`` it then also evicts images needed furthest in the future,
+    at the cost of pulling them again later. Pinned images are never evicted; if the
+    budget is still exceeded, ``over_budget`` is set and pulls wait for the next step.
+    Sizes come from ``docker image ls``, which counts shared layers once per image,
+    so the usage figure is conservative.
+    """
+
+    def __init__(
+        self,
+        order: Sequence[tuple[str, str]],
+        window: int,
+        budget_bytes: int,
+        pull: Callable[[str], bool],
+        remove: Callable[[str], bool] = docker_remove,
+        list_local: Callable[[], Optional[dict[str, dict[str, Any]]]] = local_images,
+        clock: Callable[[], float] = time.time,
+        evict_upcoming: bool = False,
+    ) -> None:
+        self.order = list(order)
+        self.window = max(1, window)
+        self.budget_bytes = budget_bytes
+        self.evict_upcoming = evict_upcoming
+        self.pull = pull
+        self.remove = remove
+        self.list_local = list_local
+        self.clock = clock
+        self.instances_by_image: dict[str, list[str]] = {}
+        for instance_id, image in self.order:
+            self.instances_by_image.setdefault(image, []).append(instance_id)
+        self.last_needed: dict[str, float] = {}
+
+    def finished(self, agent_done: set[str], eval_done: set[str]) -> bool:
+        return all(i in agent_done and i in eval_done for i, _ in self.order)
+
+    def pinned(self, agent_done: set[str], eval_done: set[str]) -> list[str]:
+        """Images needed now: awaiting evaluation first, then the agent's window, in order."""
+        awaiting = [image for i, image in self.order if i in agent_done and i not in eval_done]
+        upcoming = [image for i, image in self.order if i not in agent_done][: self.window]
+        return list(dict.fromkeys(awaiting + upcoming))
+
+    def _eviction_order(
+        self, present: Sequence[str], pinned: set[str], agent_done: set[str], eval_done: set[str]
+    ) -> list[str]:
+        next_use: dict[str, int] = {}
+        for position, (instance_id, image) in enumerate(self.order):
+            if instance_id not in agent_done:
+                next_use.setdefault(image, position)
+        done = []
+        later = []
+        for image in present:
+            if image in pinned:
+                continue
+            if all(i in agent_done and i in eval_done for i in self.instances_by_image[image]):
+                done.append(image)
+            elif self.evict_upcoming:
+                later.append((next_use.get(image, len(self.order)), image))
+        done.sort(key=lambda image: self.last_needed.get(image, 0.0))
+        later.sort(reverse=True)
+        return done + [image for _, image in later]
+
+    def step(self, agent_done: set[str], eval_done: set[str], dry_run: bool = False) -> dict[str, Any]:
+        """Evict and pull for the current window; ``dry_run`` plans the same without calling docker."""
+        local = self.list_local() or {}
+        sizes = {
+            image: local[normalize_ref(image)]["size"]
+            for image in self.instances_by_image
+            if normalize_ref(image) in local
+        }
+        usage = sum(sizes.values())
+        estimate = int(usage / len(sizes)) if sizes else 0
+        pinned = self.pinned(agent_done, eval_done)
+        now = self.clock()
+        for image in pinned:
+            self.last_needed[image] = now
+        pinned_set = set(pinned)
+        missing = [image for image in pinned if image not in sizes]
+        evicted: list[str] = []
+        need = usage + estimate * len(missing)
+        if self.budget_bytes:
+            for image in self._eviction_order(list(sizes), pinned_set, agent_done, eval_done):
+                if need <= self.budget_bytes:
+                    break
+                if dry_run or self.remove(image):
+                    evicted.append(image)
+                    need -= sizes[image]
+                    usage -= sizes.pop(image)
+        pulled: list[str] = []
+        deferred: list[str] = []
+        for position, image in enumerate(missing):
+            # The head of the line is needed immediately, so it is pulled regardless.
+            if position and self.budget_bytes and usage + estimate > self.budget_bytes:
+                deferred.append(image)
+                continue
+            if dry_run or self.pull(image):
+                pulled.append(image)
+                usage += estimate
+        return {
+            "pinned": len(pinned),
+            "pulled": pulled,
+            "evicted": evicted,
+            "deferred": deferred,
+            "usage_bytes": usage,
+            "over_budget": bool(self.budget_bytes) and need > self.budget_bytes,
+        }
+
+
+def run_prefetch(args: argparse.Namespace, order: Sequence[tuple[str, str]], state: ImageDB) -> int:
+    limiter = RegistryLimiter(args.registry_rate, args.registry_burst)
+
+    def pull(image: str) -> bool:
+        ok, error, attempts = pull_with_backoff(
+            image,
+            args.platform,
+            limiter,
+            max_rate_limit_retries=args.max_rate_limit_retries,
+            base_delay=args.backoff,
+        )
+        state.record(image, ok, attempts, error)
+        if not ok:
+            print(f"Failed to prefetch {image}: {error}", file=sys.stderr)
+        return ok
+
+    def remove(image: str) -> bool:
+        removed = docker_remove(image)
+        if removed:
+            state.mark_removed(image)
+        return removed
+
+    if args.dry_run:
+        agent_done = set().union(*(read_instance_ids(path) for path in args.agent_preds))
+        result = Prefetcher(
+            order,
+            args.prefetch,
+            int(args.disk_budget_gb * 10**9),
+            pull=lambda image: True,
+            remove=lambda image: True,
+            evict_upcoming=args.evict_upcoming,
+        ).step(agent_done, evaluated_instance_ids(args.eval_dir), dry_run=True)
+        for key, label in (("evicted", "evict"), ("pulled", "pull"), ("deferred", "defer")):
+            for image in result[key]:
+                print(f"Would {label}: {image}")
+        print(f"Prefetch dry run: pinned {result['pinned']}, disk {format_bytes(result['usage_bytes'])}")
+        return 0
+
+    prefetcher = Prefetcher(
+        order,
+        args.prefetch,
+        int(args.disk_budget_gb * 10**9),
+        pull,
+        remove=remove,
+        evict_upcoming=args.evict_upcoming,
+    )
+    while True:
+        agent_done = set().union(*(read_instance_ids(path) for path in args.agent_preds))
+        eval_done = evaluated_instance_ids(args.eval_dir)
+        if prefetcher.finished(agent_done, eval_done):
+            print("Prefetch: every instance finished both stages; exiting.")
+            return 0
+        result = prefetcher.step(agent_done, eval_done)
+        print(
+            f"Prefetch: agent {len(agent_done)}/{len(order)}, evaluated {len(eval_done)}; "
+            f"pinned {result['pinned']}, pulled {len(result['pulled'])}, evicted {len(result['evicted'])}, "
+            f"deferred {len(result['deferred'])}, disk {format_bytes(result['usage_bytes'])}",
+            flush=True,
+        )
+        if result["over_budget"]:
+            print(
+                f"Prefetch: --disk-budget-gb {args.disk_budget_gb:g} cannot hold the pinned images without "
+                "evicting unfinished ones; raise the budget, shrink --prefetch or pass --evict-upcoming.",
+                file=sys.stderr,
+            )
+        if args.once:
+            return 0
+        time.sleep(args.poll)
+
+
+def export_bundle(args: argparse.Namespace, images: Sequence[str]) -> int:
+    """Write the locally present ``images`` into the bundle at ``args.export_bundle``
+    (with ``args.dry_run``, only list them)."""
+    summary = export_present_images(
+        Bundle(args.export_bundle), images, args.suite, batch_size=args.bundle_batch, dry_run=args.dry_run
+    )
+    if summary is None:
+        return 2
+    return 3 if summary.get("failed") else 0
+
+
+def import_bundle(args: argparse.Namespace, state: ImageDB) -> int:
+    """Load the suite's images from ``args.import_bundle`` into the daemon or ``args.import_registry``."""
+    bundle = Bundle(args.import_bundle)
+    images = [image for image in bundle.suite_images(args.suite) if bundle.has_image(image)]
+    if args.max_images:
+        images = images[: args.max_images]
+    if not images:
+        print(f"No {args.suite} images in bundle {args.import_bundle}.")
+        return 1
+    if args.import_registry:
+        return 3 if push_images(bundle, RegistryClient(args.import_registry), images) else 0
+
+    local = local_images() if args.skip_present else None
+    if local is not None:
+        images = [image for image in images if normalize_ref(image) not in local]
+
+    def record(batch: Sequence[str], ok: bool, error: str) -> None:
+        for image in batch:
+            state.record(image, ok, 1, error)
+
+    failed = load_images(bundle, images, args.bundle_batch, on_batch=record)
+    refresh_local(state, images)
+    return 3 if failed else 0
 
 
 def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
@@ -144,9 +598,121 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         "--sleep",
         type=float,
         default=0.0,
-        help="Seconds to sleep between pulls.",
+        help="Seconds each worker sleeps between pulls.",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Number of concurrent docker pulls.",
+    )
+    parser.add_argument(
+        "--registry-rate",
+        type=float,
+        default=0.5,
+        help="Pull starts per second allowed per registry host (0 = unlimited).",
+    )
+    parser.add_argument(
+        "--registry-burst",
+        type=int,
+        default=4,
+        help="Pull starts allowed back to back per registry host before --registry-rate applies.",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=30.0,
+        help="Initial backoff (seconds) after a toomanyrequests response; doubles per retry, with jitter.",
+    )
+    parser.add_argument(
+        "--max-rate-limit-retries",
+        type=int,
+        default=8,
+        help="Rate-limit retries per image before it is recorded as failed.",
+    )
+    parser.add_argument(
+        "--state-file",
+        default="",
+        help="Image database shared with the prefetch and status tools "
+        "(default: work/swebench/cache/images.json).",
+    )
+    parser.add_argument(
+        "--no-state",
+        action="store_true",
+        help="Do not read or write the image database.",
+    )
+    parser.add_argument(
+        "--footprint",
+        action="store_true",
+        help="Print the suite's image count and disk footprint per split from the image database and exit.",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        help="Daemon mode: keep the images of the next K unfinished instances (run order) pulled.",
+    )
+    parser.add_argument(
+        "--disk-budget-gb",
+        type=float,
+        default=0.0,
+        help="With --prefetch: evict finished images (LRU) to keep suite images under this size (0 = no limit).",
+    )
+    parser.add_argument(
+        "--evict-upcoming",
+        action="store_true",
+        help="With --disk-budget-gb: when finished images do not free enough space, also evict images "
+        "of unfinished instances needed furthest ahead (they are pulled again when their turn comes).",
+    )
+    parser.add_argument(
+        "--agent-preds",
+        action="append",
+        default=[],
+        help="With --prefetch: predictions file(s) marking instances the agent finished (repeatable).",
+    )
+    parser.add_argument(
+        "--eval-dir",
+        action="append",
+        default=[],
+        help="With --prefetch: harness log dir(s) holding <instance_id>/report.json (repeatable).",
+    )
+    parser.add_argument("--poll", type=float, default=30.0, help="With --prefetch: seconds between checks.")
+    parser.add_argument("--once", action="store_true", help="With --prefetch: run a single step and exit.")
+    parser.add_argument(
+        "--export-bundle",
+        default="",
+        help="Export the suite's locally present images into this content-addressed bundle directory.",
+    )
+    parser.add_argument(
+        "--import-bundle",
+        default="",
+        help="Import the suite's images from this bundle directory instead of pulling.",
+    )
+    parser.add_argument(
+        "--import-registry",
+        default="",
+        help="With --import-bundle: push to this plain registry:2 (e.g. localhost:5001) instead of docker load; "
+        "a pull-through cache rejects pushes.",
+    )
+    parser.add_argument(
+        "--bundle-batch",
+        type=int,
+        default=8,
+        help="Images per docker save / docker load call for bundle export and import.",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Print the plan and images only.")
+    parser.add_argument(
+        "--no-skip-present",
+        dest="skip_present",
+        action="store_false",
+        help="Pull images even if they are already present locally.",
+    )
+    parser.add_argument(
+        "--inspect-manifests",
+        action="store_true",
+        help="Read remote manifests to order pulls for shared-layer reuse and report expected bytes "
+        "(Docker Hub counts manifest requests against the pull rate limit).",
     )
-    parser.add_argument("--dry-run", action="store_true", help="Print images only.")
     parser.add_argument(
         "--require-auth",
         action="store_true",
@@ -162,30 +728,47 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default="",
         help="Optional path to write image list (one per line).",
     )
+    parser.add_argument(
+        "--dataset-cache",
+        default="",
+        help="Dataset snapshot directory (default: work/swebench/cache/datasets).",
+    )
+    parser.add_argument(
+        "--refresh-dataset",
+        action="store_true",
+        help="Rebuild the dataset snapshot from HuggingFace.",
+    )
     return parser.parse_args(argv)
 
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
-    args = parse_args(argv)
+def run_pull(args: argparse.Namespace, state: ImageDB) -> int:
+    """Everything after the auth check; ``main`` saves ``state`` afterwards."""
     image_field = args.image_field.strip() or None
     splits = [s.strip() for s in args.splits.split(",") if s.strip()]
+    if args.footprint:
+        print_footprint(state, args.suite)
+        return 0
+    if args.import_bundle:
+        return import_bundle(args, state)
 
-    if args.require_auth:
-        config_path = Path("~/.docker/config.json").expanduser()
-        if not has_dockerhub_auth(config_path):
-            print(
-                "Docker Hub auth not detected. Run `docker login` or set DOCKER_AUTH_CONFIG.",
-                file=sys.stderr,
-            )
-            return 2
-
+    columns = image_columns(image_field)
     if args.suite == "swebench-multilingual":
-        dataset = load_dataset_swebench(args.split)
-        counter = collect_images(dataset, image_field)
+        with load_dataset_swebench(args.split, columns, args.dataset_cache, args.refresh_dataset) as dataset:
+            split_rows = [(args.split, list(dataset))]
     else:
-        counter = Counter()
-        for _, dataset in load_dataset_live(splits):
-            counter.update(collect_images(dataset, image_field))
+        split_rows = []
+        for name, dataset in load_dataset_live(splits, columns, args.dataset_cache, args.refresh_dataset):
+            with dataset:
+                split_rows.append((name, list(dataset)))
+    rows = [row for _, dataset in split_rows for row in dataset]
+    # A dry run reads the image database but leaves it as it was.
+    if not args.dry_run:
+        for split, dataset in split_rows:
+            state.set_instances(args.suite, split, instance_images(dataset, image_field))
+    counter = collect_images(rows, image_field)
+
+    if args.prefetch:
+        return run_prefetch(args, instance_images(rows, image_field), state)
 
     images = [image for image, _ in counter.most_common()]
     if args.max_images:
@@ -200,18 +783,38 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         print("No docker images found in dataset rows.")
         return 1
 
-    total = len(images)
-    failures = []
-    for idx, image in enumerate(images, start=1):
-        print(f"[{idx}/{total}] {image}")
-        ok = docker_pull(image, args.platform, args.dry_run)
-        if not ok:
-            failures.append(image)
-            print(f"Failed to pull {image}", file=sys.stderr)
-            if args.stop_on_error:
-                break
-        if args.sleep > 0:
-            time.sleep(args.sleep)
+    if args.export_bundle:
+        return export_bundle(args, images)
+
+    # A dry run only lists: no manifest lookups, which count against the registry pull limit.
+    plan = plan_pulls(
+        images,
+        args.platform,
+        skip_present=args.skip_present,
+        inspect=args.inspect_manifests and not args.dry_run,
+        parallel=max(1, args.parallel),
+        cached_manifests=state.manifests(images),
+    )
+    print(plan.summary())
+    remaining = plan.to_pull
+    if not args.dry_run:
+        state.record_manifests(plan.manifests)
+        if plan.checked_local:
+            state.update_local(plan.local, absent=remaining)
+    if not plan.checked_local:
+        # Without a local listing, fall back to what earlier runs recorded as pulled.
+        remaining = [image for image in plan.to_pull if not state.is_done(image)]
+        if len(remaining) < len(plan.to_pull):
+            print(f"Skipping {len(plan.to_pull) - len(remaining)} images already pulled (db: {state.path})")
+
+    if args.dry_run:
+        for idx, image in enumerate(remaining, start=1):
+            print(f"[{idx}/{len(remaining)}] {image}")
+        return 0
+
+    failures = pull_images(remaining, args, state)
+    if remaining:
+        refresh_local(state, remaining)
 
     if failures:
         print(f"Failures: {len(failures)}", file=sys.stderr)
@@ -220,5 +823,21 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     return 0
 
 
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.require_auth:
+        config_path = Path("~/.docker/config.json").expanduser()
+        if not has_dockerhub_auth(config_path):
+            print(
+                "Docker Hub auth not detected. Run `docker login` or set DOCKER_AUTH_CONFIG.",
+                file=sys.stderr,
+            )
+            return 2
+
+    state_path = "" if args.no_state else (args.state_file or str(DEFAULT_IMAGE_DB))
+    with ImageDB(state_path, args.platform) as state:
+        return run_pull(args, state)
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
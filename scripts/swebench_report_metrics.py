@@ -7,8 +7,15 @@ import argparse
 import json
 import os
 import sys
+from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.swebench_eval_index import DEFAULT_INDEX_PATH, EvalIndex, summarize  # noqa: E402
+
 DEFAULT_LIVE_SPLITS = ["c", "cpp", "go", "js", "rust", "java", "ts", "cs"]
 
 
@@ -37,6 +44,22 @@ def calculate_swebench_metrics(report_path: str) -> Dict[str, Any]:
     }
 
 
+def calculate_eval_dir_metrics(model_dir: str, index: EvalIndex) -> Dict[str, Any]:
+    """Metrics from per-instance harness logs, for runs without a final summary report yet.
+
+    Only logs the index classifies as errors count as ``errors``; instances still running
+    (a log without a report or error signature) are reported as ``pending``.
+    """
+    summary = summarize(index.scan(Path(model_dir)))
+    return {
+        "total_tasks": summary["total"],
+        "solved": summary["resolved"],
+        "pass_rate": safe_divide(summary["resolved"], summary["total"]),
+        "errors": summary["errors"],
+        "pending": summary["total"] - summary["reports"] - summary["errors"],
+    }
+
+
 def parse_csv_list(value: Optional[str]) -> List[str]:
     if not value:
         return []
@@ -79,6 +102,7 @@ def render_markdown(metrics: Dict[str, Any]) -> str:
             "SWE-bench Multilingual: "
             f"total={swebench['total_tasks']}, solved={swebench['solved']}, "
             f"pass_rate={swebench['pass_rate']:.4f}, errors={swebench['errors']}"
+            + (f", pending={swebench['pending']}" if "pending" in swebench else "")
         )
     live = metrics.get("swebench_live_multilang")
     if live:
@@ -107,6 +131,15 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
         "--swebench-report",
         help="Path to SWE-bench harness report JSON (model.run_id.json).",
     )
+    parser.add_argument(
+        "--swebench-eval-dir",
+        help="Harness run_evaluation/<run_id>/<model> directory; used when no summary report exists yet.",
+    )
+    parser.add_argument(
+        "--eval-index",
+        default=str(DEFAULT_INDEX_PATH),
+        help="Incremental per-instance outcome cache for --swebench-eval-dir ('' to disable).",
+    )
     parser.add_argument(
         "--live-results-root",
         help="Root directory containing per-split SWE-bench-Live results.json files.",
@@ -131,14 +164,18 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
 
 def main(argv: Optional[List[str]] = None) -> int:
     args = parse_args(argv)
-    if not args.swebench_report and not args.live_results_root:
-        raise SystemExit("Provide --swebench-report, --live-results-root, or both.")
+    if not args.swebench_report and not args.swebench_eval_dir and not args.live_results_root:
+        raise SystemExit("Provide --swebench-report (or --swebench-eval-dir), --live-results-root, or both.")
 
     payload: Dict[str, Any] = {}
     if args.model:
         payload["model"] = args.model
     if args.swebench_report:
         payload["swebench_multilingual"] = calculate_swebench_metrics(args.swebench_report)
+    elif args.swebench_eval_dir:
+        index = EvalIndex(args.eval_index)
+        payload["swebench_multilingual"] = calculate_eval_dir_metrics(args.swebench_eval_dir, index)
+        index.save()
     if args.live_results_root:
         splits = parse_csv_list(args.live_splits) or DEFAULT_LIVE_SPLITS
         payload["swebench_live_multilang"] = calculate_live_metrics(args.live_results_root, splits)
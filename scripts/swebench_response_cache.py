@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Content-addressed on-disk cache of raw chat completions for prediction generation."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def cache_key(
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    max_tokens: int,
+    n: int = 1,
+    stream: bool = False,
+) -> str:
+    parts: List[Any] = [model, system_prompt, user_prompt, float(temperature), int(max_tokens)]
+    if n != 1:
+        # Appended only for best-of-n so single-sample keys stay valid across upgrades.
+        parts.append(int(n))
+    if stream:
+        # Streamed completions may stop once the diff is complete; keep them apart from full ones.
+        parts.append("stream")
+    material = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Raw completions stored as ``<root>/<key[:2]>/<key>.json`` with size-bounded LRU eviction.
+
+    Recency is the file mtime, refreshed on every hit. When the total size passes
+    ``max_bytes``, the least recently used entries are deleted.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _entries(self) -> List[Tuple[float, Path, int]]:
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def put(self, key: str, completion: Dict[str, Any]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(completion, ensure_ascii=False).encode("utf-8")
+        tmp_path = path.with_suffix(f".tmp.{os.getpid()}.{threading.get_ident()}")
+        tmp_path.write_bytes(data)
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+            self.total_bytes += len(data) - previous
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        self.total_bytes = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            self.total_bytes -= size
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Host statistics read straight from /proc, for status reports and the metrics daemon.
+
+Replaces ``free``, ``uptime``, ``mpstat`` and ``ps aux``: memory and swap from
+``/proc/meminfo``, CPU utilisation from the delta between two ``/proc/stat`` samples,
+load from ``/proc/loadavg``, PSI from ``/proc/pressure/*`` and processes from
+``/proc/<pid>/cmdline``. ``nvidia-smi`` is optional and its answer is cached on disk.
+
+The CPU delta uses the sample left by the previous call (in ``CPU_SAMPLE_PATH``) when it is
+recent, so a report does not block; otherwise it takes a short fresh interval.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = REPO_ROOT / "work" / "swebench" / "cache"
+CPU_SAMPLE_PATH = CACHE_DIR / "cpu-sample.json"
+GPU_CACHE_PATH = CACHE_DIR / "gpu-stats.json"
+
+CPU_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+# A previous /proc/stat sample is reused for the delta if it is between these ages (seconds).
+CPU_SAMPLE_MIN_AGE = 0.05
+CPU_SAMPLE_MAX_AGE = 60.0
+GPU_QUERY = "name,utilization.gpu,utilization.memory,memory.total,memory.used"
+
+
+def read_meminfo(proc: str = "/proc") -> Dict[str, int]:
+    """``/proc/meminfo`` values in bytes."""
+    values: Dict[str, int] = {}
+    with open(os.path.join(proc, "meminfo"), encoding="utf-8") as handle:
+        for line in handle:
+            key, _, rest = line.partition(":")
+            parts = rest.split()
+            if parts and parts[0].isdigit():
+                values[key] = int(parts[0]) * (1024 if parts[1:] == ["kB"] else 1)
+    return values
+
+
+def memory_stats(proc: str = "/proc") -> Dict[str, int]:
+    info = read_meminfo(proc)
+    total = info.get("MemTotal", 0)
+    available = info.get("MemAvailable", info.get("MemFree", 0))
+    swap_total = info.get("SwapTotal", 0)
+    return {
+        "mem_total": total,
+        "mem_used": total - available,
+        "mem_available": available,
+        "swap_total": swap_total,
+        "swap_used": swap_total - info.get("SwapFree", 0),
+    }
+
+
+def read_cpu_times(proc: str = "/proc") -> List[int]:
+    """Aggregate jiffies from the ``cpu`` line of ``/proc/stat`` in ``CPU_FIELDS`` order."""
+    with open(os.path.join(proc, "stat"), encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith("cpu "):
+                values = [int(value) for value in line.split()[1:]]
+                return (values + [0] * len(CPU_FIELDS))[: len(CPU_FIELDS)]
+    raise ValueError("no aggregate cpu line in /proc/stat")
+
+
+def cpu_usage(previous: List[int], current: List[int]) -> Dict[str, float]:
+    """Percentages like mpstat's ``all`` row: user (without nice), system, iowait, idle."""
+    delta = dict(zip(CPU_FIELDS, (max(0, cur - prev) for prev, cur in zip(previous, current))))
+    total = sum(delta.values())
+    if not total:
+        return {"user": 0.0, "system": 0.0, "iowait": 0.0, "idle": 100.0}
+    return {
+        "user": delta["user"] / total * 100.0,
+        "system": delta["system"] / total * 100.0,
+        "iowait": delta["iowait"] / total * 100.0,
+        "idle": delta["idle"] / total * 100.0,
+    }
+
+
+def cpu_stats(
+    proc: str = "/proc", sample_path: Optional[Path] = CPU_SAMPLE_PATH, interval: float = 0.05
+) -> Dict[str, float]:
+    """CPU utilisation since the previous recent sample, or over ``interval`` seconds."""
+    now = time.time()
+    previous: Optional[List[int]] = None
+    if sample_path is not None and sample_path.exists():
+        try:
+            saved = json.loads(sample_path.read_text(encoding="utf-8"))
+            if CPU_SAMPLE_MIN_AGE <= now - saved["time"] <= CPU_SAMPLE_MAX_AGE:
+                previous = saved["times"]
+        except (OSError, ValueError, KeyError):
+            previous = None
+    if previous is None:
+        previous = read_cpu_times(proc)
+        time.sleep(interval)
+        now = time.time()
+    current = read_cpu_times(proc)
+    if sample_path is not None:
+        try:
+            sample_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = sample_path.with_name(f"{sample_path.name}.tmp.{os.getpid()}")
+            tmp_path.write_text(json.dumps({"time": now, "times": current}), encoding="utf-8")
+            os.replace(tmp_path, sample_path)
+        except OSError:
+            pass
+    return cpu_usage(previous, current)
+
+
+def load_average(proc: str = "/proc") -> Tuple[float, float, float]:
+    with open(os.path.join(proc, "loadavg"), encoding="utf-8") as handle:
+        one, five, fifteen = handle.read().split()[:3]
+    return float(one), float(five), float(fifteen)
+
+
+def pressure(proc: str = "/proc") -> Dict[str, Dict[str, float]]:
+    """PSI ``avg10`` per resource: ``{"cpu": {"some": ...}, "memory": {"some", "full"}, ...}``.
+
+    Empty on kernels without PSI.
+    """
+    stats: Dict[str, Dict[str, float]] = {}
+    for resource in ("cpu", "memory", "io"):
+        try:
+            with open(os.path.join(proc, "pressure", resource), encoding="utf-8") as handle:
+                lines = handle.read().splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            kind, *fields = line.split()
+            values = dict(field.split("=", 1) for field in fields)
+            if "avg10" in values:
+                stats.setdefault(resource, {})[kind] = float(values["avg10"])
+    return stats
+
+
+def process_cmdlines(proc: str = "/proc") -> List[Tuple[int, str]]:
+    """``(pid, command line)`` for every readable process; kernel threads are skipped."""
+    processes: List[Tuple[int, str]] = []
+    for name in os.listdir(proc):
+        if not name.isdigit():
+            continue
+        try:
+            with open(os.path.join(proc, name, "cmdline"), "rb") as handle:
+                raw = handle.read()
+        except OSError:
+            continue
+        if raw:
+            processes.append((int(name), raw.rstrip(b"\0").replace(b"\0", b" ").decode(errors="replace")))
+    return sorted(processes)
+
+
+def gpu_stats(cache_path: Optional[Path] = GPU_CACHE_PATH, ttl: float = 30.0) -> Optional[List[Dict[str, str]]]:
+    """One ``nvidia-smi`` query per ``ttl`` seconds (shared across processes through ``cache_path``).
+
+    Returns None when ``nvidia-smi`` is not installed or fails.
+    """
+    if cache_path is not None and cache_path.exists():
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+            if time.time() - cached["time"] <= ttl:
+                return cached["gpus"]
+        except (OSError, ValueError, KeyError):
+            pass
+    if shutil.which("nvidia-smi") is None:
+        return None
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", f"--query-gpu={GPU_QUERY}", "--format=csv,noheader,nounits"],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    keys = GPU_QUERY.split(",")
+    gpus = [
+        dict(zip(keys, (value.strip() for value in row)))
+        for row in csv.reader(result.stdout.splitlines())
+        if row
+    ]
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(json.dumps({"time": time.time(), "gpus": gpus}), encoding="utf-8")
+        except OSError:
+            pass
+    return gpus
+
+
+def system_stats(
+    proc: str = "/proc",
+    gpu: bool = True,
+    gpu_ttl: float = 30.0,
+    sample_path: Optional[Path] = CPU_SAMPLE_PATH,
+    cache_path: Optional[Path] = GPU_CACHE_PATH,
+) -> Dict[str, Any]:
+    """All of the above; ``sample_path``/``cache_path`` of None keep nothing on disk."""
+    return {
+        "memory": memory_stats(proc),
+        "cpu": cpu_stats(proc, sample_path),
+        "load": load_average(proc),
+        "pressure": pressure(proc),
+        "gpus": gpu_stats(cache_path, ttl=gpu_ttl) if gpu else None,
+    }
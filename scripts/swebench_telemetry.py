@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Per-request latency/token telemetry and end-of-run summaries for prediction generation."""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+# Results that never reached the server; kept in the sidecar but out of latency stats.
+OFFLINE_FINISH_REASONS = ("admission_rejected", "dry_run")
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile; None for an empty sequence."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def distribution(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "mean": None}
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p90": round(percentile(values, 90), 4),
+        "p99": round(percentile(values, 99), 4),
+        "mean": round(sum(values) / len(values), 4),
+    }
+
+
+def request_record(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a generation result into one metrics sidecar line."""
+    usage = result.get("usage") or {}
+    completion_tokens = usage.get("completion_tokens")
+    latency = result.get("latency")
+    ttft = result.get("ttft")
+    decode_time = (latency - ttft) if (latency is not None and ttft is not None) else latency
+    decode_tps = None
+    if completion_tokens and decode_time and decode_time > 0:
+        decode_tps = round(completion_tokens / decode_time, 3)
+    return {
+        "instance_id": result["instance_id"],
+        "queue_time": _round(result.get("queue_time")),
+        "ttft": _round(ttft),
+        "latency": _round(latency),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": completion_tokens,
+        "cached_tokens": result.get("cached_tokens"),
+        "decode_tps": decode_tps,
+        "finish_reason": result.get("finish_reason"),
+        "truncated_early": result.get("truncated_early"),
+        "cache_hit": bool(result.get("cache_hit")),
+        "endpoint": result.get("endpoint"),
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+class RunTelemetry:
+    """Write one metrics line per request and summarize the run.
+
+    Records go to ``path`` (JSONL, appended so resumed runs accumulate). Summary stats
+    cover requests served by vLLM in this run; response-cache hits and requests that
+    never left the client are counted separately.
+    """
+
+    def __init__(self, path: str = "") -> None:
+        self.path = path
+        self.started = time.monotonic()
+        self.records: List[Dict[str, Any]] = []
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def add(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        record = request_record(result)
+        self.records.append(record)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+    def summary(self, endpoint_stats: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, Any]:
+        """Run totals; ``endpoint_stats`` (``EndpointBalancer.stats()``) adds failures and ejections."""
+        served = [
+            r
+            for r in self.records
+            if not r["cache_hit"] and r["finish_reason"] not in OFFLINE_FINISH_REASONS
+        ]
+        wall_time = time.monotonic() - self.started
+        prompt_tokens = sum(r["prompt_tokens"] or 0 for r in served)
+        completion_tokens = sum(r["completion_tokens"] or 0 for r in served)
+        cached = [r["cached_tokens"] for r in served if r["cached_tokens"] is not None]
+        finish_reasons: Dict[str, int] = {}
+        by_endpoint: Dict[str, List[Dict[str, Any]]] = {}
+        for r in served:
+            key = r["finish_reason"] or "unknown"
+            finish_reasons[key] = finish_reasons.get(key, 0) + 1
+            if r.get("endpoint"):
+                by_endpoint.setdefault(r["endpoint"], []).append(r)
+        endpoints = {}
+        for url, rows in by_endpoint.items():
+            tokens = sum(r["completion_tokens"] or 0 for r in rows)
+            endpoints[url] = {
+                "requests": len(rows),
+                "completion_tokens": tokens,
+                "completion_tokens_per_s": round(tokens / wall_time, 3) if wall_time > 0 else None,
+                "latency_p50": distribution([r["latency"] for r in rows if r["latency"] is not None])["p50"],
+            }
+        for url, stats in (endpoint_stats or {}).items():
+            entry = endpoints.setdefault(
+                url, {"requests": 0, "completion_tokens": 0, "completion_tokens_per_s": None, "latency_p50": None}
+            )
+            entry["failures"] = stats["failures"]
+            entry["ejections"] = stats["ejections"]
+        return {
+            "requests": len(served),
+            "cache_hits": sum(1 for r in self.records if r["cache_hit"]),
+            "skipped": sum(1 for r in self.records if r["finish_reason"] in OFFLINE_FINISH_REASONS),
+            "wall_time": round(wall_time, 3),
+            "latency": distribution([r["latency"] for r in served if r["latency"] is not None]),
+            "ttft": distribution([r["ttft"] for r in served if r["ttft"] is not None]),
+            "queue_time": distribution([r["queue_time"] for r in served if r["queue_time"] is not None]),
+            "decode_tps": distribution([r["decode_tps"] for r in served if r["decode_tps"] is not None]),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": sum(cached) if cached else None,
+            "finish_reasons": finish_reasons,
+            "throughput": {
+                "requests_per_s": round(len(served) / wall_time, 4) if wall_time > 0 else None,
+                "completion_tokens_per_s": round(completion_tokens / wall_time, 3) if wall_time > 0 else None,
+            },
+            "endpoints": endpoints,
+        }
+
+    def render_summary(self, summary: Optional[Dict[str, Any]] = None) -> str:
+        summary = summary or self.summary()
+        latency = summary["latency"]
+        lines = [
+            f"Requests: {summary['requests']} served, {summary['cache_hits']} cache hits, "
+            f"{summary['skipped']} skipped in {summary['wall_time']:.1f}s",
+        ]
+        if latency["p50"] is not None:
+            lines.append(
+                f"Latency: p50={latency['p50']:.2f}s p90={latency['p90']:.2f}s p99={latency['p99']:.2f}s"
+            )
+        if summary["ttft"]["p50"] is not None:
+            ttft = summary["ttft"]
+            lines.append(f"TTFT: p50={ttft['p50']:.2f}s p90={ttft['p90']:.2f}s p99={ttft['p99']:.2f}s")
+        throughput = summary["throughput"]["completion_tokens_per_s"]
+        usage = (
+            f"Tokens: {summary['prompt_tokens']} prompt, {summary['completion_tokens']} completion"
+        )
+        if throughput is not None:
+            usage += f" ({throughput:.1f} completion tokens/s aggregate)"
+        if summary["cached_tokens"] is not None:
+            share = (
+                summary["cached_tokens"] / summary["prompt_tokens"] * 100.0 if summary["prompt_tokens"] else 0.0
+            )
+            usage += f", {summary['cached_tokens']} prompt tokens from prefix cache ({share:.1f}%)"
+        lines.append(usage)
+        if len(summary["endpoints"]) > 1:
+            for url, stats in summary["endpoints"].items():
+                rate = stats["completion_tokens_per_s"] or 0.0
+                line = (
+                    f"- {url}: {stats['requests']} requests, {rate:.1f} completion tokens/s, "
+                    f"p50 latency {stats['latency_p50'] or 0.0:.2f}s"
+                )
+                if "failures" in stats:
+                    line += f", {stats['failures']} failures, {stats['ejections']} ejections"
+                lines.append(line)
+        return "\n".join(lines)
+
+    def write_summary(
+        self, path: str, endpoint_stats: Optional[Dict[str, Dict[str, int]]] = None
+    ) -> Dict[str, Any]:
+        summary = self.summary(endpoint_stats)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, indent=2)
+        return summary
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Report which watched files and directories changed, without rescanning everything.
+
+A watched file counts as changed when it is written, replaced, created or deleted; a
+watched directory when any direct child is. On Linux this uses inotify (through ctypes,
+no extra dependency) on the file's parent directory or on the directory itself. Paths
+whose parent does not exist yet, and every path on systems without inotify, are polled by
+comparing stat signatures instead.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def signature(path: str) -> Optional[Tuple]:
+    """Stat signature used by polling; a directory includes its direct children."""
+    try:
+        stat = os.stat(path)
+        if not os.path.isdir(path):
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        children = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    child = entry.stat()
+                except OSError:
+                    continue
+                children.append((entry.name, child.st_mtime_ns, child.st_size))
+        return (stat.st_ino, stat.st_mtime_ns, tuple(sorted(children)))
+    except OSError:
+        return None
+
+
+def _inotify_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1  # noqa: B018 - probe for the symbol
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class PathWatcher:
+    """``add`` paths, then call ``changes`` to wait for and collect changed ones."""
+
+    def __init__(self, paths: Iterable[str] = (), use_inotify: bool = True, poll_interval: float = 1.0) -> None:
+        self.poll_interval = poll_interval
+        self._libc = _inotify_libc() if use_inotify else None
+        self._fd: Optional[int] = None
+        if self._libc is not None:
+            fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+        self._paths: Set[str] = set()
+        self._wd_dirs: Dict[int, str] = {}
+        self._dir_wds: Dict[str, int] = {}
+        self._polled: Dict[str, Optional[Tuple]] = {}
+        for path in paths:
+            self.add(path)
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "PathWatcher":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def add(self, path: str) -> None:
+        path = os.path.abspath(path)
+        if path in self._paths:
+            return
+        self._paths.add(path)
+        if not self._watch(path):
+            self._polled[path] = signature(path)
+
+    def discard(self, path: str) -> None:
+        path = os.path.abspath(path)
+        self._paths.discard(path)
+        self._polled.pop(path, None)
+
+    def _watch_dir(self, directory: str) -> bool:
+        if self._fd is None:
+            return False
+        if directory in self._dir_wds:
+            return True
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            return False
+        self._wd_dirs[wd] = directory
+        self._dir_wds[directory] = wd
+        return True
+
+    def _watch(self, path: str) -> bool:
+        if os.path.isdir(path) and not self._watch_dir(path):
+            return False
+        parent = os.path.dirname(path)
+        # The parent watch also reports a directory being created, removed or replaced.
+        return os.path.isdir(parent) and self._watch_dir(parent)
+
+    def _read_events(self) -> Set[str]:
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            if not data:
+                return changed
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size : offset + EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += EVENT_HEADER.size + length
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(self._paths)
+                    continue
+                directory = self._wd_dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    # The directory is gone; its paths fall back to polling until it returns.
+                    del self._wd_dirs[wd]
+                    self._dir_wds.pop(directory, None)
+                    for path in self._paths:
+                        if path == directory or os.path.dirname(path) == directory:
+                            self._polled.setdefault(path, None)
+                    changed.update(path for path in self._paths if path == directory)
+                    continue
+                if directory in self._paths:
+                    changed.add(directory)
+                if name:
+                    child = os.path.join(directory, os.fsdecode(name))
+                    if child in self._paths:
+                        changed.add(child)
+                        if mask & (IN_CREATE | IN_MOVED_TO) and os.path.isdir(child):
+                            self._watch_dir(child)
+
+    def _poll(self) -> Set[str]:
+        changed: Set[str] = set()
+        for path, previous in list(self._polled.items()):
+            current = signature(path)
+            if current != previous:
+                changed.add(path)
+            if path in self._paths and self._watch(path):
+                del self._polled[path]
+            else:
+                self._polled[path] = current
+        return changed
+
+    def changes(self, timeout: float) -> Set[str]:
+        """Block until something changes or ``timeout`` seconds pass; return changed paths."""
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = self._poll()
+            remaining = max(0.0, deadline - time.monotonic())
+            step = min(remaining, self.poll_interval) if self._polled or self._fd is None else remaining
+            if self._fd is not None:
+                ready, _, _ = select.select([self._fd], [], [], 0 if changed else step)
+                if ready:
+                    changed |= self._read_events()
+            elif not changed:
+                time.sleep(step)
+            if changed or time.monotonic() >= deadline:
+                return changed & self._paths
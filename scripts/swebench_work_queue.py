@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""Lease-based work queue in SQLite, shared by generation or agent workers on several hosts.
+
+Each instance_id is a task. Workers claim tasks in dataset order and hold a lease that
+they renew with heartbeats. A task whose lease runs out (the worker stalled or died) can
+be claimed again by any worker, up to ``max_attempts`` claims; after that it is marked
+``failed``. Finished tasks keep the record the worker produced, so ``export`` can write
+the predictions file the harness reads without scanning per-worker outputs.
+
+Put the database on a filesystem with working POSIX locks. SQLite over NFS is only safe
+with the default rollback journal, which is what this module uses (no WAL).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.swebench_datasets import load_dataset_live, load_dataset_swebench  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    instance_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (state, position);
+"""
+STATES = ("pending", "leased", "done", "failed")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """Tasks keyed by instance_id; every call opens its own connection, so one queue
+    object can be shared by threads and the database by processes."""
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = 600.0,
+        max_attempts: int = 3,
+        busy_timeout: float = 30.0,
+    ) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.busy_timeout = busy_timeout
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Serialized read-modify-write transaction (``BEGIN IMMEDIATE``)."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def add(self, instance_ids: Iterable[str]) -> int:
+        """Enqueue instance_ids not already known; safe to repeat from every worker."""
+        with self._write() as conn:
+            start = conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM tasks").fetchone()[0]
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (instance_id, position, updated) VALUES (?, ?, ?)",
+                ((instance_id, start + pos, time.time()) for pos, instance_id in enumerate(instance_ids)),
+            )
+            return conn.total_changes - before
+
+    def claim(self, worker: str, limit: int = 1, exclude: Iterable[str] = ()) -> List[str]:
+        """Lease up to ``limit`` pending or expired tasks to ``worker``, in dataset order.
+
+        Tasks in ``exclude`` (ones this worker cannot run) are left for other workers.
+        """
+        now = time.time()
+        skip = list(exclude)
+        skip_clause = f"AND instance_id NOT IN ({','.join('?' for _ in skip)}) " if skip else ""
+        with self._write() as conn:
+            conn.execute(
+                "UPDATE tasks SET state = 'failed', worker = NULL, lease_expires = NULL, updated = ?, "
+                "error = COALESCE(error, 'lease expired') "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            rows = conn.execute(
+                "SELECT instance_id FROM tasks "
+                "WHERE (state = 'pending' OR (state = 'leased' AND lease_expires < ?)) "
+                f"{skip_clause}ORDER BY position LIMIT ?",
+                (now, *skip, limit),
+            ).fetchall()
+            claimed = [row[0] for row in rows]
+            conn.executemany(
+                "UPDATE tasks SET state = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE instance_id = ?",
+                ((worker, now + self.lease_seconds, now, instance_id) for instance_id in claimed),
+            )
+        return claimed
+
+    def heartbeat(self, worker: str, instance_ids: Iterable[str]) -> Set[str]:
+        """Extend the leases ``worker`` still holds; returns the instance_ids it holds."""
+        ids = list(instance_ids)
+        if not ids:
+            return set()
+        now = time.time()
+        held: Set[str] = set()
+        with self._write() as conn:
+            for instance_id in ids:
+                cursor = conn.execute(
+                    "UPDATE tasks SET lease_expires = ?, updated = ? "
+                    "WHERE instance_id = ? AND state = 'leased' AND worker = ?",
+                    (now + self.lease_seconds, now, instance_id, worker),
+                )
+                if cursor.rowcount:
+                    held.add(instance_id)
+        return held
+
+    def complete(self, worker: str, instance_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark a task done with its output record (None stores no record).
+
+        Accepted while ``worker`` holds the lease, even if it has expired but nobody
+        re-claimed it. Returns False if another worker owns or finished the task.
+        """
+        with self._write() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET state = 'done', lease_expires = NULL, result = ?, error = NULL, "
+                "updated = ? WHERE instance_id = ? AND state = 'leased' AND worker = ?",
+                (
+                    None if result is None else json.dumps(result, ensure_ascii=False),
+                    time.time(),
+                    instance_id,
+                    worker,
+                ),
+            )
+            return bool(cursor.rowcount)
+
+    def release(self, worker: str, instance_id: str, error: str = "", count_attempt: bool = True) -> bool:
+        """Give a leased task back (or fail it once it has used ``max_attempts`` claims).
+
+        With ``count_attempt=False`` the claim is refunded: the task was never tried.
+        """
+        refund = 0 if count_attempt else 1
+        with self._write() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts - ? >= ? THEN 'failed' ELSE 'pending' END, "
+                "attempts = attempts - ?, worker = NULL, lease_expires = NULL, error = ?, updated = ? "
+                "WHERE instance_id = ? AND state = 'leased' AND worker = ?",
+                (refund, self.max_attempts, refund, error or None, time.time(), instance_id, worker),
+            )
+            return bool(cursor.rowcount)
+
+    def requeue(self, states: Sequence[str] = ("failed",)) -> int:
+        """Reset tasks in ``states`` to pending with a fresh attempt budget."""
+        marks = ",".join("?" for _ in states)
+        with self._write() as conn:
+            cursor = conn.execute(
+                f"UPDATE tasks SET state = 'pending', worker = NULL, lease_expires = NULL, attempts = 0, "
+                f"updated = ? WHERE state IN ({marks})",
+                (time.time(), *states),
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Tasks per state; leases past their expiry are reported as ``expired``."""
+        counts = {state: 0 for state in (*STATES, "expired")}
+        now = time.time()
+        with self._connect() as conn:
+            for state, expired, count in conn.execute(
+                "SELECT state, state = 'leased' AND lease_expires < ?, COUNT(*) FROM tasks GROUP BY 1, 2",
+                (now,),
+            ):
+                counts["expired" if expired else state] += count
+        return counts
+
+    def workers(self) -> Dict[str, int]:
+        """Live leases per worker."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT worker, COUNT(*) FROM tasks WHERE state = 'leased' AND lease_expires >= ? "
+                "GROUP BY worker",
+                (time.time(),),
+            ).fetchall()
+        return {worker: count for worker, count in rows}
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Finished tasks with a stored record, in dataset order: ``{"instance_id", "result"}``."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT instance_id, result FROM tasks WHERE state = 'done' AND result IS NOT NULL "
+                "ORDER BY position"
+            ).fetchall()
+        return [{"instance_id": instance_id, "result": json.loads(result)} for instance_id, result in rows]
+
+
+class LeaseKeeper:
+    """Background heartbeats for the leases one worker holds.
+
+    Runs every ``lease_seconds / 3`` so one missed beat does not lose a lease. On exit
+    any lease still held (work that raised or was interrupted) is released. Tasks handed
+    back with ``skip`` are not claimed by this worker again.
+    """
+
+    def __init__(self, queue: WorkQueue, worker: str, interval: Optional[float] = None) -> None:
+        self.queue = queue
+        self.worker = worker
+        self.interval = interval if interval is not None else max(0.05, queue.lease_seconds / 3)
+        self.held: Set[str] = set()
+        self.skipped: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+
+    def __enter__(self) -> "LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        for instance_id in self.snapshot():
+            self.queue.release(self.worker, instance_id, "worker exited")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            ids = self.snapshot()
+            try:
+                self.queue.heartbeat(self.worker, ids)
+            except sqlite3.Error as exc:
+                print(f"Queue heartbeat failed: {exc}", file=sys.stderr)
+
+    def snapshot(self) -> List[str]:
+        with self._lock:
+            return list(self.held)
+
+    def hold(self, instance_id: str) -> None:
+        with self._lock:
+            self.held.add(instance_id)
+
+    def drop(self, instance_id: str) -> None:
+        with self._lock:
+            self.held.discard(instance_id)
+
+    def skip(self, instance_id: str, reason: str) -> None:
+        """Hand a task back for other workers without using up one of its attempts."""
+        with self._lock:
+            self.held.discard(instance_id)
+            self.skipped.add(instance_id)
+        self.queue.release(self.worker, instance_id, reason, count_attempt=False)
+
+    def exclude(self) -> List[str]:
+        with self._lock:
+            return list(self.skipped)
+
+
+def claim_instances(
+    queue: WorkQueue,
+    keeper: LeaseKeeper,
+    lookup: Dict[str, Dict[str, Any]],
+) -> Iterator[Dict[str, Any]]:
+    """Lazily claim one task at a time and yield its dataset row.
+
+    Claiming only when the caller asks for the next instance keeps every idle task
+    available to other workers. Tasks with no row in ``lookup`` (another worker's shard or
+    split) are skipped: handed back without using an attempt and not claimed again here.
+    """
+    while True:
+        claimed = queue.claim(keeper.worker, exclude=keeper.exclude())
+        if not claimed:
+            return
+        instance_id = claimed[0]
+        row = lookup.get(instance_id)
+        if row is None:
+            keeper.skip(instance_id, "instance not in this worker's dataset")
+            continue
+        keeper.hold(instance_id)
+        yield row
+
+
+def dataset_instance_ids(suite: str, split: str, splits: Sequence[str], dataset_cache: str) -> List[str]:
+    if suite == "swebench-multilingual":
+        with load_dataset_swebench(split, ("instance_id",), dataset_cache) as dataset:
+            return [row["instance_id"] for row in dataset]
+    ids: List[str] = []
+    for _, dataset in load_dataset_live(splits, ("instance_id",), dataset_cache):
+        with dataset:
+            ids.extend(row["instance_id"] for row in dataset)
+    return ids
+
+
+def write_export(suite: str, queue: WorkQueue, output: str) -> int:
+    """Write finished results as the harness file: JSONL records, or the Live JSON mapping."""
+    results = queue.results()
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        if suite == "swebench-multilingual":
+            for item in results:
+                handle.write(json.dumps(item["result"], ensure_ascii=False) + "\n")
+        else:
+            mapping = {item["instance_id"]: item["result"] for item in results}
+            json.dump(mapping, handle, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output)
+    return len(results)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Manage the shared SQLite work queue for benchmark workers.")
+    parser.add_argument("--db", required=True, help="Queue database path (on the shared directory).")
+    parser.add_argument("--lease-seconds", type=float, default=600.0, help="Lease length before re-claim.")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Claims per task before it fails.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    init = sub.add_parser("init", help="Enqueue every instance of a suite (idempotent).")
+    init.add_argument("--suite", choices=["swebench-multilingual", "swebench-live-multilang"], required=True)
+    init.add_argument("--split", default="test", help="Dataset split for SWE-bench Multilingual.")
+    init.add_argument("--splits", default="", help="Comma-separated SWE-bench-Live splits (default: all).")
+    init.add_argument("--dataset-cache", default="", help="Dataset snapshot directory.")
+
+    sub.add_parser("status", help="Print task counts and live leases per worker as JSON.")
+
+    claim = sub.add_parser("claim", help="Claim tasks; prints one instance_id per line.")
+    claim.add_argument("--worker", default=default_worker_id())
+    claim.add_argument("--limit", type=int, default=1)
+
+    for name, help_text in (
+        ("heartbeat", "Extend leases held by a worker."),
+        ("complete", "Mark tasks done."),
+        ("release", "Return tasks to the queue."),
+    ):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument("--worker", required=True)
+        command.add_argument("instance_ids", nargs="+")
+        if name == "complete":
+            command.add_argument("--result", default="", help="JSON record to store (same for all ids).")
+        if name == "release":
+            command.add_argument("--error", default="")
+
+    requeue = sub.add_parser("requeue", help="Reset failed (and optionally leased) tasks to pending.")
+    requeue.add_argument("--include-leased", action="store_true", help="Also reset live leases.")
+
+    export = sub.add_parser("export", help="Write finished results as the harness predictions file.")
+    export.add_argument("--suite", choices=["swebench-multilingual", "swebench-live-multilang"], required=True)
+    export.add_argument("--output", required=True)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    queue = WorkQueue(args.db, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    if args.command == "init":
+        splits = [s.strip() for s in args.splits.split(",") if s.strip()]
+        added = queue.add(dataset_instance_ids(args.suite, args.split, splits, args.dataset_cache))
+        print(f"Added {added} tasks")
+    elif args.command == "status":
+        print(json.dumps({"tasks": queue.counts(), "workers": queue.workers()}, indent=2))
+    elif args.command == "claim":
+        claimed = queue.claim(args.worker, args.limit)
+        for instance_id in claimed:
+            print(instance_id)
+        return 0 if claimed else 1
+    elif args.command == "heartbeat":
+        held = queue.heartbeat(args.worker, args.instance_ids)
+        return 0 if held == set(args.instance_ids) else 1
+    elif args.command == "complete":
+        result = json.loads(args.result) if args.result else None
+        ok = [queue.complete(args.worker, instance_id, result) for instance_id in args.instance_ids]
+        return 0 if all(ok) else 1
+    elif args.command == "release":
+        ok = [queue.release(args.worker, instance_id, args.error) for instance_id in args.instance_ids]
+        return 0 if all(ok) else 1
+    elif args.command == "requeue":
+        states = ("failed", "leased") if args.include_leased else ("failed",)
+        print(f"Requeued {queue.requeue(states)} tasks")
+    elif args.command == "export":
+        print(f"Exported {write_export(args.suite, queue, args.output)} predictions to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from scripts.agentic import incremental_eval
+
+# Stand-in for the SWE-bench harness: records each batch and CLI run, writes reports.
+FAKE_HARNESS = """
+import argparse, json, os, pathlib
+
+
+def record(kind, ids):
+    with open("batches.log", "a") as handle:
+        handle.write(json.dumps([kind, os.getpid(), ids]) + "\\n")
+
+
+def run_instances(predictions, instances, cache_level, clean, force_rebuild, max_workers, run_id, timeout, namespace):
+    record("batch", [instance["instance_id"] for instance in instances])
+    for instance in instances:
+        inst = pathlib.Path("logs/run_evaluation", run_id, "model", instance["instance_id"])
+        inst.mkdir(parents=True, exist_ok=True)
+        (inst / "report.json").write_text("{}")
+
+
+def main(predictions_path, report_dir):
+    ids = [json.loads(line)["instance_id"] for line in open(predictions_path)]
+    record("cli", ids)
+    pathlib.Path(report_dir).mkdir(parents=True, exist_ok=True)
+    (pathlib.Path(report_dir) / "summary.json").write_text(json.dumps(ids))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    for flag in ("--dataset_name", "--split", "--predictions_path", "--max_workers", "--run_id", "--report_dir"):
+        parser.add_argument(flag)
+    args = parser.parse_args()
+    main(args.predictions_path, args.report_dir)
+"""
+
+FAKE_UTILS = """
+def load_swebench_dataset(name, split):
+    return [{"instance_id": instance_id} for instance_id in "abcde"]
+"""
+
+
+class TestIncrementalEval(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self.tmpdir.name)
+        self.swebench_dir = root / "SWE-bench"
+        harness = self.swebench_dir / "swebench" / "harness"
+        harness.mkdir(parents=True)
+        for package in (harness.parent, harness):
+            (package / "__init__.py").write_text("")
+        (harness / "run_evaluation.py").write_text(FAKE_HARNESS)
+        (harness / "utils.py").write_text(FAKE_UTILS)
+        self.preds = root / "logs" / "qwen3" / "preds.json"
+        self.preds.parent.mkdir(parents=True)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_preds(self, ids):
+        preds = {instance_id: {"instance_id": instance_id, "model_patch": "diff"} for instance_id in ids}
+        self.preds.write_text(json.dumps(preds))
+
+    def batches(self):
+        log = self.swebench_dir / "batches.log"
+        return [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+
+    def args(self, *extra):
+        return incremental_eval.parse_args(
+            [
+                "--model", "qwen3",
+                "--preds", str(self.preds),
+                "--total", "3",
+                "--swebench-dir", str(self.swebench_dir),
+                "--python", sys.executable,
+                "--poll",
+                "--poll-interval", "0.05",
+                "--idle-deadline", "30",
+                *extra,
+            ]
+        )
+
+    def test_dispatches_only_new_predictions_then_runs_full_pass(self):
+        done = self.swebench_dir / "logs" / "run_evaluation" / "qwen3-swebench-multilingual" / "model" / "a"
+        done.mkdir(parents=True)
+        (done / "report.json").write_text("{}")
+        self.write_preds(["a", "b"])
+
+        result = {}
+        thread = threading.Thread(target=lambda: result.setdefault("rc", incremental_eval.run(self.args())))
+        thread.start()
+        for _ in range(200):
+            if self.batches():
+                break
+            time.sleep(0.05)
+        self.write_preds(["a", "b", "c"])
+        thread.join(timeout=30)
+
+        self.assertEqual(result.get("rc"), 0)
+        batches = self.batches()
+        self.assertEqual(
+            [(kind, ids) for kind, _, ids in batches],
+            [("batch", ["b"]), ("batch", ["c"]), ("cli", ["a", "b", "c"])],
+        )
+        self.assertEqual(batches[0][1], batches[1][1], "batches share one harness worker")
+        self.assertEqual(json.loads((self.preds.parent / "eval" / "summary.json").read_text()), ["a", "b", "c"])
+
+    def test_once_runs_a_single_full_pass(self):
+        self.write_preds(["a"])
+        self.assertEqual(incremental_eval.run(self.args("--once")), 0)
+        self.assertEqual([(kind, ids) for kind, _, ids in self.batches()], [("cli", ["a"])])
+
+    def test_stops_when_the_agent_exits_or_goes_idle(self):
+        self.write_preds(["a"])
+        with patch.object(incremental_eval, "agent_running", side_effect=[True, True, False]):
+            self.assertEqual(incremental_eval.run(self.args("--total", "5")), 0)
+        self.assertEqual([kind for kind, _, _ in self.batches()], ["batch", "cli"])
+
+        with patch.object(incremental_eval, "agent_running", return_value=False):
+            self.assertEqual(incremental_eval.run(self.args("--total", "5", "--idle-deadline", "0.3")), 0)
+        self.assertEqual([kind for kind, _, _ in self.batches()][2:], ["cli"])
+
+    def test_missing_harness_falls_back_to_the_final_pass(self):
+        self.write_preds(["a"])
+        args = self.args("--total", "1")
+        args.swebench_dir = self.preds.parent
+        self.assertNotEqual(incremental_eval.run(args), 0)
+        self.assertEqual(self.batches(), [])
+
+    def test_half_written_preds_keep_the_previous_snapshot(self):
+        self.write_preds(["a"])
+        delta = incremental_eval.PredsDelta(self.preds, {"a"})
+        self.assertEqual(delta.refresh(), [])
+        self.preds.write_text('{"a": {}, "b"')
+        self.assertEqual(delta.refresh(), [])
+        self.write_preds(["a", "b"])
+        self.assertEqual(delta.refresh(), ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
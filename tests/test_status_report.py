@@ -0,0 +1,175 @@
+import json
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+from unittest.mock import patch
+
+from scripts import swebench_eval_index as eval_index
+from scripts.agentic import status_report
+from scripts.swebench_eval_index import EvalIndex
+from scripts.swebench_watch import PathWatcher
+
+
+class TestStatusTracker(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self.tmpdir.name)
+        self.patches = [
+            patch.object(status_report, "LOGS", root / "logs"),
+            patch.object(status_report, "LOGS_ALT", root / "work" / "logs"),
+            patch.object(status_report, "WORK", root / "work"),
+        ]
+        for item in self.patches:
+            item.start()
+        self.preds = root / "logs" / "swebench-multilingual" / "qwen3" / "preds.json"
+        self.model_dir = status_report._run_root("qwen3") / "Qwen__Qwen3"
+        self.tracker = status_report.StatusTracker(EvalIndex(), containers=False)
+        self.tracker.refresh_all()
+
+    def tearDown(self):
+        for item in self.patches:
+            item.stop()
+        self.tmpdir.cleanup()
+
+    def write_report(self, instance_id, resolved):
+        inst_dir = self.model_dir / instance_id
+        inst_dir.mkdir(parents=True, exist_ok=True)
+        (inst_dir / "report.json").write_text(json.dumps({instance_id: {"resolved": resolved}}))
+
+    def test_changes_update_only_affected_state(self):
+        watcher = PathWatcher(self.tracker.watch_paths(), poll_interval=0.05)
+        self.preds.parent.mkdir(parents=True)
+        self.preds.write_text(json.dumps({"a": {}, "b": {}}))
+        self.write_report("a", True)
+        changed = set()
+        for _ in range(20):
+            changed |= watcher.changes(0.5)
+            self.tracker.apply(changed)
+            for path in self.tracker.watch_paths():
+                watcher.add(path)
+            if self.tracker.outcomes.get(("multilingual", "qwen3", "test")):
+                break
+        watcher.close()
+        self.assertIn(str(self.preds), changed)
+
+        snapshot = self.tracker.snapshot()
+        row = next(r for r in snapshot["preds"] if r["model"] == "qwen3" and r["suite"] == "multilingual")
+        self.assertEqual((row["count"], row["total"]), (2, 300))
+        qwen = next(r for r in snapshot["eval"] if r["model"] == "qwen3" and r["suite"] == "multilingual")
+        self.assertEqual((qwen["reports"], qwen["resolved"], qwen["resolve_rate"]), (1, 1, 1.0))
+
+        self.write_report("b", False)
+        self.tracker.apply({str(self.model_dir)})
+        self.write_report("b", True)
+        with patch.object(self.tracker.index, "scan", side_effect=AssertionError("full rescan")):
+            self.tracker.apply({str(self.model_dir / "b")})
+        qwen = next(r for r in self.tracker.snapshot()["eval"] if r["model"] == "qwen3" and r["suite"] == "multilingual")
+        self.assertEqual((qwen["reports"], qwen["resolved"]), (2, 2))
+
+    def test_live_split_eval_dirs_are_tracked(self):
+        split_dir = status_report.LOGS / "swebench-live-multilang" / "qwen3" / "go"
+        self.assertIn(str(split_dir), self.tracker.watch_paths())
+        inst_dir = split_dir / "eval" / "g1"
+        inst_dir.mkdir(parents=True)
+        (inst_dir / "report.json").write_text(json.dumps({"g1": {"resolved": True}}))
+        self.tracker.apply({str(split_dir)})
+        self.assertIn(str(inst_dir), self.tracker.watch_paths())
+
+        metrics = status_report.render_metrics(self.tracker.snapshot())
+        self.assertIn('swebench_eval_resolved{suite="live-multilang",model="qwen3",split="go"} 1', metrics)
+        self.assertIn('swebench_eval_resolved{suite="multilingual",model="qwen3",split="test"} 0', metrics)
+
+    def test_metrics_endpoint_serves_prerendered_snapshot(self):
+        self.preds.parent.mkdir(parents=True)
+        self.preds.write_text(json.dumps({"a": {}}))
+        self.tracker.apply({str(self.preds)})
+        published = status_report._Published()
+        published.update(self.tracker.snapshot())
+        server = status_report.serve_status(published, "127.0.0.1:0")
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{base}/metrics") as response:
+                metrics = response.read().decode()
+            with urllib.request.urlopen(f"{base}/status.json") as response:
+                snapshot = json.loads(response.read())
+            with self.assertRaises(urllib.error.HTTPError) as missing:
+                urllib.request.urlopen(f"{base}/other")
+            self.assertEqual(missing.exception.code, 404)
+        finally:
+            server.shutdown()
+        self.assertIn('swebench_preds{suite="multilingual",model="qwen3",split="test"} 1', metrics)
+        self.assertIn("# TYPE swebench_memory_bytes gauge", metrics)
+        self.assertEqual(len(snapshot["eval"]), len(status_report._matrix_cells()))
+        self.assertIn("qwen3", status_report.render_terminal(snapshot))
+
+
+class TestCollectStatus(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.patches = [
+            patch.object(status_report, "LOGS", self.root / "logs"),
+            patch.object(status_report, "LOGS_ALT", self.root / "work" / "logs"),
+            patch.object(status_report, "WORK", self.root / "work"),
+        ]
+        for item in self.patches:
+            item.start()
+
+    def tearDown(self):
+        for item in self.patches:
+            item.stop()
+        self.tmpdir.cleanup()
+
+    def write(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data))
+
+    def test_matrix_covers_every_model_suite_and_split(self):
+        self.write(
+            self.root / "logs" / "swebench-multilingual" / "deepseek" / "preds.json",
+            {"a": {"model_patch": "diff"}, "b": {"model_patch": ""}},
+        )
+        model_dir = status_report._run_root("deepseek") / "deepseek-ai__DeepSeek"
+        self.write(model_dir / "a" / "report.json", {"a": {"resolved": True}})
+        live = self.root / "logs" / "swebench-live-multilang" / "gptoss" / "go"
+        self.write(live / "preds.json", {f"go-{idx}": {} for idx in range(68)})
+        self.write(live / "eval" / "results.json", {"success": 1, "failure": 2, "error": 0})
+        ps_text = (
+            "python mini-extra swebench --config /cfg/mixtral-livesweagent.yaml "
+            '--subset "SWE-bench-Live/MultiLang" --split rust'
+        )
+        self.write(model_dir / "b" / "run_instance.log", "EvaluationError")
+        calls = []
+
+        def classify(paths, workers=0):
+            calls.append((threading.current_thread() is threading.main_thread(), workers, len(paths)))
+            return real_classify(paths, 1)
+
+        real_classify = eval_index.classify_logs
+        with patch.object(status_report, "_ps_text", return_value=ps_text.replace('"', "")), patch.object(
+            eval_index, "classify_logs", side_effect=classify
+        ):
+            report = status_report.collect_status(EvalIndex(), workers=4)
+        # Only the main thread may use the process pool; the one changed log is classified there.
+        self.assertEqual([call for call in calls if call[2]], [(True, 0, 1)])
+        self.assertTrue(all(workers == 1 for main, workers, _ in calls if not main))
+
+        cells = {(c["model"], c["suite"], c["split"]): c for c in report["cells"]}
+        self.assertEqual(len(cells), len(status_report.MODELS) * (1 + len(status_report.LIVE_SPLITS)))
+        deepseek = cells[("deepseek", "multilingual", "test")]
+        self.assertEqual(deepseek["generation"]["count"], 2)
+        self.assertEqual((deepseek["evaluation"]["reports"], deepseek["evaluation"]["resolve_rate"]), (1, 1.0))
+        self.assertEqual(deepseek["outcomes"], {"resolved": 1, "patch_empty": 1})
+        self.assertEqual(deepseek["evaluation"]["errors"], 1)
+        gptoss = cells[("gptoss", "live-multilang", "go")]
+        self.assertEqual(gptoss["generation"]["status"], "done")
+        self.assertEqual(gptoss["evaluation"]["summary_counts"], {"success": 1, "failure": 2, "error": 0})
+        self.assertEqual(cells[("mixtral", "live-multilang", "rust")]["generation"]["status"], "running")
+        self.assertEqual(cells[("mixtral", "live-multilang", "go")]["generation"]["status"], "waiting")
+
+
+if __name__ == "__main__":
+    unittest.main()
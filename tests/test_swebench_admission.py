@@ -0,0 +1,199 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from scripts.swebench_admission import (
+    AdaptiveConcurrency,
+    AdmissionController,
+    AdmissionRejected,
+    TokenEstimator,
+)
+from scripts.swebench_generate_predictions import (
+    RunContext,
+    build_messages,
+    generate_predictions,
+    parse_args,
+    process_instance,
+    schedule_instances,
+)
+from scripts.swebench_http import HTTPStatusError
+
+
+class TestTokenEstimator(unittest.TestCase):
+    def test_heuristic_calibrates_from_reported_usage(self):
+        estimator = TokenEstimator()
+        messages = [{"role": "user", "content": "x" * 700}]
+        first = estimator.estimate(messages)
+        self.assertEqual(first, 200 + 8 + 4)
+        estimator.observe(messages, 100 + 8 + 4)
+        self.assertAlmostEqual(estimator.chars_per_token, 7.0)
+        self.assertEqual(estimator.estimate(messages), 100 + 8 + 4)
+
+    def test_observe_ignores_missing_usage(self):
+        estimator = TokenEstimator()
+        estimator.observe([{"role": "user", "content": "abc"}], None)
+        self.assertEqual(estimator.chars_per_token, 3.5)
+
+
+class TestAdmissionController(unittest.TestCase):
+    def test_plan_clamps_and_rejects(self):
+        controller = AdmissionController(TokenEstimator(), max_model_len=1000, safety_margin=0)
+        self.assertEqual(controller.plan(100, 2048), 900)
+        self.assertEqual(controller.plan(100, 500), 500)
+        with self.assertRaises(AdmissionRejected):
+            controller.plan(1000, 10)
+        self.assertEqual(AdmissionController(TokenEstimator()).plan(10**6, 7), 7)
+
+    def test_acquire_blocks_until_capacity_frees(self):
+        controller = AdmissionController(TokenEstimator(), kv_capacity=100)
+        controller.acquire(80)
+        admitted = threading.Event()
+
+        def second():
+            controller.acquire(50)
+            admitted.set()
+
+        thread = threading.Thread(target=second)
+        thread.start()
+        time.sleep(0.05)
+        self.assertFalse(admitted.is_set())
+        controller.release(80)
+        thread.join(1)
+        self.assertTrue(admitted.is_set())
+        self.assertEqual(controller.in_flight_tokens, 50)
+
+    def test_oversized_request_admitted_when_idle(self):
+        controller = AdmissionController(TokenEstimator(), kv_capacity=10)
+        controller.acquire(50)
+        self.assertEqual(controller.in_flight_tokens, 50)
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    def test_additive_increase_per_window(self):
+        controller = AdaptiveConcurrency(initial=2, maximum=4)
+        for _ in range(2):
+            controller.record_success(1.0)
+        self.assertEqual(controller.limit, 3)
+        for _ in range(3):
+            controller.record_success(1.0)
+        self.assertEqual(controller.limit, 4)
+        for _ in range(10):
+            controller.record_success(1.0)
+        self.assertEqual(controller.limit, 4)
+        self.assertEqual(controller.peak, 4)
+
+    def test_multiplicative_decrease_once_per_window(self):
+        controller = AdaptiveConcurrency(initial=8, maximum=16)
+        controller.record_overload("http_429")
+        self.assertEqual(controller.limit, 4)
+        for _ in range(20):
+            controller.record_overload("http_503")
+        self.assertEqual(controller.limit, 4)
+        # Only completions end the hold: 8 of them (the limit before the decrease).
+        for _ in range(7):
+            controller.record_success(None)
+        self.assertEqual(controller.limit, 5)
+        controller.record_overload("http_503")
+        self.assertEqual(controller.limit, 5)
+        controller.record_success(None)
+        controller.record_overload("timeout")
+        self.assertEqual(controller.limit, 2)
+        self.assertEqual(
+            [entry["reason"] for entry in controller.history], ["start", "http_429", "increase", "timeout"]
+        )
+
+    def test_latency_spike_backs_off(self):
+        controller = AdaptiveConcurrency(initial=8, maximum=16, spike_factor=2.0)
+        controller.record_success(1.0)
+        controller.record_success(5.0)
+        self.assertEqual(controller.limit, 4)
+        self.assertEqual(controller.history[-1]["reason"], "latency_spike")
+
+    def test_history_is_logged(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_path = os.path.join(tmpdir, "out.concurrency.jsonl")
+            controller = AdaptiveConcurrency(initial=1, maximum=2, log_path=log_path)
+            controller.record_success(0.5)
+            with open(log_path, "r", encoding="utf-8") as handle:
+                limits = [json.loads(line)["limit"] for line in handle]
+            self.assertEqual(limits, [1, 2])
+
+
+class TestAdmissionIntegration(unittest.TestCase):
+    def _args(self, *extra):
+        return parse_args(
+            ["--suite", "swebench-multilingual", "--model", "m", "--output", "out.jsonl", *extra]
+        )
+
+    def test_longest_first_schedule(self):
+        instances = [
+            {"instance_id": "short", "problem_statement": "x"},
+            {"instance_id": "long", "problem_statement": "x" * 5000},
+            {"instance_id": "mid", "problem_statement": "x" * 500},
+        ]
+        ordered = [i["instance_id"] for i in schedule_instances(instances, "longest-first")]
+        self.assertEqual(ordered, ["long", "mid", "short"])
+
+    def test_process_instance_clamps_max_tokens_and_skips_oversized(self):
+        estimator = TokenEstimator()
+        instance = {"instance_id": "a", "problem_statement": "x" * 350}
+        prompt_tokens = estimator.estimate(build_messages(instance))
+        controller = AdmissionController(estimator, max_model_len=prompt_tokens + 132, safety_margin=32)
+        context = RunContext(admission=controller)
+        completion = {"content": "", "finish_reason": "length", "usage": None, "truncated_early": None}
+        target = "scripts.swebench_generate_predictions.generate_patch"
+        with patch(target, return_value=completion) as mock_generate:
+            process_instance(self._args(), instance, context)
+            self.assertEqual(mock_generate.call_args.kwargs["max_tokens"], 100)
+            self.assertEqual(controller.in_flight_tokens, 0)
+
+            huge = {"instance_id": "b", "problem_statement": "x" * 100000}
+            result = process_instance(self._args(), huge, context)
+            self.assertTrue(result["deferred"])
+            self.assertNotIn("patch", result)
+            self.assertEqual(mock_generate.call_count, 1)
+
+    def test_rejected_instances_are_retried_once_and_not_written(self):
+        estimator = TokenEstimator()
+        context = RunContext(admission=AdmissionController(estimator, max_model_len=2000))
+        instances = [
+            {"instance_id": "huge", "problem_statement": "x" * 100000},
+            {"instance_id": "a", "problem_statement": "x"},
+        ]
+        completion = {"content": "", "finish_reason": "stop", "usage": None, "truncated_early": None}
+        results = []
+        with patch("scripts.swebench_generate_predictions.generate_patch", return_value=completion):
+            processed = generate_predictions(self._args(), instances, set(), results.append, context)
+        self.assertEqual(processed, 1)
+        self.assertEqual([(r["instance_id"], bool(r.get("deferred"))) for r in results], [("a", False), ("huge", True)])
+
+    def test_adaptive_run_retries_overloaded_instances(self):
+        calls = {}
+
+        def fake_generate_patch(**kwargs):
+            instance_id = kwargs["instance"]["instance_id"]
+            calls[instance_id] = calls.get(instance_id, 0) + 1
+            if instance_id == "b" and calls[instance_id] == 1:
+                raise HTTPStatusError(503, "Service Unavailable")
+            return {"content": "x", "finish_reason": "stop", "usage": None, "truncated_early": None}
+
+        controller = AdaptiveConcurrency(initial=4, maximum=4)
+        context = RunContext(concurrency=controller)
+        instances = [{"instance_id": name} for name in "abcd"]
+        results = []
+        target = "scripts.swebench_generate_predictions.generate_patch"
+        with patch(target, side_effect=fake_generate_patch):
+            processed = generate_predictions(
+                self._args("--adaptive-concurrency"), instances, set(), results.append, context
+            )
+        self.assertEqual(processed, 4)
+        self.assertEqual(calls["b"], 2)
+        self.assertEqual(controller.history[1]["reason"], "http_503")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from scripts.swebench_datasets import load_dataset_live, load_dataset_swebench, load_snapshot
+
+ROWS = [
+    {"instance_id": f"org__repo-{idx}", "repo": "org/repo", "problem_statement": "ü" * idx, "patch": "x" * 100}
+    for idx in range(5)
+]
+COLUMNS = ("instance_id", "repo", "problem_statement")
+
+
+class FakeDatasetDict(dict):
+    pass
+
+
+class TestDatasetSnapshot(unittest.TestCase):
+    def test_builds_projected_snapshot_and_indexes_rows(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch("scripts.swebench_datasets.load_hf_dataset", return_value=ROWS) as mock_load:
+                snapshot = load_dataset_swebench("test", COLUMNS, tmpdir)
+            mock_load.assert_called_once_with("swebench-multilingual", "test")
+            self.assertEqual(len(snapshot), 5)
+            self.assertEqual([row["instance_id"] for row in snapshot], [r["instance_id"] for r in ROWS])
+            row = snapshot.get("org__repo-3")
+            self.assertEqual(row, {"instance_id": "org__repo-3", "repo": "org/repo", "problem_statement": "üüü"})
+            self.assertIsNone(snapshot.get("missing"))
+            self.assertIn("org__repo-0", snapshot)
+            with snapshot:
+                pass
+            self.assertIsNone(snapshot._handle)
+
+    def test_warm_load_does_not_touch_huggingface(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch("scripts.swebench_datasets.load_hf_dataset", return_value=ROWS):
+                load_dataset_swebench("test", COLUMNS, tmpdir).close()
+            with patch("scripts.swebench_datasets.load_hf_dataset", side_effect=AssertionError("cold")):
+                snapshot = load_dataset_swebench("test", COLUMNS, tmpdir)
+                self.assertEqual(snapshot.get("org__repo-4")["problem_statement"], "üüüü")
+                snapshot.close()
+                # A different column set is a separate snapshot and needs a rebuild.
+                with self.assertRaises(AssertionError):
+                    load_dataset_swebench("test", ("instance_id", "patch"), tmpdir)
+
+    def test_truncated_data_file_forces_rebuild(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch("scripts.swebench_datasets.load_hf_dataset", return_value=ROWS):
+                snapshot = load_snapshot("swebench-multilingual", "test", COLUMNS, tmpdir)
+            snapshot.close()
+            with open(snapshot.data_path, "r+b") as handle:
+                handle.truncate(10)
+            with patch("scripts.swebench_datasets.load_hf_dataset", return_value=ROWS[:2]) as mock_load:
+                rebuilt = load_snapshot("swebench-multilingual", "test", COLUMNS, tmpdir)
+            mock_load.assert_called_once()
+            self.assertEqual(len(rebuilt), 2)
+            rebuilt.close()
+
+    def test_live_records_split_names_for_warm_loads(self):
+        dataset = FakeDatasetDict({"c": ROWS[:2], "python": ROWS[2:]})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch("scripts.swebench_datasets.load_hf_dataset", return_value=dataset):
+                splits = load_dataset_live([], COLUMNS, tmpdir)
+            self.assertEqual([(name, len(snap)) for name, snap in splits], [("c", 2), ("python", 3)])
+            with open(f"{tmpdir}/swebench-live-multilang/splits.json", encoding="utf-8") as handle:
+                self.assertEqual(json.load(handle), ["c", "python"])
+            with patch("scripts.swebench_datasets.load_hf_dataset", side_effect=AssertionError("cold")):
+                warm = load_dataset_live([], COLUMNS, tmpdir)
+                self.assertEqual([name for name, _ in warm], ["c", "python"])
+                self.assertEqual(len(load_dataset_live(["python"], COLUMNS, tmpdir)[0][1]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
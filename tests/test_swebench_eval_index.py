@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.swebench_eval_index import LOG_HEAD_BYTES, LOG_TAIL_BYTES, EvalIndex, classify_logs, summarize
+
+
+def write_instance(model_dir, instance_id, report=None, log=None):
+    inst_dir = Path(model_dir) / instance_id
+    inst_dir.mkdir(parents=True, exist_ok=True)
+    if report is not None:
+        (inst_dir / "report.json").write_text(json.dumps({instance_id: report}))
+    if log is not None:
+        (inst_dir / "run_instance.log").write_text(log)
+
+
+class TestEvalIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.model_dir = Path(self.tmpdir.name) / "model"
+        write_instance(self.model_dir, "a", report={"resolved": True, "patch_successfully_applied": True})
+        write_instance(self.model_dir, "b", report={"resolved": False, "patch_successfully_applied": True})
+        write_instance(self.model_dir, "c", report={"patch_successfully_applied": False})
+        write_instance(self.model_dir, "d", log="build...\nPatch Apply Failed:\n")
+        write_instance(self.model_dir, "e", log="container abc is not running\n")
+        write_instance(self.model_dir, "f", log="ERROR - Error in evaluating model\nEvaluationError")
+        write_instance(self.model_dir, "g")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_scan_categorizes_reports_and_logs(self):
+        outcomes = EvalIndex().scan(self.model_dir)
+        categories = {inst: outcome["category"] for inst, outcome in outcomes.items()}
+        self.assertEqual(
+            categories,
+            {
+                "a": "resolved",
+                "b": "applied_tests_failed",
+                "c": "patch_apply_failed",
+                "d": "patch_apply_failed",
+                "e": "container_error",
+                "f": "eval_error",
+                "g": "not_evaluated",
+            },
+        )
+        self.assertEqual(summarize(outcomes), {"total": 7, "reports": 3, "errors": 2, "resolved": 1})
+
+    def test_rescan_parses_only_changed_files_and_persists(self):
+        index_path = os.path.join(self.tmpdir.name, "index.json")
+        index = EvalIndex(index_path)
+        index.scan(self.model_dir)
+        self.assertEqual(index.parsed, 6)
+        index.save()
+
+        reloaded = EvalIndex(index_path)
+        reloaded.scan(self.model_dir)
+        self.assertEqual(reloaded.parsed, 0)
+
+        write_instance(self.model_dir, "e", report={"resolved": True})
+        write_instance(self.model_dir, "d", log="build...\nPatch Apply Failed:\nmore output\n")
+        outcomes = reloaded.scan(self.model_dir)
+        self.assertEqual(reloaded.parsed, 2)
+        self.assertEqual(outcomes["e"]["category"], "resolved")
+
+    def test_large_logs_are_classified_from_head_and_tail_windows(self):
+        noise = "x" * 99 + "\n"
+        body = noise * ((LOG_HEAD_BYTES + LOG_TAIL_BYTES) // 50)
+        write_instance(self.model_dir, "tail", log="start\n" + body + "container abc is not running\n")
+        write_instance(self.model_dir, "head", log="Patch Apply Failed\n" + body)
+        # Outside both windows: the middle of a multi-megabyte build log is not read.
+        write_instance(self.model_dir, "middle", log=body + "EvaluationError\n" + body)
+        outcomes = EvalIndex().scan(self.model_dir)
+        self.assertEqual(outcomes["tail"]["category"], "container_error")
+        self.assertEqual(outcomes["head"]["category"], "patch_apply_failed")
+        self.assertFalse(outcomes["middle"]["error_logged"])
+
+    def test_process_pool_matches_serial_classification(self):
+        logs = ["Patch Apply Failed", "container x is not running", "EvaluationError", "ok"] * 5
+        paths = []
+        for idx, text in enumerate(logs):
+            write_instance(self.model_dir, f"p{idx}", log=text)
+            paths.append(str(self.model_dir / f"p{idx}" / "run_instance.log"))
+        self.assertEqual(classify_logs(paths, workers=2), classify_logs(paths, workers=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
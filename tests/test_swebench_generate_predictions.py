@@ -1,19 +1,42 @@
+import contextlib
 import json
 import os
 import tempfile
+import threading
+import time
 import unittest
+from unittest.mock import patch
 
 from scripts.swebench_generate_predictions import (
+    DiffStreamMonitor,
+    LivePredictionJournal,
     append_jsonl,
     build_user_prompt,
+    generate_predictions,
+    live_journal_path,
+    main,
+    merge_shards,
+    parse_args,
     parse_csv_list,
+    parse_shard,
+    process_instance,
     read_existing_live_predictions,
     read_existing_swebench_predictions,
     sanitize_patch,
+    schedule_instances,
+    select_candidate,
+    shard_of,
+    shard_output_path,
+    usage_cached_tokens,
+    validate_patch,
     write_live_predictions,
 )
 
 
+def completion(content):
+    return {"content": content, "finish_reason": "stop", "usage": None, "truncated_early": None}
+
+
 class TestSWEbenchGeneratePredictions(unittest.TestCase):
     def test_build_user_prompt_includes_hints(self):
         instance = {
@@ -60,15 +83,225 @@ class TestSWEbenchGeneratePredictions(unittest.TestCase):
                 data = json.load(handle)
             self.assertEqual(data, payload)
 
+    def test_live_journal_rebuilds_state_and_tolerates_torn_line(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "predictions.json")
+            write_live_predictions(path, {"a": {"model_patch": "x"}})
+            journal = LivePredictionJournal(path, {"a": {"model_patch": "x"}}, checkpoint_every=0)
+            journal.append("b", {"model_patch": "y"})
+            journal.sync()
+            with open(live_journal_path(path), "a", encoding="utf-8") as handle:
+                handle.write('{"instance_id": "c", "model_pa')
+            loaded = read_existing_live_predictions(path)
+            self.assertEqual(loaded, {"a": {"model_patch": "x"}, "b": {"model_patch": "y"}})
+
+            resumed = LivePredictionJournal(path, loaded, checkpoint_every=0)
+            resumed.append("c", {"model_patch": "z"})
+            resumed.sync()
+            self.assertEqual(read_existing_live_predictions(path)["c"], {"model_patch": "z"})
+            resumed.close()
+            self.assertFalse(os.path.exists(live_journal_path(path)))
+            with open(path, "r", encoding="utf-8") as handle:
+                self.assertEqual(sorted(json.load(handle)), ["a", "b", "c"])
+
+    def test_live_journal_checkpoints_compact_output(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "predictions.json")
+            journal = LivePredictionJournal(path, {}, fsync_every=1, checkpoint_every=2)
+            journal.append("a", {"model_patch": "x"})
+            self.assertFalse(os.path.exists(path))
+            journal.append("b", {"model_patch": "y"})
+            with open(path, "r", encoding="utf-8") as handle:
+                self.assertEqual(sorted(json.load(handle)), ["a", "b"])
+            self.assertEqual(os.path.getsize(live_journal_path(path)), 0)
+            journal.close()
+
     def test_sanitize_patch_strips_fences(self):
         raw = "```diff\n--- a/foo.py\n+++ b/foo.py\n@@\n-1\n+2\n```\n"
         sanitized = sanitize_patch(raw)
         self.assertEqual(sanitized, "--- a/foo.py\n+++ b/foo.py\n@@\n-1\n+2\n")
 
+    def test_schedule_instances_groups_by_repo(self):
+        instances = [
+            {"instance_id": "a1", "repo": "a"},
+            {"instance_id": "b1", "repo": "b"},
+            {"instance_id": "a2", "repo": "a"},
+            {"instance_id": "c1", "repo": "c"},
+            {"instance_id": "b2", "repo": "b"},
+        ]
+        ordered = [i["instance_id"] for i in schedule_instances(instances, "prefix")]
+        self.assertEqual(ordered, ["a1", "a2", "b1", "b2", "c1"])
+        self.assertIs(schedule_instances(instances, "dataset"), instances)
+        with self.assertRaises(ValueError):
+            schedule_instances(instances, "random")
+
+    def test_usage_cached_tokens(self):
+        usage = {"prompt_tokens": 100, "completion_tokens": 20, "prompt_tokens_details": {"cached_tokens": 64}}
+        self.assertEqual(usage_cached_tokens(usage), 64)
+        self.assertIsNone(usage_cached_tokens({"prompt_tokens": 5}))
+        self.assertIsNone(usage_cached_tokens(None))
+
+    def test_diff_stream_monitor_stops_after_closing_fence(self):
+        monitor = DiffStreamMonitor()
+        chunks = ["Here:\n```di", "ff\n--- a/x\n+++ b/x\n", "@@ -1 +1 @@\n-a\n+b\n", "```\nTrailing", " prose"]
+        results = [monitor.feed(chunk) for chunk in chunks]
+        self.assertEqual(results, [False, False, False, True, True])
+        self.assertTrue(monitor.text[: monitor.complete_at].endswith("+b\n```\n"))
+        self.assertEqual(sanitize_patch(monitor.text[: monitor.complete_at]), "--- a/x\n+++ b/x\n@@ -1 +1 @@\n-a\n+b\n")
+
+    def test_diff_stream_monitor_ignores_fence_without_diff(self):
+        monitor = DiffStreamMonitor()
+        self.assertFalse(monitor.feed("```python\nprint(1)\n```\n"))
+        self.assertFalse(monitor.feed("```diff\n--- a/x\n+++ b/x\n"))
+        self.assertIsNone(monitor.complete_at)
+
     def test_sanitize_patch_handles_empty(self):
         self.assertEqual(sanitize_patch(""), "")
         self.assertEqual(sanitize_patch("   \n"), "")
 
+    def test_validate_patch_checks_structure_and_hunk_counts(self):
+        good = "--- a/x.py\n+++ b/x.py\n@@ -1,2 +1,2 @@\n ctx\n-a\n+b\n"
+        self.assertEqual(
+            validate_patch(good), {"non_empty": True, "parses": True, "hunks_consistent": True}
+        )
+        no_eol = "--- a/x\n+++ b/x\n@@ -1 +1 @@\n-a\n+b\n\\ No newline at end of file\n"
+        self.assertTrue(validate_patch(no_eol)["hunks_consistent"])
+        miscounted = "--- a/x.py\n+++ b/x.py\n@@ -1,3 +1,2 @@\n ctx\n-a\n+b\n"
+        self.assertEqual(
+            validate_patch(miscounted), {"non_empty": True, "parses": True, "hunks_consistent": False}
+        )
+        self.assertFalse(validate_patch("Sorry, I cannot help.\n")["parses"])
+        self.assertFalse(validate_patch("@@ -1 +1 @@\n-a\n+b\n")["parses"])
+        self.assertEqual(
+            validate_patch(""), {"non_empty": False, "parses": False, "hunks_consistent": False}
+        )
+
+    def test_select_candidate_prefers_valid_then_lowest_index(self):
+        def candidate(index, patch):
+            return {"index": index, "patch": patch, "checks": validate_patch(patch)}
+
+        valid = "--- a/x\n+++ b/x\n@@ -1 +1 @@\n-a\n+b\n"
+        miscounted = "--- a/x\n+++ b/x\n@@ -1,4 +1 @@\n-a\n+b\n"
+        candidates = [candidate(0, ""), candidate(1, miscounted), candidate(2, valid), candidate(3, valid)]
+        self.assertEqual(select_candidate(candidates)["index"], 2)
+        self.assertEqual(select_candidate(candidates[:2])["index"], 1)
+
+    def _args(self, *extra):
+        return parse_args(
+            ["--suite", "swebench-multilingual", "--model", "m", "--output", "out.jsonl", *extra]
+        )
+
+    def test_generate_predictions_concurrent_skips_seen_and_limits(self):
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def fake_generate_patch(**kwargs):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return completion(f"patch-{kwargs['instance']['instance_id']}")
+
+        instances = [{"instance_id": f"i{idx}"} for idx in range(8)]
+        results = []
+        args = self._args("--concurrency", "3", "--max-instances", "5")
+        with patch(
+            "scripts.swebench_generate_predictions.generate_patch",
+            side_effect=fake_generate_patch,
+        ):
+            processed = generate_predictions(args, instances, {"i0"}, results.append)
+
+        self.assertEqual(processed, 5)
+        self.assertEqual(
+            sorted(r["instance_id"] for r in results), ["i1", "i2", "i3", "i4", "i5"]
+        )
+        self.assertEqual(state["peak"], 3)
+        for result in results:
+            self.assertEqual(result["patch"], f"patch-{result['instance_id']}\n")
+
+    def test_generate_predictions_concurrent_keeps_finished_results_on_error(self):
+        def fake_generate_patch(**kwargs):
+            if kwargs["instance"]["instance_id"] == "bad":
+                raise RuntimeError("boom")
+            return completion("x")
+
+        instances = [{"instance_id": "a"}, {"instance_id": "bad"}, {"instance_id": "b"}]
+        results = []
+        with patch(
+            "scripts.swebench_generate_predictions.generate_patch",
+            side_effect=fake_generate_patch,
+        ):
+            with self.assertRaises(RuntimeError):
+                generate_predictions(self._args("--concurrency", "2"), instances, set(), results.append)
+        self.assertIn("a", [r["instance_id"] for r in results])
+
+    def test_process_instance_best_of_n_selects_valid_candidate(self):
+        valid = "```diff\n--- a/x\n+++ b/x\n@@ -1 +1 @@\n-a\n+b\n```"
+        choices = [
+            {"content": "No idea.", "finish_reason": "stop", "truncated_early": None},
+            {"content": valid, "finish_reason": "stop", "truncated_early": None},
+        ]
+        raw = {**choices[0], "usage": None, "ttft": None, "choices": choices}
+        with patch("scripts.swebench_generate_predictions.openai_chat_completion", return_value=raw) as mock_call:
+            result = process_instance(self._args("--n", "2", "--no-cache"), {"instance_id": "a"})
+        self.assertEqual(mock_call.call_args.kwargs["n"], 2)
+        self.assertEqual(result["selected"], 1)
+        self.assertEqual(result["patch"], "--- a/x\n+++ b/x\n@@ -1 +1 @@\n-a\n+b\n")
+        self.assertEqual([c["index"] for c in result["candidates"]], [0, 1])
+        self.assertFalse(result["candidates"][0]["checks"]["parses"])
+
+    def test_shard_partition_is_stable_and_complete(self):
+        self.assertEqual(parse_shard("1/4"), (1, 4))
+        for bad in ("4/4", "x/2", "1"):
+            with self.assertRaises(Exception):
+                parse_shard(bad)
+        ids = [f"org__repo-{idx}" for idx in range(200)]
+        shards = [shard_of(instance_id, 4) for instance_id in ids]
+        self.assertEqual(shards, [shard_of(instance_id, 4) for instance_id in ids])
+        self.assertEqual(set(shards), {0, 1, 2, 3})
+        self.assertEqual(shard_of("org__repo-7", 4), 0)
+        self.assertEqual(shard_output_path("runs/preds.jsonl", 1, 4), "runs/preds.shard-1-of-4.jsonl")
+
+    def test_merge_shards_reports_missing_and_duplicates(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            first = os.path.join(tmpdir, "a.jsonl")
+            second = os.path.join(tmpdir, "b.jsonl")
+            append_jsonl(first, {"instance_id": "i2", "model_patch": "p2"})
+            append_jsonl(second, {"instance_id": "i0", "model_patch": "p0"})
+            merged, problems = merge_shards("swebench-multilingual", [first, second], ["i0", "i1", "i2"])
+            self.assertEqual([r["instance_id"] for r in merged], ["i0", "i2"])
+            self.assertEqual(problems, {"missing": ["i1"], "duplicates": [], "unexpected": []})
+            append_jsonl(second, {"instance_id": "i2", "model_patch": "again"})
+            _, problems = merge_shards("swebench-multilingual", [first, second])
+            self.assertEqual(problems["duplicates"], ["i2"])
+
+            live = os.path.join(tmpdir, "live.json")
+            write_live_predictions(live, {"x": {"model_patch": "px"}})
+            merged, problems = merge_shards("swebench-live-multilang", [live], ["x", "y"])
+            self.assertEqual(merged, {"x": {"model_patch": "px"}})
+            self.assertEqual(problems["missing"], ["y"])
+
+    def test_sharded_runs_merge_into_one_predictions_file(self):
+        rows = [{"instance_id": f"i{idx}", "repo": "r", "problem_statement": "p"} for idx in range(9)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "preds.jsonl")
+            base = ["--suite", "swebench-multilingual", "--model", "m", "--output", output, "--dry-run"]
+            target = "scripts.swebench_generate_predictions.load_dataset_swebench"
+            with patch(target, return_value=contextlib.nullcontext(rows)):
+                for index in range(3):
+                    main([*base, "--shard", f"{index}/3"])
+                merge = ["merge", "--suite", "swebench-multilingual", "--output", output, "--shards", "3"]
+                self.assertEqual(main(merge), 0)
+            with open(output, encoding="utf-8") as handle:
+                merged = [json.loads(line) for line in handle]
+            self.assertEqual([r["instance_id"] for r in merged], [r["instance_id"] for r in rows])
+            with patch(target, return_value=contextlib.nullcontext(rows[:8])):
+                self.assertEqual(main(merge), 0)
+            with patch(target, return_value=contextlib.nullcontext(rows + [{"instance_id": "extra"}])):
+                self.assertEqual(main(merge), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
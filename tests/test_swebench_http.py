@@ -0,0 +1,290 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scripts.swebench_generate_predictions import (
+    RunContext,
+    complete_on_endpoint,
+    create_connection_pool,
+    openai_chat_completion,
+    parse_args,
+    process_instance,
+)
+from scripts.swebench_http import ConnectionPool, EndpointBalancer, HTTPStatusError
+
+STREAM_DELTAS = [
+    "```diff\n",
+    "--- a/x.py\n+++ b/x.py\n",
+    "@@ -1 +1 @@\n-a\n+b\n",
+    "```\n",
+] + ["More commentary.\n"] * 50
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):  # noqa: A002 - silence test output
+        pass
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, payload):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        deltas = STREAM_DELTAS if "/slow/" not in self.path else ["thinking\n"] * 50
+        indices = range(payload.get("n", 1))
+        try:
+            for delta in deltas:
+                for index in indices:
+                    choice = {"index": index, "delta": {"content": delta}, "finish_reason": None}
+                    self._send_chunk(f"data: {json.dumps({'choices': [choice]})}\n\n".encode())
+                self.server.chunks_sent += 1
+                time.sleep(0.02)
+            final = {"choices": [{"index": index, "delta": {}, "finish_reason": "stop"} for index in indices]}
+            self._send_chunk(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+            self._send_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if getattr(self.server, "broken", False):
+            self._reply(500, b"down")
+        else:
+            self._reply(200, b'{"data": []}')
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests.append((self.path, dict(self.headers), payload))
+        if getattr(self.server, "broken", False):
+            self._reply(500, b"down")
+            return
+        if payload.get("stream"):
+            self._stream(payload)
+            return
+        if self.path.endswith("/fail"):
+            self._reply(503, b"overloaded")
+            return
+        choices = []
+        for index in range(payload.get("n", 1)):
+            content = f"echo {payload.get('model')}" + (f" {index}" if index else "")
+            choices.append({"index": index, "message": {"content": content}})
+        body = json.dumps({"choices": choices})
+        self._reply(200, body.encode("utf-8"))
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = []
+    server.chunks_sent = 0
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def stop_stub_server(server):
+    server.shutdown()
+    server.server_close()
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.server, self.api_base = start_stub_server()
+
+    def tearDown(self):
+        stop_stub_server(self.server)
+
+    def test_requests_reuse_one_keepalive_connection(self):
+        pool = create_connection_pool(self.api_base, "secret", size=2, timeout=5)
+        try:
+            for _ in range(5):
+                content = openai_chat_completion(
+                    api_base=self.api_base,
+                    model="demo",
+                    messages=[{"role": "user", "content": "hi"}],
+                    temperature=0.0,
+                    max_tokens=8,
+                    timeout=5,
+                    api_key="secret",
+                    pool=pool,
+                )
+                self.assertEqual(content["content"], "echo demo")
+        finally:
+            pool.close()
+        self.assertEqual(pool.connections_opened, 1)
+        self.assertEqual(self.server.connections, 1)
+        path, headers, _ = self.server.requests[0]
+        self.assertEqual(path, "/v1/chat/completions")
+        self.assertEqual(headers["Authorization"], "Bearer secret")
+
+    def _complete(self, api_base, **kwargs):
+        return openai_chat_completion(
+            api_base=api_base,
+            model="demo",
+            messages=[{"role": "user", "content": "hi"}],
+            temperature=0.0,
+            max_tokens=8,
+            timeout=5,
+            api_key=None,
+            stream=True,
+            **kwargs,
+        )
+
+    def test_streaming_stops_once_diff_is_complete(self):
+        result = self._complete(self.api_base)
+        self.assertEqual(result["truncated_early"], "diff_complete")
+        self.assertEqual(result["content"], "".join(STREAM_DELTAS[:4]))
+        self.assertTrue(self.server.requests[0][2]["stream"])
+        time.sleep(0.1)
+        self.assertLess(self.server.chunks_sent, len(STREAM_DELTAS))
+
+    def test_n_choices_share_one_request(self):
+        result = openai_chat_completion(
+            api_base=self.api_base,
+            model="demo",
+            messages=[{"role": "user", "content": "hi"}],
+            temperature=0.8,
+            max_tokens=8,
+            timeout=5,
+            api_key=None,
+            n=3,
+        )
+        self.assertEqual([c["content"] for c in result["choices"]], ["echo demo", "echo demo 1", "echo demo 2"])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.requests[0][2]["n"], 3)
+
+    def test_streaming_n_stops_once_every_choice_has_a_diff(self):
+        result = self._complete(self.api_base, n=2)
+        self.assertEqual(result["truncated_early"], "diff_complete")
+        self.assertEqual([c["content"] for c in result["choices"]], ["".join(STREAM_DELTAS[:4])] * 2)
+
+    def test_streaming_honours_wall_clock_budget(self):
+        started = time.monotonic()
+        result = self._complete(f"{self.api_base}/slow", budget=0.2)
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual(result["truncated_early"], "budget")
+        self.assertTrue(result["content"].startswith("thinking"))
+
+    def test_pool_bounds_concurrent_connections(self):
+        pool = ConnectionPool(self.api_base, size=2, timeout=5)
+        threads = [
+            threading.Thread(target=pool.request, args=("POST", "chat/completions", b"{}"))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pool.close()
+        self.assertLessEqual(pool.connections_opened, 2)
+        self.assertEqual(len(self.server.requests), 8)
+
+    def test_error_status_raises(self):
+        pool = ConnectionPool(self.api_base, size=1, timeout=5)
+        with self.assertRaises(HTTPStatusError) as ctx:
+            pool.request("POST", "fail", b"{}")
+        pool.close()
+        self.assertEqual(ctx.exception.status, 503)
+
+    def test_rejects_unsupported_url(self):
+        with self.assertRaises(ValueError):
+            ConnectionPool("ftp://example.com")
+
+
+class TestEndpointBalancer(unittest.TestCase):
+    def setUp(self):
+        self.servers = [start_stub_server() for _ in range(2)]
+        self.urls = [url for _, url in self.servers]
+
+    def tearDown(self):
+        for server, _ in self.servers:
+            stop_stub_server(server)
+
+    def _balancer(self, **kwargs):
+        return EndpointBalancer(
+            self.urls, lambda url: create_connection_pool(url, None, size=2, timeout=5), **kwargs
+        )
+
+    def test_least_outstanding_selection(self):
+        balancer = self._balancer()
+        with balancer.acquire() as first:
+            with balancer.acquire() as second:
+                self.assertNotEqual(first.base_url, second.base_url)
+            with balancer.acquire() as third:
+                self.assertEqual(third.base_url, second.base_url)
+        balancer.close()
+
+    def test_failover_eject_and_readmit(self):
+        broken_server, broken_url = self.servers[1]
+        broken_server.broken = True
+        balancer = self._balancer(eject_after=1, cooldown=0.1)
+        context = RunContext(balancer=balancer)
+        args = parse_args(
+            ["--suite", "swebench-multilingual", "--model", "m", "--output", "out.jsonl", "--no-sanitize-diff"]
+        )
+        results = [process_instance(args, {"instance_id": f"i{idx}"}, context) for idx in range(4)]
+        self.assertTrue(all(r["patch"] == "echo m" for r in results))
+        self.assertTrue(all(r["endpoint"] == self.urls[0] for r in results))
+        self.assertEqual(balancer.healthy_count(), 1)
+        self.assertEqual(balancer.stats()[broken_url]["ejections"], 1)
+
+        broken_server.broken = False
+        time.sleep(0.15)
+        with balancer.acquire():
+            pass
+        self.assertEqual(balancer.healthy_count(), 2)
+        balancer.close()
+
+
+    def test_errors_before_an_endpoint_is_chosen_propagate(self):
+        balancer = self._balancer()
+        args = parse_args(["--suite", "swebench-multilingual", "--model", "m", "--output", "out.jsonl"])
+
+        def fail():
+            raise ConnectionError("probe exploded")
+
+        balancer._readmit_due = fail
+        with self.assertRaisesRegex(ConnectionError, "probe exploded"):
+            complete_on_endpoint(args, {"instance_id": "a"}, RunContext(balancer=balancer), 16)
+        balancer.close()
+
+    def test_probe_bypasses_busy_pool_slots(self):
+        balancer = self._balancer(cooldown=30)
+        endpoint = balancer.endpoints[0]
+        endpoint.healthy = False
+        endpoint.ejected_until = 0.0
+        # Every slot is held, as by requests hung on the ejected endpoint.
+        for _ in range(endpoint.pool.size):
+            endpoint.pool._slots.acquire()
+        try:
+            done = threading.Event()
+            threading.Thread(target=lambda: (balancer._readmit_due(), done.set()), daemon=True).start()
+            self.assertTrue(done.wait(2))
+            self.assertEqual(balancer.healthy_count(), 2)
+        finally:
+            for _ in range(endpoint.pool.size):
+                endpoint.pool._slots.release()
+        balancer.close()
+
+if __name__ == "__main__":
+    unittest.main()
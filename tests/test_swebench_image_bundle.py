@@ -0,0 +1,214 @@
+import contextlib
+import hashlib
+import io
+import json
+import tarfile
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scripts.swebench_image_bundle import (
+    Bundle,
+    RegistryClient,
+    export_images,
+    export_present_images,
+    ingest_save_stream,
+    main,
+    push_image,
+    write_load_stream,
+)
+
+BASE = b"base layer" * 100
+LAYERS = {"swebench/a:latest": b"layer a", "swebench/b:latest": b"layer b"}
+
+
+def sha(data):
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def add_file(archive, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    archive.addfile(info, io.BytesIO(data))
+
+
+def fake_save(images):
+    """A docker save archive in the OCI layout, with legacy symlinks and VERSION files."""
+    buffer = io.BytesIO()
+    manifest = []
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        add_file(archive, "oci-layout", b"{}")
+        written = set()
+        for image in images:
+            config = json.dumps({"image": image}).encode()
+            for data in (config, BASE, LAYERS[image]):
+                if sha(data) not in written:
+                    written.add(sha(data))
+                    add_file(archive, "blobs/sha256/" + sha(data)[7:], data)
+            link = tarfile.TarInfo(f"{image[-8:-7]}/layer.tar")
+            link.type = tarfile.SYMTYPE
+            link.linkname = "../blobs/sha256/" + sha(LAYERS[image])[7:]
+            archive.addfile(link)
+            add_file(archive, f"{image[-8:-7]}/VERSION", b"1.0")
+            manifest.append(
+                {
+                    "Config": "blobs/sha256/" + sha(config)[7:],
+                    "RepoTags": [image],
+                    "Layers": ["blobs/sha256/" + sha(BASE)[7:], f"{image[-8:-7]}/layer.tar"],
+                }
+            )
+        add_file(archive, "manifest.json", json.dumps(manifest).encode())
+    buffer.seek(0)
+    return buffer
+
+
+def test_export_stores_shared_layers_once_and_resumes(tmp_path):
+    saved = []
+
+    @contextlib.contextmanager
+    def save(images):
+        saved.append(list(images))
+        yield fake_save(images)
+
+    bundle = Bundle(str(tmp_path / "bundle"))
+    images = list(LAYERS)
+    assert export_images(bundle, images, "suite", batch_size=1, save=save) == []
+    assert saved == [["swebench/a:latest"], ["swebench/b:latest"]]
+    entry = bundle.index["images"]["swebench/a:latest"]
+    assert entry["layers"] == [sha(BASE), sha(b"layer a")]
+    stats = bundle.stats(images)
+    assert stats["blobs"] == 5
+    assert stats["stored"] == stats["logical"] - len(BASE)
+    # VERSION files are not image content and do not stay in the store.
+    assert not bundle.has_blob(sha(b"1.0"))
+
+    reopened = Bundle(str(tmp_path / "bundle"))
+    assert export_images(reopened, images, "suite", save=save) == []
+    assert len(saved) == 2
+    assert reopened.suite_images("suite") == images
+
+
+def test_export_present_images_skips_missing_and_reports_totals(tmp_path, capsys):
+    @contextlib.contextmanager
+    def save(images):
+        yield fake_save(images)
+
+    bundle = Bundle(str(tmp_path / "bundle"))
+    summary = export_present_images(
+        bundle,
+        [*LAYERS, "swebench/gone:latest"],
+        "suite",
+        save=save,
+        list_local=lambda: {image: {} for image in LAYERS},
+    )
+    assert (summary["images"], summary["failed"], summary["missing"]) == (2, [], 1)
+    assert "1 images are not present locally" in capsys.readouterr().out
+    assert export_present_images(bundle, list(LAYERS), "suite", save=save, list_local=lambda: None) is None
+
+
+def test_load_stream_contains_each_blob_once(tmp_path):
+    bundle = Bundle(str(tmp_path))
+    entries = ingest_save_stream(bundle, fake_save(list(LAYERS)), list(LAYERS))
+    bundle.add_images("suite", entries)
+    out = io.BytesIO()
+    write_load_stream(bundle, list(LAYERS), out)
+    out.seek(0)
+    with tarfile.open(fileobj=out) as archive:
+        names = archive.getnames()
+        manifest = json.load(archive.extractfile("manifest.json"))
+        base = archive.extractfile("blobs/sha256/" + sha(BASE)[7:]).read()
+    assert len(names) == len(set(names)) == 6
+    assert base == BASE
+    assert [item["RepoTags"] for item in manifest] == [["swebench/a:latest"], ["swebench/b:latest"]]
+
+
+class StubRegistry(BaseHTTPRequestHandler):
+    blobs = {}
+    manifests = {}
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        repo, digest = self.path[4:].split("/blobs/")
+        self._reply(200 if (repo, digest) in self.blobs else 404)
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        repo = url.path[4:].split("/blobs/")[0]
+        query = urllib.parse.parse_qs(url.query)
+        self.requests.append(("POST", repo, "mount" in query))
+        if "mount" in query and (query["from"][0], query["mount"][0]) in self.blobs:
+            self.blobs[(repo, query["mount"][0])] = self.blobs[(query["from"][0], query["mount"][0])]
+            self._reply(201)
+            return
+        self._reply(202, {"Location": f"/v2/{repo}/blobs/uploads/u1"})
+
+    def do_PUT(self):
+        url = urllib.parse.urlparse(self.path)
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if "/manifests/" in url.path:
+            repo, tag = url.path[4:].split("/manifests/")
+            self.manifests[(repo, tag)] = json.loads(body)
+        else:
+            repo = url.path[4:].split("/blobs/")[0]
+            digest = urllib.parse.parse_qs(url.query)["digest"][0]
+            assert sha(body) == digest
+            self.blobs[(repo, digest)] = body
+        self._reply(201)
+
+
+def test_push_image_mounts_blobs_shared_across_repositories(tmp_path):
+    bundle = Bundle(str(tmp_path))
+    bundle.add_images("suite", ingest_save_stream(bundle, fake_save(list(LAYERS)), list(LAYERS)))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRegistry)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = RegistryClient(f"127.0.0.1:{server.server_address[1]}")
+        sources = {}
+        first = push_image(bundle, client, "swebench/a:latest", sources)
+        second = push_image(bundle, client, "swebench/b:latest", sources)
+    finally:
+        server.shutdown()
+    assert first > len(BASE)
+    assert second < len(BASE)
+    assert ("swebench/b", sha(BASE)) in StubRegistry.blobs
+    assert ("POST", "swebench/b", True) in StubRegistry.requests
+    manifest = StubRegistry.manifests[("swebench/b", "latest")]
+    assert [layer["digest"] for layer in manifest["layers"]] == [sha(BASE), sha(b"layer b")]
+
+
+class ProxyRegistry(StubRegistry):
+    """A pull-through cache: every upload is refused."""
+
+    def do_HEAD(self):
+        self._reply(404)
+
+    def do_POST(self):
+        self.requests.append(("POST", "proxy", False))
+        self._reply(405)
+
+
+def test_cli_push_stops_at_a_registry_that_refuses_uploads(tmp_path, capsys):
+    bundle = Bundle(str(tmp_path))
+    bundle.add_images("suite", ingest_save_stream(bundle, fake_save(list(LAYERS)), list(LAYERS)))
+    bundle.save()
+    ProxyRegistry.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProxyRegistry)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        registry = f"127.0.0.1:{server.server_address[1]}"
+        assert main(["--bundle", str(tmp_path), "--suite", "suite", "push", "--registry", registry]) == 3
+    finally:
+        server.shutdown()
+    assert len(ProxyRegistry.requests) == 1  # the first upload start; nothing else is tried
+    assert "pull-through cache" in capsys.readouterr().err
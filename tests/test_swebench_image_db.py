@@ -0,0 +1,70 @@
+import json
+
+from scripts.swebench_image_db import ImageDB
+
+
+def test_records_pulls_failures_and_survives_reload(tmp_path):
+    path = tmp_path / "images.json"
+    db = ImageDB(str(path), "linux/amd64")
+    db.record("img/a", True, 1)
+    db.record("img/b", False, 3, "boom")
+    db.update_local({"img/a": {"digest": "sha256:aa", "size": 100}})
+    db.save()
+
+    reloaded = ImageDB(str(path), "linux/amd64")
+    assert reloaded.is_done("img/a")
+    assert not reloaded.is_done("img/b")
+    assert reloaded.images["img/a"]["digest"] == "sha256:aa"
+    assert reloaded.images["img/b"]["last_failure"]["error"] == "boom"
+    assert not ImageDB(str(path), "linux/arm64").is_done("img/a")
+
+    reloaded.update_local({}, absent=["img/a"])
+    reloaded.save()
+    assert json.loads(path.read_text())["images"]["img/a"]["status"] == "removed"
+
+
+def test_concurrent_writers_merge_and_flush_in_batches(tmp_path):
+    path = tmp_path / "images.json"
+    pull = ImageDB(str(path), flush_every=2, flush_seconds=3600)
+    prefetch = ImageDB(str(path), flush_every=2, flush_seconds=3600)
+    pull.record("img/a", True, 1)
+    assert not path.exists()
+    pull.record("img/b", True, 1)
+    prefetch.record("img/c", True, 1)
+    prefetch.mark_removed("img/b")
+
+    on_disk = json.loads(path.read_text())["images"]
+    assert sorted(on_disk) == ["img/a", "img/b", "img/c"]
+    assert on_disk["img/b"]["status"] == "removed"
+    assert on_disk["img/b"]["last_pulled"] == pull.images["img/b"]["last_pulled"]
+    assert prefetch.is_done("img/a")
+
+
+def test_set_instances_replaces_split_references():
+    db = ImageDB("")
+    assert db.set_instances("suite", "c", [("i0", "img/a"), ("i1", "img/a"), ("i2", "img/b")]) == {
+        "added": 2,
+        "dropped": 0,
+    }
+    assert db.set_instances("suite", "c", [("i0", "img/a")]) == {"added": 0, "dropped": 1}
+    assert db.images["img/a"]["instances"] == {"suite": {"c": ["i0"]}}
+    assert db.images["img/b"]["instances"] == {"suite": {}}
+
+
+def test_footprint_counts_shared_images_once_per_suite():
+    db = ImageDB("")
+    db.set_instances("suite", "c", [("i0", "img/a"), ("i1", "img/b")])
+    db.set_instances("suite", "go", [("i2", "img/a"), ("i3", "img/c")])
+    db.update_local({"img/a": {"size": 100}, "img/c": {"size": 50}})
+    report = db.footprint()["suite"]
+    assert (report["images"], report["pulled"], report["bytes"]) == (3, 2, 150)
+    assert report["splits"]["c"] == {"images": 2, "pulled": 1, "bytes": 100}
+    assert report["splits"]["go"] == {"images": 2, "pulled": 2, "bytes": 150}
+
+
+def test_manifests_are_cached_per_platform():
+    db = ImageDB("", "linux/amd64")
+    db.record_manifests({"img/a": {"digest": "sha256:m", "layers": [("sha256:l1", 10)]}})
+    assert db.manifests(["img/a", "img/b"]) == {"img/a": {"digest": "sha256:m", "layers": [("sha256:l1", 10)]}}
+    db.platform = "linux/arm64"
+    assert db.manifests(["img/a"]) == {}
@@ -0,0 +1,100 @@
+import json
+import subprocess
+
+import scripts.swebench_image_plan as image_plan
+from scripts.swebench_image_plan import (
+    normalize_ref,
+    order_by_layers,
+    parse_size,
+    plan_pulls,
+    select_platform_manifest,
+)
+
+
+def completed(stdout="", returncode=0, stderr=""):
+    return subprocess.CompletedProcess(["docker"], returncode, stdout=stdout, stderr=stderr)
+
+
+def manifest_list(layers):
+    return [
+        {
+            "Descriptor": {"digest": "sha256:arm", "platform": {"os": "linux", "architecture": "arm64"}},
+            "SchemaV2Manifest": {"layers": [{"digest": "sha256:other", "size": 1}]},
+        },
+        {
+            "Descriptor": {"digest": "sha256:amd", "platform": {"os": "linux", "architecture": "amd64"}},
+            "SchemaV2Manifest": {"layers": [{"digest": d, "size": s} for d, s in layers]},
+        },
+    ]
+
+
+class FakeDocker:
+    def __init__(self, local, manifests):
+        self.local = local
+        self.manifests = manifests
+        self.calls = []
+
+    def __call__(self, args, timeout=None):
+        self.calls.append(list(args))
+        if args[:2] == ["image", "ls"]:
+            rows = [
+                json.dumps({"Repository": repo, "Tag": tag, "Digest": "<none>", "ID": "sha256:x", "Size": "1.5GB"})
+                for repo, tag in self.local
+            ]
+            return completed("\n".join(rows))
+        if args[:2] == ["manifest", "inspect"]:
+            image = args[-1]
+            if image not in self.manifests:
+                return completed(returncode=1, stderr="no such manifest")
+            return completed(json.dumps(manifest_list(self.manifests[image])))
+        raise AssertionError(args)
+
+
+def test_normalize_ref_matches_image_ls_form():
+    assert normalize_ref("docker.io/library/ubuntu") == "ubuntu:latest"
+    assert normalize_ref("swebench/img") == "swebench/img:latest"
+    assert normalize_ref("ghcr.io/org/img:1.0") == "ghcr.io/org/img:1.0"
+    assert normalize_ref("localhost:5000/img") == "localhost:5000/img:latest"
+    assert normalize_ref("img@sha256:abc") == "img@sha256:abc"
+    assert parse_size("1.5GB") == 1_500_000_000
+    assert parse_size("N/A") == 0
+
+
+def test_select_platform_manifest_picks_requested_platform():
+    selected = select_platform_manifest(manifest_list([("sha256:a", 10)]), "linux/amd64")
+    assert selected == {"digest": "sha256:amd", "layers": [("sha256:a", 10)]}
+    assert select_platform_manifest(manifest_list([]), "linux/s390x") is None
+
+
+def test_order_by_layers_groups_shared_bases():
+    manifests = {
+        "x": {"layers": [("base-b", 5), ("x", 1)]},
+        "y": {"layers": [("base-a", 5), ("y", 1)]},
+        "z": {"layers": [("base-a", 5), ("z", 1)]},
+    }
+    assert order_by_layers(["x", "y", "n", "z"], manifests) == ["y", "z", "x", "n"]
+
+
+def test_plan_skips_present_and_reports_expected_bytes(monkeypatch):
+    docker = FakeDocker(
+        local=[("swebench/a", "latest")],
+        manifests={
+            "swebench/b": [("base", 100), ("b", 10)],
+            "swebench/c": [("base", 100), ("c", 20)],
+        },
+    )
+    monkeypatch.setattr(image_plan, "run_docker", docker)
+    plan = plan_pulls(["swebench/a", "swebench/b", "swebench/c", "swebench/d"], "linux/amd64", inspect=True)
+    assert plan.present == ["swebench/a"]
+    assert plan.to_pull == ["swebench/b", "swebench/c", "swebench/d"]
+    assert plan.expected_bytes == 130
+    assert plan.unique_layers == 3
+    assert plan.unknown == ["swebench/d"]
+    assert sum(1 for call in docker.calls if call[:2] == ["image", "ls"]) == 1
+    assert "100 B shared" in plan.summary()
+
+
+def test_plan_without_docker_keeps_every_image(monkeypatch):
+    monkeypatch.setattr(image_plan, "run_docker", lambda args, timeout=None: completed(returncode=1))
+    plan = plan_pulls(["a", "b"], "linux/amd64")
+    assert (plan.to_pull, plan.present, plan.checked_local) == (["a", "b"], [], False)
@@ -1,6 +1,17 @@
+import contextlib
 import collections
+import json
+import subprocess
 
-from scripts.swebench_pull_images import collect_images, extract_image
+import scripts.swebench_image_plan as image_plan_module
+import scripts.swebench_pull_images as pull_images_module
+from scripts.swebench_pull_images import (
+    RegistryLimiter,
+    TokenBucket,
+    collect_images,
+    extract_image,
+    registry_host,
+)
 
 
 def test_extract_image_prefers_explicit_field():
@@ -30,3 +41,246 @@ def test_collect_images_counts_unique_images():
     assert counts["img-a"] == 2
     assert counts["img-b"] == 1
     assert "" not in counts
+
+
+def test_registry_host_defaults_to_docker_hub():
+    assert registry_host("swebench/sweb.eval.x86_64.foo:latest") == "docker.io"
+    assert registry_host("ubuntu") == "docker.io"
+    assert registry_host("ghcr.io/org/img:tag") == "ghcr.io"
+    assert registry_host("localhost:5000/img") == "localhost:5000"
+
+
+def test_token_bucket_limits_rate_and_pauses():
+    clock = {"now": 0.0}
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += seconds
+
+    bucket = TokenBucket(rate=2.0, burst=2, clock=lambda: clock["now"], sleep=sleep)
+    for _ in range(4):
+        bucket.acquire()
+    assert sleeps == [0.5, 0.5]
+    bucket.pause(10)
+    bucket.acquire()
+    assert clock["now"] >= 11.0
+
+
+def test_pull_with_backoff_waits_out_rate_limits(monkeypatch):
+    responses = [
+        (False, "Error response from daemon: toomanyrequests: You have reached your pull rate limit."),
+        (False, "toomanyrequests"),
+        (True, ""),
+    ]
+    monkeypatch.setattr(pull_images_module, "docker_pull", lambda image, platform: responses.pop(0))
+    delays = []
+    ok, error, attempts = pull_images_module.pull_with_backoff(
+        "swebench/img", "linux/amd64", RegistryLimiter(0, 1), base_delay=1.0, sleep=delays.append
+    )
+    assert (ok, error, attempts) == (True, "", 3)
+    assert len(delays) == 2
+    assert 0.5 <= delays[0] <= 1.5 and 1.0 <= delays[1] <= 3.0
+
+
+def test_pull_with_backoff_fails_fast_on_other_errors(monkeypatch):
+    monkeypatch.setattr(pull_images_module, "docker_pull", lambda image, platform: (False, "manifest unknown\n"))
+    ok, error, attempts = pull_images_module.pull_with_backoff("img", "linux/amd64", RegistryLimiter(0, 1))
+    assert (ok, error, attempts) == (False, "manifest unknown", 1)
+
+
+def test_main_resumes_from_state_file(monkeypatch, tmp_path):
+    rows = [{"instance_id": f"i{idx}", "docker_image": f"img-{idx % 3}"} for idx in range(6)]
+    pulled = []
+
+    def fake_pull(image, platform):
+        pulled.append(image)
+        return image != "img-2", "" if image != "img-2" else "boom"
+
+    monkeypatch.setattr(pull_images_module, "load_dataset_swebench", lambda *args: contextlib.nullcontext(rows))
+    monkeypatch.setattr(pull_images_module, "docker_pull", fake_pull)
+    # No local listing: fall back to the state file.
+    monkeypatch.setattr(
+        image_plan_module, "run_docker", lambda args, timeout=None: subprocess.CompletedProcess(args, 1, "", "")
+    )
+    state_file = tmp_path / "state.json"
+    argv = ["--suite", "swebench-multilingual", "--parallel", "3", "--registry-rate", "0"]
+    argv += ["--state-file", str(state_file)]
+    assert pull_images_module.main(argv) == 3
+    assert sorted(pulled) == ["img-0", "img-1", "img-2"]
+    state = json.loads(state_file.read_text())
+    assert state["images"]["img-2"]["status"] == "failed"
+
+    pulled.clear()
+    assert pull_images_module.main(argv) == 3
+    assert pulled == ["img-2"]
+
+
+def test_main_skips_images_present_locally(monkeypatch, tmp_path):
+    rows = [{"instance_id": f"i{idx}", "docker_image": f"swebench/img-{idx}"} for idx in range(3)]
+    listing = json.dumps({"Repository": "swebench/img-1", "Tag": "latest", "ID": "sha256:x", "Size": "1GB"})
+    pulled = []
+    monkeypatch.setattr(pull_images_module, "load_dataset_swebench", lambda *args: contextlib.nullcontext(rows))
+    monkeypatch.setattr(pull_images_module, "docker_pull", lambda image, platform: (pulled.append(image) or True, ""))
+    monkeypatch.setattr(
+        image_plan_module, "run_docker", lambda args, timeout=None: subprocess.CompletedProcess(args, 0, listing, "")
+    )
+    argv = ["--suite", "swebench-multilingual", "--registry-rate", "0", "--state-file", str(tmp_path / "s.json")]
+    assert pull_images_module.main(argv) == 0
+    assert sorted(pulled) == ["swebench/img-0", "swebench/img-2"]
+
+
+def test_dry_run_lists_without_manifest_lookups(monkeypatch, tmp_path, capsys):
+    rows = [{"instance_id": f"i{idx}", "docker_image": f"swebench/img-{idx}"} for idx in range(2)]
+    calls = []
+    monkeypatch.setattr(pull_images_module, "load_dataset_swebench", lambda *args: contextlib.nullcontext(rows))
+    monkeypatch.setattr(
+        image_plan_module,
+        "run_docker",
+        lambda args, timeout=None: calls.append(args) or subprocess.CompletedProcess(args, 1, "", ""),
+    )
+    argv = ["--suite", "swebench-multilingual", "--dry-run", "--inspect-manifests", "--state-file", str(tmp_path / "s.json")]
+    assert pull_images_module.main(argv) == 0
+    assert not [args for args in calls if "manifest" in args]
+    assert "[2/2] swebench/img-1" in capsys.readouterr().out
+    assert not (tmp_path / "s.json").exists()
+
+
+def test_main_records_image_db_and_reports_footprint(monkeypatch, tmp_path, capsys):
+    rows = [{"instance_id": f"i{idx}", "docker_image": f"swebench/img-{idx % 2}"} for idx in range(3)]
+    listing = "\n".join(
+        json.dumps({"Repository": f"swebench/img-{idx}", "Tag": "latest", "ID": "x", "Size": "2GB"}) for idx in range(2)
+    )
+    monkeypatch.setattr(pull_images_module, "load_dataset_swebench", lambda *args: contextlib.nullcontext(rows))
+    monkeypatch.setattr(
+        image_plan_module, "run_docker", lambda args, timeout=None: subprocess.CompletedProcess(args, 0, listing, "")
+    )
+    db_file = tmp_path / "images.json"
+    argv = ["--suite", "swebench-multilingual", "--state-file", str(db_file)]
+    assert pull_images_module.main(argv) == 0
+    entry = json.loads(db_file.read_text())["images"]["swebench/img-0"]
+    assert (entry["status"], entry["size"]) == ("pulled", 2 * 10**9)
+    assert entry["instances"] == {"swebench-multilingual": {"test": ["i0", "i2"]}}
+
+    monkeypatch.setattr(pull_images_module, "load_dataset_swebench", None)
+    monkeypatch.setattr(image_plan_module, "run_docker", None)
+    capsys.readouterr()
+    assert pull_images_module.main([*argv, "--footprint"]) == 0
+    assert "swebench-multilingual/test: 2/2 images pulled, 3.7 GiB" in capsys.readouterr().out
+
+
+def test_prefetcher_follows_run_order_and_evicts_finished_images():
+    local = {}
+    order = [("i0", "img/a"), ("i1", "img/a"), ("i2", "img/b"), ("i3", "img/c"), ("i4", "img/d"), ("i5", "img/e")]
+
+    def pull(image):
+        local[f"{image}:latest"] = {"id": image, "size": 10**9}
+        return True
+
+    def remove(image):
+        return local.pop(f"{image}:latest", None) is not None
+
+    prefetcher = pull_images_module.Prefetcher(
+        order, window=3, budget_bytes=3 * 10**9, pull=pull, remove=remove, list_local=lambda: dict(local)
+    )
+    first = prefetcher.step(set(), set())
+    assert first["pulled"] == ["img/a", "img/b"]
+
+    second = prefetcher.step({"i0", "i1", "i2"}, {"i0", "i1"})
+    assert second["evicted"] == ["img/a"]
+    assert second["pulled"] == ["img/c", "img/d"]
+    assert second["deferred"] == ["img/e"]
+    assert sorted(local) == ["img/b:latest", "img/c:latest", "img/d:latest"]
+    assert not prefetcher.finished({i for i, _ in order}, {"i0"})
+
+
+def test_prefetcher_keeps_unfinished_images_unless_evict_upcoming():
+    order = [("i0", "img/a"), ("i1", "img/b"), ("i2", "img/c"), ("i3", "img/d")]
+
+    def run(evict_upcoming):
+        local = {f"img/{name}:latest": {"id": name, "size": 10**9} for name in "bcd"}
+        removed = []
+
+        def remove(image):
+            removed.append(image)
+            return local.pop(f"{image}:latest", None) is not None
+
+        prefetcher = pull_images_module.Prefetcher(
+            order,
+            window=1,
+            budget_bytes=2 * 10**9,
+            pull=lambda image: True,
+            remove=remove,
+            list_local=lambda: dict(local),
+            evict_upcoming=evict_upcoming,
+        )
+        return prefetcher.step(set(), set()), removed
+
+    result, removed = run(evict_upcoming=False)
+    assert removed == []
+    assert result["pulled"] == ["img/a"]
+    assert result["over_budget"]
+
+    result, removed = run(evict_upcoming=True)
+    assert removed == ["img/d", "img/c"]
+    assert not result["over_budget"]
+
+
+def test_prefetch_dry_run_prints_plan_without_pulling_or_removing(monkeypatch, tmp_path, capsys):
+    rows = [{"instance_id": f"i{idx}", "docker_image": f"swebench/img-{idx}"} for idx in range(3)]
+    listing = json.dumps({"Repository": "swebench/img-0", "Tag": "latest", "ID": "x", "Size": "2GB"})
+    calls = []
+    monkeypatch.setattr(pull_images_module, "load_dataset_swebench", lambda *args: contextlib.nullcontext(rows))
+    monkeypatch.setattr(
+        image_plan_module,
+        "run_docker",
+        lambda args, timeout=None: calls.append(args) or subprocess.CompletedProcess(args, 0, listing, ""),
+    )
+    monkeypatch.setattr(pull_images_module, "run_docker", image_plan_module.run_docker)
+    preds = tmp_path / "preds.json"
+    preds.write_text(json.dumps({"i0": {}}))
+    argv = ["--suite", "swebench-multilingual", "--prefetch", "1", "--disk-budget-gb", "2", "--dry-run"]
+    argv += ["--agent-preds", str(preds), "--eval-dir", str(tmp_path / "eval"), "--state-file", str(tmp_path / "s.json")]
+    assert pull_images_module.main(argv) == 0
+    assert all(args[:2] == ["image", "ls"] for args in calls)
+    out = capsys.readouterr().out
+    assert "Would pull: swebench/img-1" in out
+    assert "Would evict" not in out
+    assert not (tmp_path / "s.json").exists()
+
+
+def test_export_bundle_dry_run_lists_without_saving(monkeypatch, tmp_path, capsys):
+    rows = [{"instance_id": f"i{idx}", "docker_image": f"swebench/img-{idx}"} for idx in range(3)]
+    listing = "\n".join(
+        json.dumps({"Repository": f"swebench/img-{idx}", "Tag": "latest", "ID": "x", "Size": "1GB"}) for idx in range(2)
+    )
+    calls = []
+    monkeypatch.setattr(pull_images_module, "load_dataset_swebench", lambda *args: contextlib.nullcontext(rows))
+    monkeypatch.setattr(
+        image_plan_module,
+        "run_docker",
+        lambda args, timeout=None: calls.append(args) or subprocess.CompletedProcess(args, 0, listing, ""),
+    )
+    bundle_dir = tmp_path / "bundle"
+    argv = ["--suite", "swebench-multilingual", "--export-bundle", str(bundle_dir), "--dry-run"]
+    argv += ["--state-file", str(tmp_path / "s.json")]
+    assert pull_images_module.main(argv) == 0
+    assert all(args[:2] == ["image", "ls"] for args in calls)
+    assert not bundle_dir.exists()
+    out = capsys.readouterr().out
+    assert "[2/2] would export swebench/img-1" in out
+    assert "0 of 2 present images already exported" in out
+
+
+def test_read_instance_ids_accepts_json_and_jsonl(tmp_path):
+    mapping = tmp_path / "preds.json"
+    mapping.write_text(json.dumps({"a": {}, "b": {}}))
+    records = tmp_path / "preds.jsonl"
+    records.write_text('{"instance_id": "c"}\n{"instance_id": "d"}\n')
+    assert pull_images_module.read_instance_ids(str(mapping)) == {"a", "b"}
+    assert pull_images_module.read_instance_ids(str(records)) == {"c", "d"}
+    assert pull_images_module.read_instance_ids(str(tmp_path / "missing.json")) == set()
+    (tmp_path / "eval" / "a").mkdir(parents=True)
+    (tmp_path / "eval" / "a" / "report.json").write_text("{}")
+    (tmp_path / "eval" / "b").mkdir()
+    assert pull_images_module.evaluated_instance_ids([str(tmp_path / "eval")]) == {"a"}
@@ -3,7 +3,9 @@ import os
 import tempfile
 import unittest
 
+from scripts.swebench_eval_index import EvalIndex
 from scripts.swebench_report_metrics import (
+    calculate_eval_dir_metrics,
     calculate_live_metrics,
     calculate_swebench_metrics,
     render_markdown,
@@ -27,6 +29,26 @@ class TestSWEbenchReportMetrics(unittest.TestCase):
             self.assertAlmostEqual(metrics["pass_rate"], 0.4)
             self.assertEqual(metrics["errors"], 2)
 
+    def test_calculate_eval_dir_metrics(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for instance_id, resolved in [("a", True), ("b", False)]:
+                os.makedirs(os.path.join(tmpdir, instance_id))
+                with open(os.path.join(tmpdir, instance_id, "report.json"), "w", encoding="utf-8") as handle:
+                    json.dump({instance_id: {"resolved": resolved}}, handle)
+            os.makedirs(os.path.join(tmpdir, "c"))
+            with open(os.path.join(tmpdir, "c", "run_instance.log"), "w", encoding="utf-8") as handle:
+                handle.write("EvaluationError")
+            # Still running: a log without a report or error signature is not an error.
+            os.makedirs(os.path.join(tmpdir, "d"))
+            with open(os.path.join(tmpdir, "d", "run_instance.log"), "w", encoding="utf-8") as handle:
+                handle.write("Running tests...")
+            metrics = calculate_eval_dir_metrics(tmpdir, EvalIndex())
+            self.assertEqual(metrics["total_tasks"], 4)
+            self.assertEqual(metrics["solved"], 1)
+            self.assertEqual(metrics["errors"], 1)
+            self.assertEqual(metrics["pending"], 1)
+            self.assertAlmostEqual(metrics["pass_rate"], 1 / 4)
+
     def test_calculate_live_metrics(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             for split, success, failure, error in [("c", 2, 3, 1), ("cpp", 1, 1, 0)]:
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from scripts.swebench_generate_predictions import generate_patch
+from scripts.swebench_response_cache import ResponseCache, cache_key
+
+
+def completion(content):
+    return {"content": content, "finish_reason": "stop", "usage": None, "truncated_early": None}
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_cache_key_covers_request_parameters(self):
+        base = cache_key("m", "sys", "user", 0.0, 2048)
+        self.assertEqual(base, cache_key("m", "sys", "user", 0, 2048))
+        self.assertNotEqual(base, cache_key("m2", "sys", "user", 0.0, 2048))
+        self.assertNotEqual(base, cache_key("m", "sys", "user2", 0.0, 2048))
+        self.assertNotEqual(base, cache_key("m", "sys", "user", 0.2, 2048))
+        self.assertNotEqual(base, cache_key("m", "sys", "user", 0.0, 1024))
+        self.assertEqual(base, cache_key("m", "sys", "user", 0.0, 2048, 1))
+        self.assertNotEqual(base, cache_key("m", "sys", "user", 0.0, 2048, 4))
+        self.assertNotEqual(base, cache_key("m", "sys", "user", 0.0, 2048, stream=True))
+
+    def test_put_get_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResponseCache(tmpdir, max_bytes=1 << 20)
+            self.assertIsNone(cache.get("ab" * 32))
+            cache.put("ab" * 32, completion("diff"))
+            self.assertEqual(cache.get("ab" * 32)["content"], "diff")
+            reopened = ResponseCache(tmpdir, max_bytes=1 << 20)
+            self.assertEqual(reopened.total_bytes, cache.total_bytes)
+
+    def test_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResponseCache(tmpdir, max_bytes=1 << 20)
+            keys = [f"{idx:02d}" * 32 for idx in range(3)]
+            for offset, key in enumerate(keys):
+                cache.put(key, completion("x" * 100))
+                stamp = time.time() - 100 + offset
+                os.utime(cache._path(key), (stamp, stamp))
+            cache.get(keys[0])
+            cache.max_bytes = cache.total_bytes - 1
+            cache.put("ff" * 32, completion("y"))
+            self.assertIsNotNone(cache.get(keys[0]))
+            self.assertIsNone(cache.get(keys[1]))
+            self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+
+    def _generate(self, cache, temperature, stream=False):
+        return generate_patch(
+            api_base="http://localhost:8000/v1",
+            model="m",
+            instance={"instance_id": "a", "repo": "r", "problem_statement": "p"},
+            temperature=temperature,
+            max_tokens=16,
+            timeout=5,
+            api_key=None,
+            dry_run=False,
+            cache=cache,
+            stream=stream,
+        )
+
+    def test_generate_patch_serves_temperature_zero_from_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResponseCache(tmpdir, max_bytes=1 << 20)
+            target = "scripts.swebench_generate_predictions.openai_chat_completion"
+            with patch(target, return_value=completion("first")) as mock_call:
+                self.assertEqual(self._generate(cache, 0.0)["content"], "first")
+                self.assertEqual(self._generate(cache, 0.0)["content"], "first")
+                self.assertEqual(mock_call.call_count, 1)
+                stored = cache.total_bytes
+                self._generate(cache, 0.7)
+                self._generate(cache, 0.7)
+                self.assertEqual(mock_call.call_count, 3)
+                self.assertEqual(cache.total_bytes, stored)
+
+    def test_streamed_completions_are_not_served_to_full_requests(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResponseCache(tmpdir, max_bytes=1 << 20)
+            target = "scripts.swebench_generate_predictions.openai_chat_completion"
+            cut = {**completion("cut"), "truncated_early": "diff_complete"}
+            with patch(target, side_effect=[cut, completion("full")]) as mock_call:
+                self.assertEqual(self._generate(cache, 0.0, stream=True)["content"], "cut")
+                self.assertEqual(self._generate(cache, 0.0)["content"], "full")
+                self.assertEqual(self._generate(cache, 0.0, stream=True)["content"], "cut")
+                self.assertEqual(mock_call.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from scripts.swebench_system_stats import (
+    cpu_stats,
+    gpu_stats,
+    load_average,
+    memory_stats,
+    pressure,
+    process_cmdlines,
+    system_stats,
+)
+
+MEMINFO = """MemTotal:       16000000 kB
+MemFree:         2000000 kB
+MemAvailable:   12000000 kB
+SwapTotal:       4000000 kB
+SwapFree:        3000000 kB
+HugePages_Total:       0
+"""
+
+
+class TestSystemStats(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.proc = self.tmpdir.name
+        self.write("meminfo", MEMINFO)
+        self.write("stat", "cpu  100 0 50 800 50 0 0 0 0 0\ncpu0 100 0 50 800 50 0 0 0 0 0\n")
+        self.write("loadavg", "0.50 1.25 2.00 1/300 4242\n")
+        self.write("pressure/cpu", "some avg10=1.50 avg60=1.00 avg300=0.50 total=100\n")
+        self.write(
+            "pressure/memory",
+            "some avg10=0.25 avg60=0.00 avg300=0.00 total=1\nfull avg10=0.10 avg60=0.00 avg300=0.00 total=1\n",
+        )
+        self.write("42/cmdline", "python\0-m\0swebench.harness.run_evaluation\0")
+        self.write("7/cmdline", "")
+        self.write("self/cmdline", "ignored\0")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.proc, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(text)
+
+    def test_memory_load_pressure_and_processes(self):
+        memory = memory_stats(self.proc)
+        self.assertEqual(memory["mem_total"], 16000000 * 1024)
+        self.assertEqual(memory["mem_used"], 4000000 * 1024)
+        self.assertEqual(memory["swap_used"], 1000000 * 1024)
+        self.assertEqual(load_average(self.proc), (0.5, 1.25, 2.0))
+        self.assertEqual(pressure(self.proc), {"cpu": {"some": 1.5}, "memory": {"some": 0.25, "full": 0.1}})
+        self.assertEqual(process_cmdlines(self.proc), [(42, "python -m swebench.harness.run_evaluation")])
+
+    def test_cpu_delta_reuses_recent_sample_without_sleeping(self):
+        sample = Path(self.proc) / "cpu-sample.json"
+        sample.write_text(json.dumps({"time": time.time() - 5, "times": [50, 0, 25, 700, 25, 0, 0, 0]}))
+        with patch("scripts.swebench_system_stats.time.sleep") as sleep:
+            usage = cpu_stats(self.proc, sample)
+        sleep.assert_not_called()
+        self.assertAlmostEqual(usage["user"], 25.0)
+        self.assertAlmostEqual(usage["system"], 12.5)
+        self.assertAlmostEqual(usage["idle"], 50.0)
+        self.assertEqual(json.loads(sample.read_text())["times"][:4], [100, 0, 50, 800])
+
+    def test_system_stats_writes_to_the_given_paths_only(self):
+        sample = Path(self.proc) / "cache" / "cpu-sample.json"
+        with patch("scripts.swebench_system_stats.shutil.which", return_value=None):
+            stats = system_stats(self.proc, sample_path=sample, cache_path=Path(self.proc) / "cache" / "gpu.json")
+        self.assertIsNone(stats["gpus"])
+        self.assertEqual(stats["load"], (0.5, 1.25, 2.0))
+        self.assertEqual(sorted(p.name for p in sample.parent.iterdir()), ["cpu-sample.json"])
+
+    def test_gpu_query_is_optional_and_cached(self):
+        cache = Path(self.proc) / "gpu.json"
+        with patch("scripts.swebench_system_stats.shutil.which", return_value=None):
+            self.assertIsNone(gpu_stats(cache))
+        output = "NVIDIA GB10, 37, 12, [N/A], [N/A]\n"
+        with patch("scripts.swebench_system_stats.shutil.which", return_value="/usr/bin/nvidia-smi"), patch(
+            "scripts.swebench_system_stats.subprocess.run",
+            return_value=subprocess.CompletedProcess([], 0, output, ""),
+        ) as run:
+            first = gpu_stats(cache)
+            second = gpu_stats(cache)
+        run.assert_called_once()
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]["utilization.gpu"], "37")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+
+from scripts.swebench_telemetry import RunTelemetry, percentile, request_record
+
+
+def result(instance_id, latency, completion_tokens=100, ttft=None, **extra):
+    payload = {
+        "instance_id": instance_id,
+        "latency": latency,
+        "ttft": ttft,
+        "queue_time": 0.5,
+        "usage": {"prompt_tokens": 1000, "completion_tokens": completion_tokens},
+        "cached_tokens": None,
+        "finish_reason": "stop",
+        "truncated_early": False,
+        "cache_hit": False,
+    }
+    payload.update(extra)
+    return payload
+
+
+class TestTelemetry(unittest.TestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 90), 90)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3.0], 99), 3.0)
+        self.assertIsNone(percentile([], 50))
+
+    def test_request_record_decode_rate_excludes_ttft(self):
+        record = request_record(result("a", latency=3.0, ttft=1.0, completion_tokens=100))
+        self.assertEqual(record["decode_tps"], 50.0)
+        self.assertEqual(record["prompt_tokens"], 1000)
+        self.assertEqual(record["queue_time"], 0.5)
+        record = request_record(result("b", latency=2.0, completion_tokens=100))
+        self.assertEqual(record["decode_tps"], 50.0)
+
+    def test_sidecar_and_summary(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "preds.jsonl.metrics.jsonl")
+            telemetry = RunTelemetry(path)
+            for idx in range(10):
+                telemetry.add(result(f"i{idx}", latency=float(idx + 1), cached_tokens=500))
+            telemetry.add(result("hit", latency=0.001, cache_hit=True))
+            telemetry.add(result("skip", latency=0.0, finish_reason="admission_rejected", usage=None))
+            with open(path, "r", encoding="utf-8") as handle:
+                lines = [json.loads(line) for line in handle]
+            self.assertEqual(len(lines), 12)
+
+            summary = telemetry.write_summary(os.path.join(tmpdir, "summary.json"))
+            self.assertEqual(summary["requests"], 10)
+            self.assertEqual(summary["cache_hits"], 1)
+            self.assertEqual(summary["skipped"], 1)
+            self.assertEqual(summary["latency"]["p50"], 5.0)
+            self.assertEqual(summary["latency"]["p90"], 9.0)
+            self.assertEqual(summary["latency"]["p99"], 10.0)
+            self.assertEqual(summary["completion_tokens"], 1000)
+            self.assertEqual(summary["cached_tokens"], 5000)
+            self.assertEqual(summary["finish_reasons"], {"stop": 10})
+            self.assertIsNotNone(summary["throughput"]["completion_tokens_per_s"])
+            rendered = telemetry.render_summary(summary)
+            self.assertIn("p99=10.00s", rendered)
+            self.assertIn("(50.0%)", rendered)
+
+    def test_summary_breaks_down_endpoints(self):
+        telemetry = RunTelemetry()
+        telemetry.add(result("a", latency=1.0, endpoint="http://a/v1"))
+        telemetry.add(result("b", latency=3.0, endpoint="http://b/v1"))
+        telemetry.add(result("c", latency=2.0, endpoint="http://b/v1"))
+        summary = telemetry.summary()
+        self.assertEqual(summary["endpoints"]["http://a/v1"]["requests"], 1)
+        self.assertEqual(summary["endpoints"]["http://b/v1"]["completion_tokens"], 200)
+        self.assertEqual(summary["endpoints"]["http://b/v1"]["latency_p50"], 2.0)
+        self.assertIn("- http://b/v1: 2 requests", telemetry.render_summary(summary))
+
+    def test_summary_folds_in_balancer_failures(self):
+        telemetry = RunTelemetry()
+        telemetry.add(result("a", latency=1.0, endpoint="http://a/v1"))
+        stats = {
+            "http://a/v1": {"requests": 1, "failures": 0, "ejections": 0},
+            "http://b/v1": {"requests": 2, "failures": 2, "ejections": 1},
+        }
+        summary = telemetry.summary(stats)
+        self.assertEqual(summary["endpoints"]["http://b/v1"]["requests"], 0)
+        self.assertEqual(summary["endpoints"]["http://b/v1"]["ejections"], 1)
+        self.assertIn("2 failures, 1 ejections", telemetry.render_summary(summary))
+
+
+if __name__ == "__main__":
+    unittest.main()
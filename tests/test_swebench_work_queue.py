@@ -0,0 +1,147 @@
+import contextlib
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from scripts.swebench_generate_predictions import main as generate_main
+from scripts.swebench_work_queue import LeaseKeeper, WorkQueue, claim_instances, main
+
+
+def drain_queue(db_path, worker, delay):
+    queue = WorkQueue(db_path, lease_seconds=30)
+    while True:
+        claimed = queue.claim(worker)
+        if not claimed:
+            return
+        time.sleep(delay)
+        queue.complete(worker, claimed[0], {"worker": worker})
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmpdir.name, "queue.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_add_is_idempotent_and_claims_follow_dataset_order(self):
+        queue = WorkQueue(self.db)
+        self.assertEqual(queue.add(["a", "b", "c"]), 3)
+        self.assertEqual(queue.add(["b", "c", "d"]), 1)
+        self.assertEqual(queue.claim("w1", limit=2), ["a", "b"])
+        self.assertEqual(queue.claim("w2"), ["c"])
+        self.assertTrue(queue.complete("w1", "a", {"patch": "x"}))
+        self.assertFalse(queue.complete("w2", "b"))
+        counts = queue.counts()
+        self.assertEqual((counts["done"], counts["leased"], counts["pending"]), (1, 2, 1))
+        self.assertEqual(queue.results(), [{"instance_id": "a", "result": {"patch": "x"}}])
+
+    def test_expired_lease_is_reclaimed_and_fails_after_max_attempts(self):
+        queue = WorkQueue(self.db, lease_seconds=0.05, max_attempts=2)
+        queue.add(["a"])
+        self.assertEqual(queue.claim("dead"), ["a"])
+        self.assertEqual(queue.claim("w2"), [])
+        time.sleep(0.1)
+        self.assertEqual(queue.counts()["expired"], 1)
+        self.assertEqual(queue.claim("w2"), ["a"])
+        self.assertEqual(queue.heartbeat("dead", ["a"]), set())
+        self.assertFalse(queue.complete("dead", "a"))
+        time.sleep(0.1)
+        self.assertEqual(queue.claim("w3"), [])
+        self.assertEqual(queue.counts()["failed"], 1)
+        self.assertEqual(queue.requeue(), 1)
+        self.assertEqual(queue.claim("w3"), ["a"])
+
+    def test_lease_keeper_heartbeats_and_releases_on_exit(self):
+        queue = WorkQueue(self.db, lease_seconds=0.15)
+        queue.add(["a", "b"])
+        with LeaseKeeper(queue, "w1", interval=0.03) as keeper:
+            rows = claim_instances(queue, keeper, {"a": {"instance_id": "a"}, "b": {"instance_id": "b"}})
+            self.assertEqual(next(rows)["instance_id"], "a")
+            time.sleep(0.3)
+            self.assertEqual(queue.claim("w2"), ["b"])
+            keeper.drop("a")
+            self.assertTrue(queue.complete("w1", "a"))
+            next_row = next(rows, None)
+        self.assertIsNone(next_row)
+        self.assertEqual(queue.counts()["done"], 1)
+
+    def test_unknown_instances_are_skipped_without_using_attempts(self):
+        queue = WorkQueue(self.db, max_attempts=1)
+        queue.add(["other", "a"])
+        with LeaseKeeper(queue, "w1", interval=0.03) as keeper:
+            rows = claim_instances(queue, keeper, {"a": {"instance_id": "a"}})
+            self.assertEqual(next(rows)["instance_id"], "a")
+            keeper.drop("a")
+            queue.complete("w1", "a", {"instance_id": "a"})
+            self.assertIsNone(next(rows, None))
+        self.assertEqual(queue.counts()["failed"], 0)
+        self.assertEqual(queue.claim("w2"), ["other"])
+
+    def test_complete_without_result_is_not_exported(self):
+        queue = WorkQueue(self.db)
+        queue.add(["a", "b"])
+        queue.claim("w1", limit=2)
+        queue.complete("w1", "a")
+        queue.complete("w1", "b", {"instance_id": "b"})
+        output = os.path.join(self.tmpdir.name, "preds.jsonl")
+        self.assertEqual(main(["--db", self.db, "export", "--suite", "swebench-multilingual", "--output", output]), 0)
+        with open(output, encoding="utf-8") as handle:
+            self.assertEqual(handle.read().splitlines(), ['{"instance_id": "b"}'])
+
+    def test_several_processes_finish_each_task_once(self):
+        queue = WorkQueue(self.db)
+        ids = [f"i{idx}" for idx in range(40)]
+        queue.add(ids)
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(target=drain_queue, args=(self.db, f"w{idx}", 0.01)) for idx in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            self.assertEqual(worker.exitcode, 0)
+        results = queue.results()
+        self.assertEqual([item["instance_id"] for item in results], ids)
+        self.assertGreater(len({item["result"]["worker"] for item in results}), 1)
+        self.assertEqual(queue.counts()["done"], 40)
+
+    def test_generator_workers_share_queue_and_export(self):
+        rows = [{"instance_id": f"i{idx}", "repo": "r", "problem_statement": "p"} for idx in range(6)]
+        output = os.path.join(self.tmpdir.name, "preds.jsonl")
+        base = ["--suite", "swebench-multilingual", "--model", "m", "--output", output]
+        completion = {"content": "", "finish_reason": "stop", "usage": None, "truncated_early": None, "ttft": None}
+        with patch("scripts.swebench_generate_predictions.load_dataset_swebench", return_value=contextlib.nullcontext(rows)), patch(
+            "scripts.swebench_generate_predictions.generate_patch", return_value=completion
+        ):
+            generate_main([*base, "--queue", self.db, "--worker-id", "a", "--max-instances", "2"])
+            generate_main([*base, "--queue", self.db, "--worker-id", "b"])
+        with open(os.path.join(self.tmpdir.name, "preds.worker-a.jsonl"), encoding="utf-8") as handle:
+            self.assertEqual(len(handle.readlines()), 2)
+        merged = os.path.join(self.tmpdir.name, "merged.jsonl")
+        self.assertEqual(
+            main(["--db", self.db, "export", "--suite", "swebench-multilingual", "--output", merged]), 0
+        )
+        with open(merged, encoding="utf-8") as handle:
+            records = [json.loads(line) for line in handle]
+        self.assertEqual([r["instance_id"] for r in records], [r["instance_id"] for r in rows])
+
+
+    def test_dry_run_worker_leaves_tasks_pending(self):
+        rows = [{"instance_id": f"i{idx}", "repo": "r", "problem_statement": "p"} for idx in range(3)]
+        output = os.path.join(self.tmpdir.name, "preds.jsonl")
+        argv = ["--suite", "swebench-multilingual", "--model", "m", "--output", output, "--dry-run"]
+        with patch("scripts.swebench_generate_predictions.load_dataset_swebench", return_value=contextlib.nullcontext(rows)):
+            generate_main([*argv, "--queue", self.db, "--worker-id", "a"])
+        queue = WorkQueue(self.db)
+        self.assertEqual(queue.counts()["done"], 0)
+        self.assertEqual(queue.claim("real", limit=3), ["i0", "i1", "i2"])
+
+if __name__ == "__main__":
+    unittest.main()